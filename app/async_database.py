@@ -0,0 +1,277 @@
+import asyncio
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from fastapi import HTTPException, status
+from app.database import DB_POOL_SIZE, get_db_connection, pool, warm_up
+
+# 🔹 Concurrence de la couche asynchrone (surchargée par les variables d'environnement)
+DB_READ_CONCURRENCY = int(os.getenv("DB_READ_CONCURRENCY", str(DB_POOL_SIZE)))  # Threads de lecture
+DB_MAX_PENDING_WRITES = int(os.getenv("DB_MAX_PENDING_WRITES", "100"))  # Écritures en file avant attente
+DB_WRITE_QUEUE_TIMEOUT = float(os.getenv("DB_WRITE_QUEUE_TIMEOUT", "5"))  # Attente max d'une place (s)
+# Commits groupés (write_grouped) : désactivés par défaut, chaque écriture a alors son propre commit
+DB_GROUP_COMMIT = os.getenv("DB_GROUP_COMMIT", "false").lower() in ("1", "true", "yes")
+DB_GROUP_COMMIT_ROWS = int(os.getenv("DB_GROUP_COMMIT_ROWS", "200"))  # Écritures max par commit
+DB_GROUP_COMMIT_DELAY_MS = float(os.getenv("DB_GROUP_COMMIT_DELAY_MS", "5"))  # Attente max avant le commit
+DB_GROUP_COMMIT_MAX_DEPTH = int(os.getenv("DB_GROUP_COMMIT_MAX_DEPTH", "2000"))  # Écritures groupées en file
+
+
+class AsyncDatabase:
+    """Accès SQLite non bloquant pour les handlers async, à la manière d'aiosqlite.
+
+    Les lectures s'exécutent sur un exécuteur dédié avec des connexions du
+    pool ; les écritures passent par un unique thread écrivain qui garde sa
+    propre connexion. Les lecteurs n'attendent donc jamais derrière une
+    écriture (WAL + sqlite3 relâche le GIL pendant les requêtes) et les
+    écrivains de l'application ne se disputent pas le verrou SQLite.
+
+    Au-delà de max_pending_writes écritures en file, les appelants attendent
+    une place (contre-pression) puis reçoivent une 503 après write_timeout.
+
+    Avec group_commit, write_grouped() regroupe les écritures en file dans
+    une même transaction (un commit, donc une synchronisation du WAL, pour
+    jusqu'à group_rows écritures), dans une file bornée à group_max_depth.
+    """
+
+    def __init__(self, readers=DB_READ_CONCURRENCY, max_pending_writes=DB_MAX_PENDING_WRITES,
+                 write_timeout=DB_WRITE_QUEUE_TIMEOUT, group_commit=DB_GROUP_COMMIT,
+                 group_rows=DB_GROUP_COMMIT_ROWS, group_delay_ms=DB_GROUP_COMMIT_DELAY_MS,
+                 group_max_depth=DB_GROUP_COMMIT_MAX_DEPTH):
+        self.readers = readers
+        self.max_pending_writes = max_pending_writes
+        self.write_timeout = write_timeout
+        self.group_commit = group_commit
+        self.group_rows = group_rows
+        self.group_delay_ms = group_delay_ms
+        self.group_max_depth = group_max_depth
+        self._read_executor = None
+        self._write_executor = None
+        self._writer_local = threading.local()
+        self._write_slots = weakref.WeakKeyDictionary()  # Boucle asyncio -> Semaphore
+        self._group_slots = weakref.WeakKeyDictionary()
+        self._group = deque()  # (fn, args, Future) en attente du prochain commit groupé
+        self._group_cond = threading.Condition()
+        self._group_draining = False
+        self._closing = False
+        self._lock = threading.Lock()
+        self.pending_writes = 0
+        self.pending_grouped_writes = 0
+
+    def _executors(self):
+        with self._lock:
+            if self._read_executor is None:
+                self._read_executor = ThreadPoolExecutor(self.readers, thread_name_prefix="db-read")
+                self._write_executor = ThreadPoolExecutor(1, thread_name_prefix="db-write")
+            return self._read_executor, self._write_executor
+
+    def _slots(self, registry=None, size=None):
+        registry = self._write_slots if registry is None else registry
+        loop = asyncio.get_running_loop()
+        slots = registry.get(loop)
+        if slots is None:
+            slots = registry[loop] = asyncio.Semaphore(size or self.max_pending_writes)
+        return slots
+
+    async def _acquire(self, slots):
+        try:
+            await asyncio.wait_for(slots.acquire(), self.write_timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="Trop d'écritures en attente, réessayez plus tard")
+
+    def _run_read(self, fn, args):
+        try:
+            conn = pool.acquire()
+        except TimeoutError:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="Base de données saturée, réessayez plus tard")
+        try:
+            return fn(conn, *args)
+        finally:
+            pool.release(conn)
+
+    def _writer_connection(self):
+        conn = getattr(self._writer_local, "conn", None)
+        if conn is None:
+            conn = self._writer_local.conn = get_db_connection()
+        return conn
+
+    def _run_write(self, fn, args):
+        conn = self._writer_connection()
+        callbacks = self._writer_local.after_commit = []
+        try:
+            result = fn(conn, *args)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._writer_local.after_commit = None
+        for callback in callbacks:
+            callback()
+        return result
+
+    def _drain_group(self):
+        """Vide la file des écritures groupées, un commit par lot (thread écrivain).
+        """
+        while True:
+            with self._group_cond:
+                if not self._group:
+                    self._group_draining = False
+                    return
+                # Laisse le lot se remplir jusqu'à group_rows ou group_delay_ms (sans attendre à l'arrêt)
+                deadline = time.monotonic() + self.group_delay_ms / 1000
+                while len(self._group) < self.group_rows and not self._closing:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._group_cond.wait(remaining)
+                batch = [self._group.popleft() for _ in range(min(self.group_rows, len(self._group)))]
+            self._commit_group(batch)
+
+    def _commit_group(self, batch):
+        """Exécute un lot dans une transaction, chaque écriture dans son SAVEPOINT.
+
+        Une erreur d'écriture n'annule que la sienne ; un échec du commit est
+        rendu à tout le lot. Les résultats ne sont rendus qu'après le commit.
+        """
+        conn = self._writer_connection()
+        outcomes = []  # (Future, résultat, exception, callbacks après commit)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for fn, args, future in batch:
+                callbacks = self._writer_local.after_commit = []
+                conn.execute("SAVEPOINT grouped_write")
+                try:
+                    result = fn(conn, *args)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO grouped_write")
+                    outcomes.append((future, None, e, ()))
+                else:
+                    outcomes.append((future, result, None, callbacks))
+                conn.execute("RELEASE grouped_write")
+            conn.commit()
+        except BaseException as e:
+            conn.rollback()
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        finally:
+            self._writer_local.after_commit = None
+        for future, result, error, callbacks in outcomes:
+            for callback in callbacks:
+                callback()
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def after_commit(self, callback):
+        """Programme callback() après le commit de l'écriture en cours ; abandonné si elle est annulée.
+
+        À appeler depuis une fonction passée à write() (thread écrivain).
+        """
+        self._writer_local.after_commit.append(callback)
+
+    async def warm_up(self):
+        """Préchauffe les exécuteurs, les connexions du pool et celle de l'écrivain.
+        """
+        read_executor, _ = self._executors()
+        await asyncio.get_running_loop().run_in_executor(read_executor, pool.warm, warm_up)
+        await self.write(warm_up)
+
+    async def read(self, fn, *args):
+        """Exécute fn(conn, *args) sur un thread de lecture et retourne son résultat.
+        """
+        read_executor, _ = self._executors()
+        return await asyncio.get_running_loop().run_in_executor(read_executor, self._run_read, fn, args)
+
+    async def write(self, fn, *args):
+        """Exécute fn(conn, *args) dans une transaction du thread écrivain, puis commit.
+
+        Une exception levée par fn annule la transaction et est propagée.
+
+        Raises:
+            HTTPException: File d'écriture saturée (503)
+        """
+        _, write_executor = self._executors()
+        slots = self._slots()
+        await self._acquire(slots)
+        self.pending_writes += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(write_executor, self._run_write, fn, args)
+        finally:
+            self.pending_writes -= 1
+            slots.release()
+
+    async def write_grouped(self, fn, *args):
+        """Comme write(), mais fn rejoint un commit groupé si group_commit est actif.
+
+        Le résultat (ou l'exception de fn) n'est rendu qu'une fois le lot
+        validé : l'acquittement reste durable.
+
+        Raises:
+            HTTPException: File des écritures groupées saturée (503)
+        """
+        if not self.group_commit:
+            return await self.write(fn, *args)
+        _, write_executor = self._executors()
+        slots = self._slots(self._group_slots, self.group_max_depth)
+        await self._acquire(slots)
+        self.pending_grouped_writes += 1
+        try:
+            future = Future()
+            with self._group_cond:
+                self._group.append((fn, args, future))
+                self._group_cond.notify()
+                start_draining = not self._group_draining
+                self._group_draining = True
+            if start_draining:
+                write_executor.submit(self._drain_group)
+            return await asyncio.wrap_future(future)
+        finally:
+            self.pending_grouped_writes -= 1
+            slots.release()
+
+    async def fetchone(self, sql, params=()):
+        return await self.read(lambda conn: conn.execute(sql, params).fetchone())
+
+    async def fetchall(self, sql, params=()):
+        return await self.read(lambda conn: conn.execute(sql, params).fetchall())
+
+    def stats(self):
+        """Statistiques : écritures en cours ou en file, et état du pool des lecteurs.
+        """
+        return {"readers": self.readers, "pending_writes": self.pending_writes,
+                "max_pending_writes": self.max_pending_writes,
+                "pending_grouped_writes": self.pending_grouped_writes, "pool": pool.stats()}
+
+    def close(self):
+        """Arrête les exécuteurs (les tâches en cours se terminent) et ferme les connexions.
+
+        Les écritures groupées en file sont validées immédiatement, sans attendre group_delay_ms.
+        """
+        with self._lock:
+            read_executor, write_executor = self._read_executor, self._write_executor
+            self._read_executor = self._write_executor = None
+        with self._group_cond:
+            self._closing = True
+            self._group_cond.notify_all()
+        if read_executor is not None:
+            read_executor.shutdown(wait=True)
+            write_executor.submit(self._close_writer).result()
+            write_executor.shutdown(wait=True)
+        pool.close_all()
+        self._closing = False
+
+    def _close_writer(self):
+        conn = getattr(self._writer_local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._writer_local.conn = None
+
+
+db = AsyncDatabase()
@@ -1,64 +1,216 @@
+import os
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from app.migrations import SCHEMA_VERSION, get_schema_version, migrate
+from app.utils.metrics import CONNECTION_FACTORY
 
-def get_db_connection():
-    """Connexion à la base de données SQLite.
+# 🔹 Paramètres de la base et du pool (surchargés par les variables d'environnement)
+DB_PATH = os.getenv("DB_PATH", "athlete_performance.db")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))  # Connexions gardées ouvertes
+DB_POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", "10"))  # Connexions temporaires en plus
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # Attente max d'une connexion (s)
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "16384"))
+DB_STATEMENT_CACHE = int(os.getenv("DB_STATEMENT_CACHE", "256"))  # Requêtes préparées gardées en cache
+
+
+def _configure_connection(conn):
+    """Applique les PRAGMA de performance une seule fois par connexion.
     """
-    conn = sqlite3.connect("athlete_performance.db")
     conn.row_factory = sqlite3.Row  # Permet d'accéder aux colonnes par leur nom
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA mmap_size = {DB_MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size = -{DB_CACHE_SIZE_KB}")  # Valeur négative = taille en KiB
+    conn.execute("PRAGMA temp_store = MEMORY")
     return conn
 
+
+def get_db_connection():
+    """Connexion à la base de données SQLite.
+
+    Ouvre une connexion dédiée (scripts, création des tables, thread
+    écrivain). Les lectures des routes passent par le pool (app.async_database).
+    """
+    conn = sqlite3.connect(DB_PATH, timeout=DB_BUSY_TIMEOUT_MS / 1000,
+                           cached_statements=DB_STATEMENT_CACHE, factory=CONNECTION_FACTORY)
+    return _configure_connection(conn)
+
+
+class ConnectionPool:
+    """Pool de connexions SQLite préconfigurées et réutilisables.
+
+    Les connexions libres sont réutilisées en LIFO pour garder chaud le cache
+    des requêtes préparées. Au-delà de pool_size, jusqu'à max_overflow
+    connexions temporaires sont ouvertes puis fermées à leur restitution.
+    """
+
+    def __init__(self, database, pool_size=DB_POOL_SIZE, max_overflow=DB_POOL_MAX_OVERFLOW,
+                 timeout=DB_POOL_TIMEOUT):
+        self.database = database
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self._idle = []
+        self._created = 0
+        self._checked_out = 0
+        self._waiting = 0
+        self._condition = threading.Condition()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.database, timeout=DB_BUSY_TIMEOUT_MS / 1000,
+                               cached_statements=DB_STATEMENT_CACHE, check_same_thread=False,
+                               factory=CONNECTION_FACTORY)
+        return _configure_connection(conn)
+
+    def acquire(self, timeout=None):
+        """Emprunte une connexion au pool.
+
+        Raises:
+            TimeoutError: Aucune connexion disponible dans le délai imparti
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                if self._idle:
+                    self._checked_out += 1
+                    return self._idle.pop()
+                if self._created < self.pool_size + self.max_overflow:
+                    self._created += 1
+                    self._checked_out += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("Aucune connexion disponible dans le pool")
+                self._waiting += 1
+                try:
+                    self._condition.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+        # Ouverture hors verrou : la configuration coûte quelques millisecondes
+        try:
+            return self._connect()
+        except Exception:
+            with self._condition:
+                self._created -= 1
+                self._checked_out -= 1
+                self._condition.notify()
+            raise
+
+    def release(self, conn):
+        """Restitue une connexion au pool (transaction en cours annulée).
+        """
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            reusable = True
+        except sqlite3.Error:
+            reusable = False
+
+        with self._condition:
+            self._checked_out -= 1
+            if reusable and len(self._idle) < self.pool_size:
+                self._idle.append(conn)
+                conn = None
+            else:
+                self._created -= 1
+            self._condition.notify()
+
+        if conn is not None:
+            conn.close()  # Connexion de débordement ou invalide
+
+    @contextmanager
+    def connection(self):
+        """Emprunte une connexion le temps d'un bloc with (hors dépendance FastAPI).
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def warm(self, prepare=None):
+        """Ouvre à l'avance les pool_size connexions (et exécute prepare(conn) sur chacune).
+
+        Évite de payer l'ouverture et la configuration des connexions sur les
+        premières requêtes d'un worker qui vient de démarrer.
+        """
+        conns = []
+        try:
+            for _ in range(self.pool_size):
+                conns.append(self.acquire())
+                if prepare is not None:
+                    prepare(conns[-1])
+        finally:
+            for conn in conns:
+                self.release(conn)
+
+    def close_all(self):
+        """Ferme toutes les connexions libres du pool.
+        """
+        with self._condition:
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+        for conn in idle:
+            conn.close()
+
+    def stats(self):
+        """Statistiques du pool : connexions ouvertes, empruntées et en attente.
+        """
+        with self._condition:
+            return {
+                "pool_size": self.pool_size,
+                "max_overflow": self.max_overflow,
+                "open": self._created,
+                "idle": len(self._idle),
+                "checked_out": self._checked_out,
+                "waiting": self._waiting,
+            }
+
+
+pool = ConnectionPool(DB_PATH)
+
+
 def create_tables():
     """Création des tables de la base de données SQLite.
+
+    Applique les migrations de app.migrations (tables, index) jusqu'à la
+    dernière version du schéma. Si PRAGMA user_version est déjà à jour,
+    aucune requête DDL n'est exécutée : le contrôle se fait sur une connexion
+    du pool, qui reste ouverte pour les requêtes.
+
+    Returns:
+        bool: True si des migrations ont été appliquées
     """
+    with pool.connection() as conn:
+        if get_schema_version(conn) >= SCHEMA_VERSION:
+            return False
+
     conn = get_db_connection()
-    cursor = conn.cursor()
-    
-   # Table des utilisateurs (user)
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS users (
-        id_user INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT NOT NULL UNIQUE,
-        nom TEXT NOT NULL,
-        prenom TEXT NOT NULL,
-        email TEXT NOT NULL UNIQUE,
-        token TEXT,
-        password TEXT NOT NULL,
-        role TEXT CHECK(role IN ('coach', 'athlete')) NOT NULL
-    )
-    ''')
-
-    # Table des détails de l'utilisateur (details)
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS details (
-        id_details INTEGER PRIMARY KEY AUTOINCREMENT,
-        id_user INTEGER NOT NULL,
-        gender TEXT,
-        age INTEGER,
-        weight REAL,
-        height REAL,
-        FOREIGN KEY (id_user) REFERENCES users(id_user)
-    )
-    ''')
-
-    # Table des performances (performance)
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS performances (
-        id_performance INTEGER PRIMARY KEY AUTOINCREMENT,
-        id_user INTEGER NOT NULL,
-        power_max REAL,
-        hr_max REAL,
-        vo2_max REAL,
-        rf_max REAL,
-        cadence_max REAL,
-        vo2_class TEXT,
-        ressenti INTEGER,
-        date_performance TEXT DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (id_user) REFERENCES users(id_user)
-    )
-    ''')
-
-    conn.commit()
-    conn.close()
-
-# Création des tables au lancement du script
-create_tables()
\ No newline at end of file
+    try:
+        migrate(conn)
+    finally:
+        conn.close()
+    return True
+
+
+# 🔹 Petites tables lues par presque toutes les requêtes, chargées en cache au démarrage
+WARM_UP_QUERIES = [
+    "SELECT COUNT(*) FROM users",
+    "SELECT COUNT(*) FROM resource_versions",
+    "SELECT COUNT(*) FROM leaderboard",
+    "SELECT COUNT(*) FROM athlete_stats",
+]
+
+
+def warm_up(conn):
+    """Lit les tables chaudes (pages en cache, requêtes préparées).
+    """
+    for sql in WARM_UP_QUERIES:
+        conn.execute(sql).fetchone()
@@ -1,18 +1,42 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.routers import auth, details, users, performances
+from starlette.concurrency import run_in_threadpool
+from app.routers import analytics, auth, details, export, metrics, percentile, stream, users, performances
 from app.database import create_tables
+from app.async_database import db
+from app.utils.metrics import METRICS_ENABLED, MetricsMiddleware
+from app.utils.security import shutdown_hash_executor
 
-app = FastAPI(title="Athlete Performance API")
+
+@asynccontextmanager
+async def lifespan(app):
+    # 🔹 Démarrage : DDL uniquement si le schéma est en retard, puis connexions et caches préchauffés
+    create_tables()
+    await db.warm_up()
+    app.url_path_for("home")  # Parcourt les routers inclus : tables de routage construites avant la 1re requête
+    await run_in_threadpool(int)  # Démarre le threadpool des routes synchrones
+    yield
+    db.close()  # 🔹 Termine les lectures/écritures en cours et ferme les connexions
+    shutdown_hash_executor()
+
+
+app = FastAPI(title="Athlete Performance API", lifespan=lifespan)
 
 # Inclusion des routers
 app.include_router(auth.router, prefix="/auth", tags=["Authentification"])
 app.include_router(users.router, prefix="/admin", tags=["Utilisateurs"])
 app.include_router(performances.router, prefix="/performance", tags=["Performances"])
 app.include_router(details.router, prefix="/admin", tags=["Details"])
+app.include_router(analytics.router, prefix="/performance", tags=["Analytics"])
+app.include_router(export.router, prefix="/performance", tags=["Export"])
+app.include_router(percentile.router, prefix="/performance", tags=["Percentiles"])
+app.include_router(stream.router, prefix="/performance", tags=["Stream"])
 
-#creation de la base de données
+# Métriques Prometheus : rien n'est ajouté quand elles sont désactivées
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics.router, tags=["Metrics"])
 
-create_tables()
 
 @app.get("/")
 def home():
@@ -0,0 +1,318 @@
+import sqlite3
+import sys
+from app.utils import leaderboard, vo2_bounds
+
+# 🔹 Migrations du schéma, suivies par PRAGMA user_version.
+# Chaque entrée : (version, description, liste de requêtes). Les requêtes
+# restent idempotentes (IF NOT EXISTS) pour s'appliquer sur une base existante ;
+# une étape peut aussi être une fonction appelée avec la connexion.
+MIGRATIONS = [
+    (1, "Tables initiales", [
+        # Table des utilisateurs (user)
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            id_user INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL UNIQUE,
+            nom TEXT NOT NULL,
+            prenom TEXT NOT NULL,
+            email TEXT NOT NULL UNIQUE,
+            token TEXT,
+            password TEXT NOT NULL,
+            role TEXT CHECK(role IN ('coach', 'athlete')) NOT NULL
+        )
+        ''',
+        # Table des détails de l'utilisateur (details)
+        '''
+        CREATE TABLE IF NOT EXISTS details (
+            id_details INTEGER PRIMARY KEY AUTOINCREMENT,
+            id_user INTEGER NOT NULL,
+            gender TEXT,
+            age INTEGER,
+            weight REAL,
+            height REAL,
+            FOREIGN KEY (id_user) REFERENCES users(id_user)
+        )
+        ''',
+        # Table des performances (performance)
+        '''
+        CREATE TABLE IF NOT EXISTS performances (
+            id_performance INTEGER PRIMARY KEY AUTOINCREMENT,
+            id_user INTEGER NOT NULL,
+            power_max REAL,
+            hr_max REAL,
+            vo2_max REAL,
+            rf_max REAL,
+            cadence_max REAL,
+            vo2_class TEXT,
+            ressenti INTEGER,
+            date_performance TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (id_user) REFERENCES users(id_user)
+        )
+        ''',
+    ]),
+    (2, "Index des requêtes fréquentes et unicité de details(id_user)", [
+        # Aucune ligne n'est supprimée automatiquement : la migration échoue sur des doublons
+        lambda conn: _check_unique(conn, "details", "id_user"),
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_details_user ON details(id_user)",
+        "CREATE INDEX IF NOT EXISTS idx_users_token ON users(token)",
+        # id_performance (rowid) est inclus implicitement : clé de tri complète
+        "CREATE INDEX IF NOT EXISTS idx_performances_user_date ON performances(id_user, date_performance)",
+        "CREATE INDEX IF NOT EXISTS idx_performances_power ON performances(power_max)",
+        "CREATE INDEX IF NOT EXISTS idx_performances_vo2 ON performances(vo2_max)",
+    ]),
+    (3, "Classements top-N par métrique", [
+        '''
+        CREATE TABLE IF NOT EXISTS leaderboard (
+            metric TEXT NOT NULL,
+            id_performance INTEGER NOT NULL,
+            value REAL NOT NULL,
+            PRIMARY KEY (metric, id_performance)
+        ) WITHOUT ROWID
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_leaderboard_rank ON leaderboard(metric, value DESC, id_performance)",
+        # Remplissage figé au schéma de cette version (leaderboard.populate suit le schéma courant)
+        "DELETE FROM leaderboard",
+        *[f'''
+        INSERT INTO leaderboard (metric, id_performance, value)
+        SELECT '{metric}', p.id_performance, p.{metric} FROM performances p
+        JOIN users u ON u.id_user = p.id_user
+        WHERE p.{metric} IS NOT NULL
+        ORDER BY p.{metric} DESC, p.id_performance
+        LIMIT {int(leaderboard.LEADERBOARD_SIZE)}
+        ''' for metric in ("power_max", "vo2_max", "hr_max", "cadence_max", "rf_max")],
+    ]),
+    (4, "Agrégats puissance/poids par athlète", [
+        '''
+        CREATE TABLE IF NOT EXISTS athlete_stats (
+            id_user INTEGER PRIMARY KEY,
+            session_count INTEGER NOT NULL DEFAULT 0,
+            power_sum REAL NOT NULL DEFAULT 0,
+            power_count INTEGER NOT NULL DEFAULT 0,
+            best_power REAL,
+            best_vo2 REAL,
+            weight REAL,
+            avg_wkg REAL,
+            best_wkg REAL
+        )
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_athlete_stats_avg_wkg ON athlete_stats(avg_wkg DESC, id_user)",
+        # Remplissage figé au schéma de cette version (athlete_stats.populate suit le schéma courant)
+        "DELETE FROM athlete_stats",
+        '''
+        INSERT INTO athlete_stats (id_user, session_count, power_sum, power_count, best_power, best_vo2, weight)
+        SELECT p.id_user, COUNT(*), COALESCE(SUM(p.power_max), 0), COUNT(p.power_max), MAX(p.power_max),
+               MAX(p.vo2_max), d.weight
+        FROM performances p
+        JOIN users u ON u.id_user = p.id_user
+        LEFT JOIN details d ON d.id_user = p.id_user
+        GROUP BY p.id_user
+        ''',
+        '''
+        INSERT INTO athlete_stats (id_user, weight)
+        SELECT id_user, weight FROM details
+        WHERE id_user NOT IN (SELECT id_user FROM athlete_stats)
+        ''',
+        '''
+        UPDATE athlete_stats SET
+            avg_wkg = CASE WHEN power_count > 0 THEN power_sum / power_count / NULLIF(weight, 0) END,
+            best_wkg = best_power / NULLIF(weight, 0)
+        ''',
+    ]),
+    (5, "Versions des ressources (ETag / Last-Modified)", [
+        '''
+        CREATE TABLE IF NOT EXISTS resource_versions (
+            resource TEXT PRIMARY KEY,
+            version INTEGER NOT NULL,
+            updated_at TEXT NOT NULL
+        ) WITHOUT ROWID
+        ''',
+    ]),
+    (6, "Séries temporelles brutes des séances", [
+        # data en dernier : lister les résumés ne parcourt pas les pages de débordement du BLOB
+        '''
+        CREATE TABLE IF NOT EXISTS performance_samples (
+            id_sample INTEGER PRIMARY KEY,
+            id_performance INTEGER NOT NULL,
+            trial TEXT NOT NULL,
+            channel TEXT NOT NULL,
+            sample_count INTEGER NOT NULL,
+            min_value REAL,
+            max_value REAL,
+            mean_value REAL,
+            data BLOB NOT NULL,
+            FOREIGN KEY (id_performance) REFERENCES performances(id_performance)
+        )
+        ''',
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_performance_samples ON performance_samples(id_performance, trial, channel)",
+    ]),
+    (7, "Classe VO2 en bornes typées et indexées", [
+        lambda conn: _add_column(conn, "performances", "vo2_class_low", "REAL"),
+        lambda conn: _add_column(conn, "performances", "vo2_class_high", "REAL"),
+        vo2_bounds.backfill,
+        # Classe exacte : égalités puis date, l'ordre de la pagination keyset est lu dans l'index.
+        # Index partiel : seuls les filtres sur la classe peuvent l'utiliser, les autres requêtes
+        # par athlète gardent idx_performances_user_date
+        '''
+        CREATE INDEX IF NOT EXISTS idx_performances_user_vo2_class
+        ON performances(id_user, vo2_class_low, vo2_class_high, date_performance)
+        WHERE vo2_class_low IS NOT NULL
+        ''',
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def hot_queries():
+    """Requêtes exécutées par les routers et index attendu dans leur plan d'exécution.
+
+    Les requêtes sont celles des modules (constantes, générateurs de requêtes) :
+    importées à l'appel, car ces modules dépendent de la base et donc de ce module.
+
+    Returns:
+        list: (nom, sql, paramètres, index attendu)
+    """
+    from app.routers import details, performances
+    from app.schemas.performance import PerformanceFilters, PerformanceQuery
+    from app.utils import athlete_stats, auth, cohorts, http_cache, performance_query, samples
+
+    vo2_class = PerformanceFilters(vo2_class="74-88")
+    query = PerformanceQuery(date_from="2025-01-01T00:00:00", ranges={"power_max": {"min": 200}})
+    return [
+        ("auth.get_current_user", auth.TOKEN_USER_SQL, ("t",), "idx_users_token"),
+        ("performances.get_performances", *performances.list_query(1), "idx_performances_user_date"),
+        ("performances.get_performances_keyset", *performances.list_query(1, after=("", 0), limit=100),
+         "idx_performances_user_date"),
+        ("performances.get_performances_vo2_class", *performances.list_query(1, filters=vo2_class, limit=100),
+         "idx_performances_user_vo2_class"),
+        ("performances.puissance_detail_user", performances.POWER_DETAIL_SQL, (1,), "idx_performances_user_date"),
+        ("performances.vo2max_detail_user", performances.VO2_DETAIL_SQL, (1,), "idx_performances_user_date"),
+        ("performances.get_performances_summary", performances.SUMMARY_SQL, ("[1, 2]",),
+         "idx_performances_user_date"),
+        ("performances.query_athletes", *performance_query.build(query, [1, 2])[:2], "idx_performances_user_date"),
+        ("leaderboard.top", leaderboard.TOP_SQL, ("power_max", 10), "idx_leaderboard_rank"),
+        ("athlete_stats.top", athlete_stats.TOP_SQL, (10,), "idx_athlete_stats_avg_wkg"),
+        ("athlete_stats.rank", athlete_stats.RANK_SQL, (1.0, 1.0, 1), "idx_athlete_stats_avg_wkg"),
+        ("samples.list_samples", samples.LIST_SQL, (1,), "ux_performance_samples"),
+        ("samples.read_range", samples.RANGE_SQL, (1, "incremental", "power"), "ux_performance_samples"),
+        ("details.get_details", details.DETAILS_SQL, (1,), "ux_details_user"),
+        ("cohorts.member", cohorts.MEMBER_SQL, (1,), "ux_details_user"),
+        ("http_cache.get_version", http_cache.VERSION_SQL, ("performances:1",), "PRIMARY KEY"),
+    ]
+
+
+def _check_unique(conn, table, column):
+    """Vérifie l'absence de doublons avant la création d'un index UNIQUE.
+
+    Raises:
+        RuntimeError: Valeurs présentes plusieurs fois (la migration est annulée)
+    """
+    duplicates = conn.execute(f'''
+        SELECT {column}, COUNT(*) FROM {table} GROUP BY {column} HAVING COUNT(*) > 1 ORDER BY {column} LIMIT 20
+    ''').fetchall()
+    if duplicates:
+        listed = ", ".join(f"{value} ({count} lignes)" for value, count in duplicates)
+        raise RuntimeError(f"Doublons dans {table}.{column} : {listed}. Supprimez les lignes en trop "
+                           f"puis relancez la migration (aucune donnée n'a été modifiée).")
+
+
+def _add_column(conn, table, column, definition):
+    """ALTER TABLE ... ADD COLUMN si la colonne n'existe pas encore.
+    """
+    if column not in {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def get_schema_version(conn):
+    """Version du schéma enregistrée dans la base (PRAGMA user_version).
+    """
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Applique les migrations manquantes, chacune dans sa propre transaction.
+
+    BEGIN IMMEDIATE prend le verrou d'écriture : les lecteurs continuent
+    en mode WAL et les écrivains concurrents attendent via busy_timeout.
+    ANALYZE est relancé si au moins une migration a été appliquée.
+
+    Returns:
+        int: version du schéma après migration
+    """
+    version = get_schema_version(conn)
+    applied = False
+    for target, description, statements in MIGRATIONS:
+        if target <= version:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Un autre worker a pu appliquer la migration avant d'obtenir le verrou
+            version = get_schema_version(conn)
+            if target <= version:
+                conn.rollback()
+                continue
+            for step in statements:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f"PRAGMA user_version = {int(target)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        version = target
+        applied = True
+
+    if applied:
+        conn.execute("ANALYZE")
+        conn.commit()
+    return version
+
+
+def explain(conn, sql, params=()):
+    """Retourne le plan d'exécution (EXPLAIN QUERY PLAN) sous forme de lignes de texte.
+    """
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def check_query_plans(conn=None):
+    """Vérifie que chaque requête des routers utilise l'index attendu.
+
+    Sans connexion, le contrôle se fait sur un schéma vierge en mémoire :
+    le plan ne dépend alors que des index, pas des statistiques d'une petite base.
+
+    Returns:
+        list: (nom, index attendu, plan) des requêtes qui n'utilisent pas leur index
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = sqlite3.connect(":memory:")
+        migrate(conn)
+    try:
+        failures = []
+        for name, sql, params, index in hot_queries():
+            plan = explain(conn, sql, params)
+            if not any(index in line for line in plan):
+                failures.append((name, index, plan))
+        return failures
+    finally:
+        if own_conn:
+            conn.close()
+
+
+if __name__ == "__main__":
+    # python -m app.migrations [--check | --check-db]
+    from app.database import get_db_connection
+
+    conn = get_db_connection()
+    try:
+        print(f"Schéma en version {migrate(conn)}")
+        if "--check" in sys.argv or "--check-db" in sys.argv:
+            failures = check_query_plans(conn if "--check-db" in sys.argv else None)
+            for name, index, plan in failures:
+                print(f"❌ {name} n'utilise pas {index} : {plan}")
+            if failures:
+                sys.exit(1)
+            print(f"✅ {len(hot_queries())} requêtes utilisent leur index")
+    finally:
+        conn.close()
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, Query, Request
+from app.async_database import db
+from app.utils.auth import authorized_athletes, get_current_user
+from app.utils import http_cache
+from app.utils.serialization import dumps
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+
+# Lire les analyses d'un athlète
+@router.get("/{id_user}")
+async def get_analytics(id_user: int, request: Request,
+                        window: int = Query(7, ge=1, le=365),
+                        weeks: int = Query(12, ge=1, le=104),
+                        current_user: int = Depends(get_current_user)):
+    """Récupérer les tendances d'un athlète pour chaque métrique.
+
+        token (str): Token d'authentification
+        window (int): Nombre de séances de la moyenne glissante
+        weeks (int): Nombre de semaines de l'évolution hebdomadaire
+        Returns:
+        moyenne glissante, tendance linéaire (par jour et par semaine), progression
+        des records et moyennes hebdomadaires avec l'écart à la semaine précédente
+
+    Get: http://localhost:8000/performance/analytics/1?window=7&weeks=12
+
+    Raises:
+        HTTPException: Athlète demandant les analyses d'un autre athlète (403)
+    """
+    await db.read(authorized_athletes, current_user, [id_user])
+
+    from app.utils import analytics  # NumPy n'est importé qu'à la première analyse, pas au démarrage
+
+    async def produce():
+        dates, values = await db.read(analytics.load_history, id_user)
+        if len(dates) == 0:
+            result = {"message": "Aucune performance trouvée."}
+        else:
+            result = analytics.compute(dates, values, window, weeks)
+        return dumps(result), {}
+
+    return await http_cache.cached_response(request, http_cache.performances_resource(id_user), produce,
+                                            variant=f"analytics?window={window}&weeks={weeks}")
@@ -1,11 +1,16 @@
-from fastapi import APIRouter, HTTPException
-from app.database import get_db_connection
+from fastapi import APIRouter, HTTPException, Request
+from app.async_database import db
 from app.schemas.details import DetailsCreate, DetailsResponse
+from app.utils import athlete_stats, cohorts, http_cache
+from app.utils.serialization import RowEncoder
 
 router = APIRouter(prefix="/details", tags=["Details"])
 
+_details = RowEncoder(DetailsResponse)
+DETAILS_SQL = f"SELECT {_details.columns} FROM details WHERE id_user = ?"  # Servie par ux_details_user
+
 @router.post("/{id_user}", response_model=DetailsResponse)
-def create_details(id_user: int, details: DetailsCreate):
+async def create_details(id_user: int, details: DetailsCreate):
     """Créer des détails pour un utilisateur.
    
     Input: id_user, details
@@ -19,10 +24,8 @@ def create_details(id_user: int, details: DetailsCreate):
     "height": XXX
     }
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    try:
+    def insert(conn):
+        cursor = conn.cursor()
         # Vérifier si l'utilisateur existe
         cursor.execute("SELECT id_user FROM users WHERE id_user = ?", (id_user,))
         user = cursor.fetchone()
@@ -38,14 +41,20 @@ def create_details(id_user: int, details: DetailsCreate):
             raise HTTPException(status_code=400, detail="User already has details")
 
         # Insérer les détails
+        cohort_member = cohorts.member(cursor, id_user)
         cursor.execute('''
             INSERT INTO details (id_user, gender, age, weight, height)
             VALUES (?, ?, ?, ?, ?)
         ''', (id_user, details.gender, details.age, details.weight, details.height))
-
-        conn.commit()
         details_id = cursor.lastrowid
-        
+        athlete_stats.set_weight(cursor, id_user, details.weight)
+        cohorts.track(cursor, id_user, cohort_member)
+        http_cache.bump(cursor, http_cache.details_resource(id_user))
+        return details_id
+
+    try:
+        details_id = await db.write(insert)  # Annulé par db.write en cas d'erreur
+
         # Créer la réponse avec les données insérées
         return DetailsResponse(
             id_details=details_id, 
@@ -56,40 +65,33 @@ def create_details(id_user: int, details: DetailsCreate):
             height=details.height
         )
     except HTTPException:
-        conn.rollback()
         raise  # Relancer directement l'exception HTTP
 
     except Exception as e:
-        conn.rollback()
         raise HTTPException(status_code=500, detail=str(e))  # Gestion des autres erreurs
 
-    finally:
-        cursor.close()
-        conn.close()  # Assurez-vous que la connexion est toujours fermée proprement
-
 @router.get("/{id_user}", response_model=DetailsResponse)
-def get_details(id_user: int):
+async def get_details(id_user: int, request: Request):
     """Récupérer les détails d'un utilisateur.
 
     Input: id_user
 
     Get, localhost:8000/admin/users/{id_user}
     
-    Output: details"""
+    Output: details (ETag / Last-Modified, 304 si inchangés)"""
+
+    async def produce():
+        details = await db.fetchone(DETAILS_SQL, (id_user,))
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM details WHERE id_user = ?", (id_user,))
-    details = cursor.fetchone()
-    conn.close()
+        if not details:
+            raise HTTPException(status_code=404, detail="Details not found")
 
-    if not details:
-        raise HTTPException(status_code=404, detail="Details not found")
+        return _details.one(details), {}
 
-    return DetailsResponse(**dict(details))
+    return await http_cache.cached_response(request, http_cache.details_resource(id_user), produce)
 
 @router.put("/{id_user}")
-def update_details(id_user: int, details: DetailsCreate):
+async def update_details(id_user: int, details: DetailsCreate):
     """Mettre à jour les détails d'un utilisateur.
 
     Input: id_user, details
@@ -106,28 +108,30 @@ def update_details(id_user: int, details: DetailsCreate):
     
     Output: {"message": "Details updated successfully"}"""
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    # Vérifier si les détails existent
-    cursor.execute("SELECT id_details FROM details WHERE id_user = ?", (id_user,))
-    if not cursor.fetchone():
-        conn.close()
-        raise HTTPException(status_code=404, detail="Details not found")
-
-    # Mettre à jour les détails
-    cursor.execute(''' 
-        UPDATE details 
-        SET gender = ?, age = ?, weight = ?, height = ? 
-        WHERE id_user = ? 
-    ''', (details.gender, details.age, details.weight, details.height, id_user))
+    def update(conn):
+        cursor = conn.cursor()
 
-    conn.commit()
-    conn.close()
+        # Vérifier si les détails existent
+        cursor.execute("SELECT id_details FROM details WHERE id_user = ?", (id_user,))
+        if not cursor.fetchone():
+            raise HTTPException(status_code=404, detail="Details not found")
+
+        # Mettre à jour les détails
+        cohort_member = cohorts.member(cursor, id_user)
+        cursor.execute(''' 
+            UPDATE details 
+            SET gender = ?, age = ?, weight = ?, height = ? 
+            WHERE id_user = ? 
+        ''', (details.gender, details.age, details.weight, details.height, id_user))
+        athlete_stats.set_weight(cursor, id_user, details.weight)
+        cohorts.track(cursor, id_user, cohort_member)
+        http_cache.bump(cursor, http_cache.details_resource(id_user))
+
+    await db.write(update)
     return {"message": "Details updated successfully"}
 
 @router.delete("/{id_user}")
-def delete_details(id_user: int):
+async def delete_details(id_user: int):
     """Supprimer les détails d'un utilisateur.
 
     Input: id_user
@@ -136,18 +140,21 @@ def delete_details(id_user: int):
     
     Output: {"message": "Details deleted successfully"}"""
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    def delete(conn):
+        cursor = conn.cursor()
+
+        # Vérifier si les détails existent
+        cursor.execute("SELECT id_details FROM details WHERE id_user = ?", (id_user,))
+        if not cursor.fetchone():
+            raise HTTPException(status_code=404, detail="Details not found")
 
-    # Vérifier si les détails existent
-    cursor.execute("SELECT id_details FROM details WHERE id_user = ?", (id_user,))
-    if not cursor.fetchone():
-        conn.close()
-        raise HTTPException(status_code=404, detail="Details not found")
+        # Supprimer les détails
+        cohort_member = cohorts.member(cursor, id_user)
+        cursor.execute("DELETE FROM details WHERE id_user = ?", (id_user,))
+        athlete_stats.set_weight(cursor, id_user, None)
+        cohorts.track(cursor, id_user, cohort_member)
+        http_cache.bump(cursor, http_cache.details_resource(id_user))
 
-    # Supprimer les détails
-    cursor.execute("DELETE FROM details WHERE id_user = ?", (id_user,))
-    conn.commit()
-    conn.close()
+    await db.write(delete)
 
     return {"message": "Details deleted successfully"}
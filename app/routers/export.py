@@ -0,0 +1,51 @@
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from app.database import pool
+from app.utils.auth import authorized_athletes, get_current_user
+
+router = APIRouter(prefix="/export", tags=["Export"])
+
+
+# Exporter les performances
+@router.get("/")
+def export_performances(format: str = Query("csv", pattern="^(csv|parquet|npz|columnar)$"),
+                        date_from: Optional[datetime] = None,
+                        date_to: Optional[datetime] = None,
+                        id_user: Optional[List[int]] = Query(None),
+                        current_user: int = Depends(get_current_user)):
+    """Exporter les performances jointes aux utilisateurs et à leurs détails, en flux.
+
+    Un athlète n'exporte que ses performances ; un coach exporte les athlètes
+    demandés (id_user) ou, sans liste, tous les athlètes.
+
+        token (str): Token d'authentification
+        format (str): "csv", "parquet", "npz" ou "columnar" (parquet si pyarrow est installé, sinon npz)
+        date_from, date_to (datetime, optional): Bornes incluses sur date_performance
+        id_user (int, optional, répétable): Limiter l'export à ces utilisateurs
+
+    Le générateur est synchrone : FastAPI l'exécute dans son threadpool, le
+    formatage (CSV, Parquet) ne bloque pas la boucle d'événements. CSV et
+    Parquet sont envoyés bloc par bloc ; npz n'est pas un flux : toutes les
+    lignes sont d'abord écrites dans des fichiers temporaires, le premier
+    octet part une fois la lecture terminée.
+
+    Raises:
+        HTTPException: Parquet demandé sans pyarrow, athlète exportant les performances d'autrui (403)
+
+    Get: http://localhost:8000/performance/export/?format=csv&date_from=2025-01-01&id_user=1&id_user=2
+    """
+    from app.utils import export  # NumPy n'est importé qu'au premier export, pas au démarrage
+
+    try:
+        format = export.resolve_format(format)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    with pool.connection() as conn:
+        id_users = authorized_athletes(conn, current_user, id_user)
+
+    chunks = export.iter_chunks(pool.connection, date_from, date_to, id_users)
+    return StreamingResponse(export.iter_export(format, chunks), media_type=export.MEDIA_TYPES[format],
+                             headers={"Content-Disposition": f'attachment; filename="performances.{format}"'})
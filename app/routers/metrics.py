@@ -0,0 +1,35 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.async_database import db
+from app.utils import metrics
+from app.utils.events import broker
+from app.utils.http_cache import response_cache
+
+router = APIRouter()
+
+# 🔹 Jauges relevées à chaque collecte
+db_pool_connections = metrics.Gauge("db_pool_connections", "Connexions du pool de lecture par état", ("state",))
+db_pending_writes = metrics.Gauge("db_pending_writes", "Écritures en cours ou en file sur le thread écrivain")
+db_pending_grouped_writes = metrics.Gauge("db_pending_grouped_writes", "Écritures en attente d'un commit groupé")
+http_cache_entries = metrics.Gauge("http_cache_entries", "Réponses gardées dans le cache HTTP")
+http_cache_bytes = metrics.Gauge("http_cache_bytes", "Taille des réponses gardées dans le cache HTTP")
+sse_subscribers = metrics.Gauge("sse_subscribers", "Abonnés au flux /performance/stream")
+sse_dropped_subscribers = metrics.Gauge("sse_dropped_subscribers", "Abonnés déconnectés car trop lents (cumul)")
+
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Métriques du processus au format texte Prometheus (METRICS_ENABLED=true).
+
+    Get: http://localhost:8000/metrics
+    """
+    stats = db.stats()
+    for state in ("open", "idle", "checked_out", "waiting"):
+        db_pool_connections.set((state,), stats["pool"][state])
+    db_pending_writes.set(value=stats["pending_writes"])
+    db_pending_grouped_writes.set(value=stats["pending_grouped_writes"])
+    http_cache_entries.set(value=len(response_cache))
+    http_cache_bytes.set(value=response_cache.size)
+    sse_subscribers.set(value=len(broker))
+    sse_dropped_subscribers.set(value=broker.dropped)
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends
+from app.async_database import db
+from app.utils.auth import authorized_athletes, get_current_user
+from app.utils import cohorts
+
+router = APIRouter(prefix="/percentile", tags=["Percentiles"])
+
+
+# Lire les percentiles d'un athlète dans sa cohorte
+@router.get("/{id_user}")
+async def get_percentile(id_user: int, current_user: int = Depends(get_current_user)):
+    """Récupérer le percentile d'un athlète pour power_max et vo2_max parmi les
+    athlètes de même genre et de même tranche d'âge (meilleure valeur de chacun).
+
+        token (str): Token d'authentification
+        Returns:
+        genre, tranche d'âge et, pour chaque métrique : valeur, rang, percentile et taille de la cohorte
+        Raises:
+        HTTPException 403: athlète autre que l'utilisateur connecté (hors coach)
+
+    Get: http://localhost:8000/performance/percentile/1
+    """
+    await db.read(authorized_athletes, current_user, [id_user])
+    result = await db.read(cohorts.percentile, id_user)
+    if result is None:
+        return {"message": "Aucune cohorte trouvée (genre et âge requis)."}
+    return {"id_user": id_user, **result}
@@ -1,56 +1,178 @@
+import base64
+import json
+import os
 import sqlite3
-from fastapi import APIRouter, HTTPException, status, Depends, Header
-from typing import List
-from app.schemas.performance import PerformanceCreate, PerformanceResponse
-from app.database import get_db_connection
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from typing import List, Optional
+from app.schemas.performance import (PerformanceCreate, PerformanceResponse, PerformanceBulkResponse,
+                                     PerformanceFilters, PerformanceQuery, PerformanceSummaryRequest)
+from app.async_database import db
+from app.utils.auth import authorized_athletes, get_current_user, get_token_from_header
+from app.utils import athlete_stats, cohorts, events, http_cache, leaderboard, performance_query, vo2_bounds
+from app.utils.serialization import RowEncoder, dumps, dumps_array, json_response
 from datetime import datetime
 
 router = APIRouter(prefix="/performances", tags=["Performances"])
 
-# Fonction pour vérifier l'authentification via token
-def get_current_user(token: str):
-    """Vérifie l'authentification de l'utilisateur via le token fourni.
-    Args:
-        token (str): Token d'authentification
+MAX_PAGE_SIZE = 1000
+# Page JSON sans limit : l'historique complet se lit en NDJSON (format=ndjson) ou page par page
+DEFAULT_PAGE_SIZE = min(int(os.getenv("PERFORMANCE_DEFAULT_PAGE_SIZE", str(MAX_PAGE_SIZE))), MAX_PAGE_SIZE)
+BULK_MAX_ITEMS = int(os.getenv("PERFORMANCE_BULK_MAX_ITEMS", "5000"))  # Taille max d'un envoi groupé
+BULK_INSERT_CHUNK = 100  # Lignes par INSERT multi-valeurs (11 paramètres par ligne)
+STREAM_CHUNK_SIZE = 500  # Lignes lues par requête keyset en mode flux
+SUMMARY_MAX_ATHLETES = int(os.getenv("PERFORMANCE_SUMMARY_MAX_ATHLETES", "500"))  # Athlètes par résumé groupé
+
+# Champs du résumé groupé, dans l'ordre des colonnes de SUMMARY_SQL
+SUMMARY_FIELDS = ("id_user", "nom", "prenom", "power_max", "vo2_max", "derniere_seance", "nombre_seances",
+                  "rapport_moyen", "meilleur_rapport")
+# Agrégats maintenus (athlete_stats) et dernière séance lue par l'index (id_user, date_performance) :
+# une seule requête, quel que soit le nombre d'athlètes (liste passée en un paramètre JSON)
+SUMMARY_SQL = '''
+    SELECT u.id_user, u.nom, u.prenom, s.best_power, s.best_vo2,
+           (SELECT MAX(date_performance) FROM performances p WHERE p.id_user = u.id_user),
+           COALESCE(s.session_count, 0), s.avg_wkg, s.best_wkg
+    FROM users u LEFT JOIN athlete_stats s ON s.id_user = u.id_user
+    WHERE u.id_user IN (SELECT value FROM json_each(?))
+'''
+
+# Colonnes filtrables par intervalle (paramètres <colonne>_from / <colonne>_to de PerformanceFilters)
+RANGE_FILTERS = ("power_max", "hr_max", "vo2_max", "rf_max", "cadence_max", "ressenti")
+
+_performance = RowEncoder(PerformanceResponse)  # Lignes SQL -> JSON de PerformanceResponse
+
+# Meilleure performance d'un athlète pour une métrique (index (id_user, date_performance))
+POWER_DETAIL_SQL = '''
+    SELECT u.nom, u.prenom, date_performance,
+           max(power_max) AS power_max, hr_max,
+           vo2_max, rf_max, cadence_max,
+           vo2_class, ressenti
+    FROM performances p  join users u on p.id_user = u.id_user
+    WHERE p.id_user = ?
+'''
+VO2_DETAIL_SQL = '''
+    SELECT u.nom, u.prenom, date_performance,
+           power_max, hr_max,
+           max(vo2_max) AS VO2_max, rf_max, cadence_max,
+           vo2_class, ressenti
+    FROM performances p  join users u on p.id_user = u.id_user
+    WHERE p.id_user = ?
+'''
+
+
+def encode_cursor(date_performance, id_performance):
+    """Encode la position (date_performance, id_performance) en curseur opaque.
+    """
+    raw = json.dumps([date_performance, id_performance]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
 
-    Raises:
-        HTTPException: Token invalide ou expiréiption_
 
-    Returns:
-        _type_: user["id_user"]
+def decode_cursor(cursor):
+    """Décode un curseur de pagination.
+
+    Raises:
+        HTTPException: Curseur invalide
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id_user FROM users WHERE token = ?", (token,))
-    user = cursor.fetchone()
-    conn.close()
+    try:
+        date_performance, id_performance = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(date_performance), int(id_performance)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Curseur invalide")
 
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalide ou expiré")
 
-    return user["id_user"]
+async def read_filters(request: Request):
+    """Filtres de la liste lus dans la query string (dépendance async : pas de passage par le threadpool).
 
-# Fonction pour extraire le token de l'Authorization header
-def get_token_from_header(authorization: str = Header(None)):
+    Raises:
+        HTTPException: Valeur de filtre invalide (422)
     """
-        Args: authorization (str, optional): champ Autorization dans header
+    try:
+        return PerformanceFilters.model_validate(request.query_params)
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail=e.errors(include_url=False, include_context=False))
 
-    Raises:
-        HTTPException: Token manquant dans les headers ou invalide
+
+def _performance_filters(id_user, date_from, date_to, after, filters=None):
+    """Clause WHERE servie par l'index (id_user, date_performance), ou par
+    (id_user, vo2_class_low, vo2_class_high, date_performance) pour une classe VO2 exacte.
+
+    Les autres filtres s'appliquent aux lignes de l'athlète lues par l'un de ces index.
+    """
+    clauses = ["id_user = ?"]
+    params = [id_user]
+    if filters is not None:
+        if filters.vo2_class is not None:
+            low, high = vo2_bounds.parse(filters.vo2_class)
+            if low is None:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                    detail="Classe VO2 attendue sous la forme 74-88 ou [74, 88]")
+            clauses.append("vo2_class_low = ? AND vo2_class_high = ?")
+            params.extend((low, high))
+        if filters.vo2_class_min is not None:
+            clauses.append("vo2_class_low >= ?")
+            params.append(filters.vo2_class_min)
+        if filters.vo2_class_max is not None:
+            clauses.append("vo2_class_high <= ?")
+            params.append(filters.vo2_class_max)
+        for column in RANGE_FILTERS:
+            low, high = getattr(filters, f"{column}_from"), getattr(filters, f"{column}_to")
+            if low is not None:
+                clauses.append(f"{column} >= ?")
+                params.append(low)
+            if high is not None:
+                clauses.append(f"{column} <= ?")
+                params.append(high)
+    if date_from is not None:
+        clauses.append("date_performance >= ?")
+        params.append(date_from.strftime('%Y-%m-%d %H:%M:%S'))
+    if date_to is not None:
+        clauses.append("date_performance <= ?")
+        params.append(date_to.strftime('%Y-%m-%d %H:%M:%S'))
+    if after is not None:
+        clauses.append("(date_performance, id_performance) > (?, ?)")
+        params.extend(after)
+    return " AND ".join(clauses), params
+
+
+def list_query(id_user, date_from=None, date_to=None, after=None, filters=None, limit=None):
+    """Requête de la liste des performances d'un athlète, triée par (date_performance, id_performance).
 
     Returns:
-         token
+        tuple: (sql, paramètres), avec LIMIT si limit est fourni
     """
-    if not authorization:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token manquant dans les headers")
-    token = authorization.split("Bearer ")[-1]  # Supposer que le format est 'Bearer <token>'
-    if not token:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalide")
-    return token
+    where, params = _performance_filters(id_user, date_from, date_to, after, filters)
+    sql = f"SELECT {_performance.columns} FROM performances WHERE {where} ORDER BY date_performance, id_performance"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return sql, params
+
+
+async def _stream_performances(id_user, date_from, date_to, after, limit, filters=None):
+    """Génère les performances en NDJSON, par blocs keyset de STREAM_CHUNK_SIZE lignes.
+
+    Chaque bloc est une requête courte : la mémoire reste constante et
+    aucune transaction de lecture n'est gardée ouverte entre deux blocs.
+    """
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = STREAM_CHUNK_SIZE if remaining is None else min(STREAM_CHUNK_SIZE, remaining)
+        rows = await db.fetchall(*list_query(id_user, date_from, date_to, after, filters, size))
+        if not rows:
+            break
+        yield _performance.lines(rows)
+        after = (rows[-1]["date_performance"], rows[-1]["id_performance"])
+        if remaining is not None:
+            remaining -= len(rows)
+        if len(rows) < size:
+            break
+
 
 # Créer une performance
 @router.post("/", response_model=PerformanceResponse)
-def create_performance(performance: PerformanceCreate, token: str = Depends(get_token_from_header)):
+async def create_performance(performance: PerformanceCreate, id_user: int = Depends(get_current_user)):
     """Créer une performance pour l'utilisateur authentifié.
     Args:
         token (str): Token d'authentification
@@ -68,49 +190,283 @@ def create_performance(performance: PerformanceCreate, token: str = Depends(get_
     "ressenti": XXX
     }
     """
-    id_user = get_current_user(token)
     date_performance = datetime.now().strftime('%Y-%m-%d %H:%M:%S')  # Enregistre la date et l'heure actuelles
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(''' 
-        INSERT INTO performances (id_user, power_max, hr_max, vo2_max, rf_max, cadence_max, vo2_class, ressenti, date_performance)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (id_user, performance.power_max, performance.hr_max, performance.vo2_max,
-          performance.rf_max, performance.cadence_max, performance.vo2_class, 
-          performance.ressenti, date_performance))
-    conn.commit()
+    def insert(conn):
+        cursor = conn.cursor()
+        cohort_member = cohorts.member(cursor, id_user)
+        cursor.execute(''' 
+            INSERT INTO performances (id_user, power_max, hr_max, vo2_max, rf_max, cadence_max, vo2_class, ressenti, date_performance,
+                                      vo2_class_low, vo2_class_high)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (id_user, performance.power_max, performance.hr_max, performance.vo2_max,
+              performance.rf_max, performance.cadence_max, performance.vo2_class, 
+              performance.ressenti, date_performance, *vo2_bounds.parse(performance.vo2_class)))
+        id_performance = cursor.lastrowid
+        leaderboard.record(cursor, [id_performance])
+        athlete_stats.record_inserted(cursor, id_user, [performance.power_max], [performance.vo2_max])
+        cohorts.track(cursor, id_user, cohort_member)
+        http_cache.bump(cursor, http_cache.performances_resource(id_user))
+
+        cursor.execute(f"SELECT {_performance.columns} FROM performances WHERE id_performance = ?", (id_performance,))
+        row = cursor.fetchone()
+        events.publish_after_commit("created", id_user, {"performance": _performance.values(row)})
+        return row
+
+    new_performance = await db.write_grouped(insert)  # Commit groupé si DB_GROUP_COMMIT=true
+
+    return json_response(_performance.one(new_performance))
+
+async def read_bulk_items(request: Request):
+    """Lit le corps d'un envoi groupé : liste JSON ou NDJSON (une performance par ligne).
+
+    Raises:
+        HTTPException: Corps illisible ou envoi trop volumineux
+    """
+    body = await request.body()
+    try:
+        if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+            items = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            items = json.loads(body)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Corps JSON invalide : {e}")
+
+    if not isinstance(items, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Une liste de performances est attendue")
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413,
+                            detail=f"Envoi limité à {BULK_MAX_ITEMS} performances")
+    return items
+
+
+def insert_performances(cursor, id_user, performances, date_performance):
+    """Insère des performances par INSERT multi-valeurs ... RETURNING.
+
+    Returns:
+        list: id_performance attribués, dans l'ordre des performances fournies
+    """
+    ids = []
+    for start in range(0, len(performances), BULK_INSERT_CHUNK):
+        chunk = performances[start:start + BULK_INSERT_CHUNK]
+        placeholders = ", ".join(["(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"] * len(chunk))
+        params = []
+        for performance in chunk:
+            params.extend((id_user, performance.power_max, performance.hr_max, performance.vo2_max,
+                           performance.rf_max, performance.cadence_max, performance.vo2_class,
+                           performance.ressenti, date_performance, *vo2_bounds.parse(performance.vo2_class)))
+        cursor.execute(f'''
+            INSERT INTO performances (id_user, power_max, hr_max, vo2_max, rf_max, cadence_max, vo2_class, ressenti, date_performance,
+                                      vo2_class_low, vo2_class_high)
+            VALUES {placeholders}
+            RETURNING id_performance
+        ''', params)
+        # SQLite ne garantit pas l'ordre des lignes de RETURNING. Sans AUTOINCREMENT,
+        # chaque ligne reçoit max(id_performance) + 1 au moment de son insertion :
+        # les id d'une même instruction croissent dans l'ordre des VALUES, le tri
+        # les y remet (hypothèse fausse seulement si le rowid atteint 2^63 - 1)
+        ids.extend(sorted(row[0] for row in cursor.fetchall()))
+    return ids
+
+# Créer des performances en lot
+@router.post("/bulk", response_model=PerformanceBulkResponse)
+async def create_performances_bulk(items: list = Depends(read_bulk_items), id_user: int = Depends(get_current_user)):
+    """Créer un lot de performances en une seule transaction.
+
+    Les éléments invalides sont signalés individuellement, les autres sont insérés.
+
+    Post: http://localhost:8000/performance/performances/bulk,
+    Body: [{"power_max": XXX, ...}, ...] ou NDJSON (Content-Type: application/x-ndjson)
+
+    Returns:
+        PerformanceBulkResponse: id attribué ou erreurs pour chaque élément
+    """
+    date_performance = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    results = []
+    valid, valid_indexes = [], []
+    for index, item in enumerate(items):
+        try:
+            valid.append(PerformanceCreate.model_validate(item))
+            valid_indexes.append(index)
+        except ValidationError as e:
+            results.append({"index": index, "errors": e.errors(include_url=False, include_context=False)})
+
+    # Rien à insérer : ni écriture, ni nouvelle version du cache HTTP, ni événement
+    if not valid:
+        return json_response(dumps({"inserted": 0, "failed": len(items), "results": results}))
+
+    def insert(conn):
+        cursor = conn.cursor()
+        cohort_member = cohorts.member(cursor, id_user)
+        ids = insert_performances(cursor, id_user, valid, date_performance)
+        leaderboard.record(cursor, ids)
+        athlete_stats.record_inserted(cursor, id_user, [performance.power_max for performance in valid],
+                                      [performance.vo2_max for performance in valid])
+        cohorts.track(cursor, id_user, cohort_member)
+        http_cache.bump(cursor, http_cache.performances_resource(id_user))
+        events.publish_after_commit("bulk_created", id_user, {"ids": ids})
+        return ids
+
+    try:
+        ids = await db.write(insert)
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+    results.extend({"index": index, "id_performance": id_performance}
+                   for index, id_performance in zip(valid_indexes, ids))
+    results.sort(key=lambda result: result["index"])
+
+    return json_response(dumps({"inserted": len(ids), "failed": len(items) - len(ids), "results": results}))
+
+# Résumé de plusieurs athlètes
+@router.post("/summary")
+async def get_performances_summary(summary: PerformanceSummaryRequest,
+                                   current_user: int = Depends(get_current_user)):
+    """Résumé de plusieurs athlètes en une requête (tableau de bord d'un coach).
+
+    Un athlète ne peut demander que son propre résumé.
+
+    Pour chaque athlète : meilleures puissance max et VO2max, date de la dernière
+    séance, nombre de séances, rapports puissance/poids moyen et meilleur.
+
+    Post: http://localhost:8000/performance/performances/summary,
+    Body: {"id_users": [1, 2, 3], "compact": false}
+
+    Returns:
+        {"athletes": [{...}], "introuvables": [...]} dans l'ordre demandé, ou avec
+        compact=true {"colonnes": [...], "lignes": [[...]], "introuvables": [...]}
 
-    id_performance = cursor.lastrowid
-    cursor.execute("SELECT * FROM performances WHERE id_performance = ?", (id_performance,))
-    new_performance = cursor.fetchone()
-    conn.close()
+    Raises:
+        HTTPException: Trop d'athlètes demandés (413), athlète demandant le résumé d'autrui (403)
+    """
+    id_users = list(dict.fromkeys(summary.id_users))  # Sans doublons, ordre conservé
+    if len(id_users) > SUMMARY_MAX_ATHLETES:
+        raise HTTPException(status_code=413, detail=f"Résumé limité à {SUMMARY_MAX_ATHLETES} athlètes")
+    if id_users:
+        id_users = await db.read(authorized_athletes, current_user, id_users)
+
+    rows = await db.fetchall(SUMMARY_SQL, (json.dumps(id_users),)) if id_users else []
+    by_user = {row[0]: tuple(row) for row in rows}
+    found = [by_user[id_user] for id_user in id_users if id_user in by_user]
+    missing = [id_user for id_user in id_users if id_user not in by_user]
+
+    if summary.compact:
+        return json_response(dumps({"colonnes": SUMMARY_FIELDS, "lignes": found, "introuvables": missing}))
+    return json_response(dumps({"athletes": [dict(zip(SUMMARY_FIELDS, row)) for row in found],
+                                "introuvables": missing}))
+
+# Requête d'analyse sur les performances
+@router.post("/query")
+async def query_performances(query: PerformanceQuery, id_user: int = Depends(get_current_user)):
+    """Performances filtrées, triées et projetées, pour les analyses (plan d'exécution vérifié).
+
+    Un athlète n'interroge que ses performances ; un coach peut lister des
+    athlètes (id_users) ou, sans liste, interroger tous les athlètes.
+
+    Post: http://localhost:8000/performance/performances/query,
+    Body:
+    {
+    "id_users": [1, 2],
+    "date_from": "2025-01-01T00:00:00",
+    "ranges": {"power_max": {"min": 250, "max": 400}, "vo2_class_low": {"min": 70}},
+    "sort": "-power_max",
+    "fields": ["id_performance", "id_user", "date_performance", "power_max"],
+    "limit": 100,
+    "debug": true
+    }
+
+    Returns:
+        {"performances": [{...}], "curseur_suivant": ...}, ou avec compact=true
+        {"colonnes": [...], "lignes": [[...]], "curseur_suivant": ...} ;
+        avec debug=true, "cout" : plan, index utilisé et lignes examinées estimées
 
-    return dict(new_performance)
+    Raises:
+        HTTPException: Requête invalide ou non bornée (400), athlètes d'autrui (403), trop d'athlètes (413)
+    """
+    if query.id_users is not None and len(query.id_users) > performance_query.QUERY_MAX_ATHLETES:
+        raise HTTPException(status_code=413,
+                            detail=f"Requête limitée à {performance_query.QUERY_MAX_ATHLETES} athlètes")
+
+    def read(conn):
+        return performance_query.run(conn, query, authorized_athletes(conn, id_user, query.id_users))
+
+    try:
+        result = await db.read(read)
+    except performance_query.QueryRejected as e:
+        detail = {"message": str(e), "cout": e.cost} if query.debug else str(e)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    body = {"curseur_suivant": result["curseur_suivant"]}
+    if query.compact:
+        body.update(colonnes=result["colonnes"], lignes=result["lignes"])
+    else:
+        body["performances"] = [dict(zip(result["colonnes"], line)) for line in result["lignes"]]
+    if query.debug:
+        body["cout"] = result["cout"]
+    return json_response(dumps(body))
 
 # Lire toutes les performances d'un utilisateur
 @router.get("/", response_model=List[PerformanceResponse])
-def get_performances(token: str = Depends(get_token_from_header)):
-    """Récupérer toutes les performances
+async def get_performances(request: Request,
+                     limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+                     cursor: Optional[str] = None,
+                     date_from: Optional[datetime] = None,
+                     date_to: Optional[datetime] = None,
+                     format: str = Query("json", pattern="^(json|ndjson)$"),
+                     filters: PerformanceFilters = Depends(read_filters),
+                     id_user: int = Depends(get_current_user)):
+    """Récupérer toutes les performances, triées par (date_performance, id_performance).
     Args:
         token (str): Token d'authentification
-        
-    Get: http://localhost:8000/performance/performances/, 
+        limit (int, optional): Taille de page (DEFAULT_PAGE_SIZE en JSON, tout l'historique en NDJSON) ;
+            l'en-tête X-Next-Cursor donne la page suivante
+        cursor (str, optional): Curseur opaque renvoyé par la page précédente
+        date_from, date_to (datetime, optional): Bornes incluses sur date_performance
+        format (str): "json" (liste) ou "ndjson" (flux, une performance par ligne)
+        filters (PerformanceFilters): Classe VO2 exacte (vo2_class=74-88) ou bornée
+            (vo2_class_min, vo2_class_max) et intervalles <colonne>_from / <colonne>_to
+            sur power_max, hr_max, vo2_max, rf_max, cadence_max et ressenti
+
+    La réponse JSON porte ETag et Last-Modified : If-None-Match ou
+    If-Modified-Since renvoient 304 sans relire les performances.
+
+    Raises:
+        HTTPException: Curseur ou classe VO2 invalide
+
+    Get: http://localhost:8000/performance/performances/?limit=100&cursor=XXX
+    Get: http://localhost:8000/performance/performances/?vo2_class=74-88&power_max_from=300
     """
-    id_user = get_current_user(token)
+    after = decode_cursor(cursor) if cursor else None
+    if format == "json" and limit is None:
+        limit = DEFAULT_PAGE_SIZE  # Jamais tout l'historique en mémoire : format=ndjson pour un export complet
+    # Filtres invalides : 400 avant le flux ; une ligne de plus pour savoir s'il reste une page
+    sql, params = list_query(id_user, date_from, date_to, after, filters, limit + 1 if limit is not None else None)
+
+    if format == "ndjson":
+        return StreamingResponse(_stream_performances(id_user, date_from, date_to, after, limit, filters),
+                                 media_type="application/x-ndjson")
+
+    async def produce():
+        performances = await db.fetchall(sql, params)
+        headers = {}
+
+        if len(performances) > limit:
+            performances = performances[:limit]
+            last = performances[-1]
+            headers["X-Next-Cursor"] = encode_cursor(last["date_performance"], last["id_performance"])
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM performances WHERE id_user = ?", (id_user,))
-    performances = cursor.fetchall()
-    conn.close()
+        return _performance.many(performances), headers
 
-    return [dict(performance) for performance in performances]
+    return await http_cache.cached_response(request, http_cache.performances_resource(id_user), produce,
+                                            variant=request.url.query)
 
 # Lire une seule performance par ID
 @router.get("/{id_performance}", response_model=PerformanceResponse)
-def get_performance(id_performance: int, token: str = Depends(get_token_from_header)):
-    """Récupérer une performance par son ID.
+async def get_performance(id_performance: int, request: Request, id_user: int = Depends(get_current_user)):
+    """Récupérer une performance par son ID (ETag / Last-Modified, 304 si inchangée).
 
     Args:
         id_performance (int): performance ID
@@ -122,22 +478,86 @@ def get_performance(id_performance: int, token: str = Depends(get_token_from_hea
     Returns:
         _type_: PerformanceResponse
     """
-    id_user = get_current_user(token)
+    async def produce():
+        performance = await db.fetchone(f"SELECT {_performance.columns} FROM performances "
+                                        "WHERE id_performance = ? AND id_user = ?", (id_performance, id_user))
+
+        if not performance:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Performance introuvable")
+
+        return _performance.one(performance), {}
+
+    return await http_cache.cached_response(request, http_cache.performances_resource(id_user), produce,
+                                            variant=f"id={id_performance}")
+
+def _owns_performance(conn, id_performance, id_user):
+    return conn.execute("SELECT 1 FROM performances WHERE id_performance = ? AND id_user = ?",
+                        (id_performance, id_user)).fetchone() is not None
+
+# Lire les séries brutes d'une performance
+@router.get("/{id_performance}/samples")
+async def get_performance_samples(id_performance: int, id_user: int = Depends(get_current_user)):
+    """Essais et canaux enregistrés pour une performance, avec leurs résumés.
+
+    Args:
+        id_performance (int): ID de la performance
+        token (str): Token d'authentification
+
+    Raises:
+        HTTPException: Performance introuvable
+
+    Returns:
+        [{"trial", "channel", "sample_count", "min_value", "max_value", "mean_value"}]
+    """
+    from app.utils import samples  # NumPy n'est importé qu'à la première lecture, pas au démarrage
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM performances WHERE id_performance = ? AND id_user = ?", (id_performance, id_user))
-    performance = cursor.fetchone()
-    conn.close()
+    def read(conn):
+        if not _owns_performance(conn, id_performance, id_user):
+            return None
+        return samples.list_samples(conn, id_performance)
 
-    if not performance:
+    rows = await db.read(read)
+    if rows is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Performance introuvable")
+    return json_response(dumps([dict(row) for row in rows]))
+
+# Lire une plage d'un canal
+@router.get("/{id_performance}/samples/{trial}/{channel}")
+async def get_performance_sample_range(id_performance: int, trial: str, channel: str,
+                                       start: int = Query(0, ge=0), stop: Optional[int] = Query(None, ge=0),
+                                       format: str = Query("json", pattern="^(json|raw)$"),
+                                       id_user: int = Depends(get_current_user)):
+    """Valeurs [start, stop[ d'un canal (power, hr, vo2, rf, cadence, time) d'un essai.
+
+    Args:
+        start, stop (int, optional): Indices des échantillons, toute la série par défaut
+        format (str): "json" (liste) ou "raw" (float32 little-endian, application/octet-stream)
+        token (str): Token d'authentification
 
-    return dict(performance)
+    Raises:
+        HTTPException: Performance ou canal introuvable
+
+    Get: http://localhost:8000/performance/performances/1/samples/incremental/power?start=0&stop=600
+    """
+    from app.utils import samples
+
+    def read(conn):
+        if not _owns_performance(conn, id_performance, id_user):
+            return None
+        return samples.read_range(conn, id_performance, trial, channel, start, stop)
+
+    values = await db.read(read)
+    if values is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Série introuvable")
+    if format == "raw":
+        # Octets lus dans le BLOB renvoyés tels quels (vue octet par octet, sans copie)
+        return Response(content=values.data.cast("B"), media_type="application/octet-stream",
+                        headers={"X-Sample-Dtype": samples.DTYPE.str, "X-Sample-Count": str(len(values))})
+    return json_response(dumps_array(values))
 
 # Mettre à jour une performance
 @router.put("/{id_performance}", response_model=PerformanceResponse)
-def update_performance(id_performance: int, performance: PerformanceCreate, token: str = Depends(get_token_from_header)):
+async def update_performance(id_performance: int, performance: PerformanceCreate, id_user: int = Depends(get_current_user)):
     """Mettre à jour une performance.
     Args:
         id_performance (int): _description_
@@ -150,35 +570,40 @@ def update_performance(id_performance: int, performance: PerformanceCreate, toke
     Returns:
         PerformanceResponse: Performance mise à jour
     """
-    id_user = get_current_user(token)
-
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM performances WHERE id_performance = ? AND id_user = ?", (id_performance, id_user))
-    existing_performance = cursor.fetchone()
-
-    if not existing_performance:
-        conn.close()
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Performance introuvable")
-
-    cursor.execute(''' 
-        UPDATE performances
-        SET power_max=?, hr_max=?, vo2_max=?, rf_max=?, cadence_max=?, vo2_class=?, ressenti=?
-        WHERE id_performance=? AND id_user=?
-    ''', (performance.power_max, performance.hr_max, performance.vo2_max, 
-          performance.rf_max, performance.cadence_max, performance.vo2_class, 
-          performance.ressenti, id_performance, id_user))
-    conn.commit()
-
-    cursor.execute("SELECT * FROM performances WHERE id_performance = ?", (id_performance,))
-    updated_performance = cursor.fetchone()
-    conn.close()
-
-    return dict(updated_performance)
+    def update(conn):
+        cursor = conn.cursor()
+        cohort_member = cohorts.member(cursor, id_user)
+        cursor.execute("SELECT * FROM performances WHERE id_performance = ? AND id_user = ?", (id_performance, id_user))
+        existing_performance = cursor.fetchone()
+
+        if not existing_performance:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Performance introuvable")
+
+        cursor.execute(''' 
+            UPDATE performances
+            SET power_max=?, hr_max=?, vo2_max=?, rf_max=?, cadence_max=?, vo2_class=?, ressenti=?,
+                vo2_class_low=?, vo2_class_high=?
+            WHERE id_performance=? AND id_user=?
+        ''', (performance.power_max, performance.hr_max, performance.vo2_max, 
+              performance.rf_max, performance.cadence_max, performance.vo2_class, 
+              performance.ressenti, *vo2_bounds.parse(performance.vo2_class), id_performance, id_user))
+        leaderboard.record(cursor, [id_performance])
+        athlete_stats.refresh(cursor, id_user)
+        cohorts.track(cursor, id_user, cohort_member)
+        http_cache.bump(cursor, http_cache.performances_resource(id_user))
+
+        cursor.execute(f"SELECT {_performance.columns} FROM performances WHERE id_performance = ?", (id_performance,))
+        row = cursor.fetchone()
+        events.publish_after_commit("updated", id_user, {"performance": _performance.values(row)})
+        return row
+
+    updated_performance = await db.write(update)
+
+    return json_response(_performance.one(updated_performance))
 
 # Supprimer une performance
 @router.delete("/{id_performance}", response_model=PerformanceResponse, status_code=status.HTTP_200_OK)
-def delete_performance(id_performance: int, token: str = Depends(get_token_from_header)):
+async def delete_performance(id_performance: int, id_user: int = Depends(get_current_user)):
     """Supprimer une performance.
 
     Args:
@@ -191,102 +616,83 @@ def delete_performance(id_performance: int, token: str = Depends(get_token_from_
     Returns:
         PerformanceResponse: Performance supprimée
     """
-    id_user = get_current_user(token)
-
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM performances WHERE id_performance = ? AND id_user = ?", (id_performance, id_user))
-    existing_performance = cursor.fetchone()
-
-    if not existing_performance:
-        conn.close()
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Performance introuvable")
+    def delete(conn):
+        cursor = conn.cursor()
+        cohort_member = cohorts.member(cursor, id_user)
+        cursor.execute(f"SELECT {_performance.columns} FROM performances WHERE id_performance = ? AND id_user = ?",
+                       (id_performance, id_user))
+        existing_performance = cursor.fetchone()
+
+        if not existing_performance:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Performance introuvable")
+
+        # Supprimer la performance
+        cursor.execute("DELETE FROM performances WHERE id_performance = ?", (id_performance,))
+        cursor.execute("DELETE FROM performance_samples WHERE id_performance = ?", (id_performance,))
+        leaderboard.forget(cursor, [id_performance])
+        athlete_stats.refresh(cursor, id_user)
+        cohorts.track(cursor, id_user, cohort_member)
+        http_cache.bump(cursor, http_cache.performances_resource(id_user))
+        events.publish_after_commit("deleted", id_user, {"performance": _performance.values(existing_performance)})
+        return existing_performance
 
     # Sauvegarder les détails de la performance avant la suppression
-    performance_to_delete = dict(existing_performance)
-
-    # Supprimer la performance
-    cursor.execute("DELETE FROM performances WHERE id_performance = ?", (id_performance,))
-    conn.commit()
-    conn.close()
+    performance_to_delete = await db.write(delete)
 
     # Retourner la performance supprimée dans la réponse
-    return performance_to_delete
+    return json_response(_performance.one(performance_to_delete))
+
 
+def _leaderboard_entry(row):
+    """Champs renvoyés pour une performance d'un classement.
+    """
+    return {
+        "nom": row["nom"],
+        "prenom": row["prenom"],
+        "date_performance": row["date_performance"],
+        "power_max": row["power_max"],
+        "hr_max": row["hr_max"],
+        "vo2_max": row["vo2_max"],
+        "rf_max": row["rf_max"],
+        "cadence_max": row["cadence_max"],
+        "vo2_class": row["vo2_class"],
+        "ressenti": row["ressenti"]
+    }
+
+async def _leaderboard_response(metric, limit):
+    """Meilleure performance (limit absent) ou top-k lu dans le classement maintenu.
+    """
+    rows = await db.read(leaderboard.top, metric, limit or 1)
+    if limit is not None:
+        return [_leaderboard_entry(row) for row in rows]
+    if rows:
+        return _leaderboard_entry(rows[0])
+    return {"message": "Aucune performance trouvée."}
 
 # Lire puissance max
 @router.get("/puissance/details")
-def get_performance(token: str = Depends(get_token_from_header)):
+async def get_performance(limit: Optional[int] = Query(None, ge=1, le=leaderboard.LEADERBOARD_SIZE),
+                          id_user: int = Depends(get_current_user)):
     """Récupérer la performance avec la puissance maximale.
         
         token (str): Token d'authentification
+        limit (int, optional): Renvoie la liste des `limit` meilleures performances
         Returns:
         Performance maximale
 
     """
-    id_user = get_current_user(token)
-
-
-    conn = get_db_connection()
-    conn.row_factory = sqlite3.Row  # Accéder aux colonnes par nom
-    cursor = conn.cursor()
-
-    # Construction sécurisée de la requête SQL
-    sql_query = f"""
-        SELECT u.nom, u.prenom, date_performance,
-               max(power_max) AS power_max, hr_max,
-               vo2_max, rf_max, cadence_max,
-               vo2_class, ressenti
-        FROM performances p  join users u on p.id_user = u.id_user
-    """
-
-    cursor.execute(sql_query)
-    row = cursor.fetchone()
-    conn.close()
-
-    if row:
-        # Renvoie un dictionnaire avec uniquement les champs que vous voulez
-        return {
-            "nom": row["nom"],
-            "prenom": row["prenom"],
-            "date_performance": row["date_performance"],
-            "power_max": row["power_max"],
-            "hr_max": row["hr_max"],
-            "vo2_max": row["vo2_max"],
-            "rf_max": row["rf_max"],
-            "cadence_max": row["cadence_max"],
-            "vo2_class": row["vo2_class"],
-            "ressenti": row["ressenti"]
-        }
-    else:
-        return {"message": "Aucune performance trouvée."}
+    return await _leaderboard_response("power_max", limit)
 
 # Lire puissance max
 @router.get("/puissance/detail/{id_user}")
-def get_performance(id_user: int, token: str = Depends(get_token_from_header)):
+async def get_performance(id_user: int, token: str = Depends(get_token_from_header)):
     """Récupérer pour un utilisateur donnée la performance avec la puissance maximale.
         
         token (str): Token d'authentification
         Returns:
                 Performance maximale
     """
-    conn = get_db_connection()
-    conn.row_factory = sqlite3.Row  # Accéder aux colonnes par nom
-    cursor = conn.cursor()
-
-    # Construction sécurisée de la requête SQL
-    sql_query = f"""
-        SELECT u.nom, u.prenom, date_performance,
-               max(power_max) AS power_max, hr_max,
-               vo2_max, rf_max, cadence_max,
-               vo2_class, ressenti
-        FROM performances p  join users u on p.id_user = u.id_user
-        WHERE p.id_user = ?
-    """
-
-    cursor.execute(sql_query, (id_user,))
-    row = cursor.fetchone()
-    conn.close()
+    row = await db.fetchone(POWER_DETAIL_SQL, (id_user,))
 
     if row:
         # Renvoie un dictionnaire avec uniquement les champs que vous voulez
@@ -307,51 +713,38 @@ def get_performance(id_user: int, token: str = Depends(get_token_from_header)):
 
 # Lire VO2max max
 @router.get("/VO2max/details")
-def get_performance(token: str = Depends(get_token_from_header)):
+async def get_performance(limit: Optional[int] = Query(None, ge=1, le=leaderboard.LEADERBOARD_SIZE),
+                          token: str = Depends(get_token_from_header)):
     """Récupérer la performance avec VO2max.
         
         token (str): Token d'authentification
+        limit (int, optional): Renvoie la liste des `limit` meilleures performances
         Returns:
         l'athlète avec la performance maximale (VO2max)
 
     """
-    conn = get_db_connection()
-    conn.row_factory = sqlite3.Row  # Accéder aux colonnes par nom
-    cursor = conn.cursor()
-
-    # Construction sécurisée de la requête SQL
-    sql_query = f"""
-        SELECT u.nom, u.prenom, date_performance,
-               power_max, hr_max,
-               max(vo2_max) AS VO2_max, rf_max, cadence_max,
-               vo2_class, ressenti
-        FROM performances p  join users u on p.id_user = u.id_user
-    """
+    return await _leaderboard_response("vo2_max", limit)
 
-    cursor.execute(sql_query)
-    row = cursor.fetchone()
-    conn.close()
+# Lire le classement d'une métrique
+@router.get("/leaderboard/{metric}")
+async def get_leaderboard(metric: str, limit: int = Query(10, ge=1, le=leaderboard.LEADERBOARD_SIZE),
+                          current_user: int = Depends(get_current_user)):
+    """Récupérer les meilleures performances pour une métrique.
 
-    if row:
-        # Renvoie un dictionnaire avec uniquement les champs que vous voulez
-        return {
-            "nom": row["nom"],
-            "prenom": row["prenom"],
-            "date_performance": row["date_performance"],
-            "power_max": row["power_max"],
-            "hr_max": row["hr_max"],
-            "vo2_max": row["vo2_max"],
-            "rf_max": row["rf_max"],
-            "cadence_max": row["cadence_max"],
-            "vo2_class": row["vo2_class"],
-            "ressenti": row["ressenti"]
-        }
-    else:
-        return {"message": "Aucune performance trouvée."}
+        metric (str): power_max, vo2_max, hr_max, cadence_max ou rf_max
+        limit (int): Nombre de performances renvoyées
+        token (str): Token d'authentification
+
+    Raises:
+        HTTPException: Métrique inconnue
+    """
+    if metric not in leaderboard.METRICS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Métrique inconnue")
+    return [_leaderboard_entry(row) for row in await db.read(leaderboard.top, metric, limit)]
     
 # Lire VO2max max
 @router.get("/VO2max/detail/{id_user}")
-def get_performance(id_user: int, token: str = Depends(get_token_from_header)):
+async def get_performance(id_user: int, token: str = Depends(get_token_from_header)):
     """Récupérer pour un utilisateur la performance avec VO2max.
         
         token (str): Token d'authentification
@@ -359,23 +752,7 @@ def get_performance(id_user: int, token: str = Depends(get_token_from_header)):
         l'athlète avec la performance maximale (VO2max)
 
     """
-    conn = get_db_connection()
-    conn.row_factory = sqlite3.Row  # Accéder aux colonnes par nom
-    cursor = conn.cursor()
-
-    # Construction sécurisée de la requête SQL
-    sql_query = f"""
-        SELECT u.nom, u.prenom, date_performance,
-               power_max, hr_max,
-               max(vo2_max) AS VO2_max, rf_max, cadence_max,
-               vo2_class, ressenti
-        FROM performances p  join users u on p.id_user = u.id_user
-        WHERE p.id_user = ?
-    """
-
-    cursor.execute(sql_query, (id_user,))
-    row = cursor.fetchone()
-    conn.close()
+    row = await db.fetchone(VO2_DETAIL_SQL, (id_user,))
 
     if row:
         # Renvoie un dictionnaire avec uniquement les champs que vous voulez
@@ -396,39 +773,58 @@ def get_performance(id_user: int, token: str = Depends(get_token_from_header)):
     
 # Lire rapport poids/puissance max
 @router.get("/poidspuissance/details")
-def get_performances(token: str = Depends(get_token_from_header)): 
+async def get_performances(limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+                           token: str = Depends(get_token_from_header)):
     """Récupérer le meilleur rapport puissance max / poids moyenne .
         
         token (str): Token d'authentification
+        limit (int, optional): Renvoie le classement des `limit` meilleurs athlètes
         Returns:
         l'athlète avec le rapport puissance max / poids maximum
 
     """
-    conn = get_db_connection()
-    conn.row_factory = sqlite3.Row  # Accéder aux colonnes par nom
-    cursor = conn.cursor()
-
-    # Construction sécurisée de la requête SQL
-    sql_query = f"""
-        SELECT u.nom, u.prenom, AVG(p.power_max / d.weight) AS rapport_moyen
-        FROM users u
-        JOIN performances p ON u.id_user = p.id_user
-        JOIN details d ON u.id_user = d.id_user
-        GROUP BY u.nom, u.prenom
-        ORDER BY rapport_moyen DESC
-        LIMIT 1;
-    """
+    rows = await db.read(athlete_stats.top, limit or 1)
 
-    cursor.execute(sql_query,)
-    row = cursor.fetchone()
-    conn.close()
+    if limit is not None:
+        return [{"nom": row["nom"], "prenom": row["prenom"], "rapport_moyen": row["avg_wkg"],
+                 "meilleur_rapport": row["best_wkg"]} for row in rows]
 
-    if row:
+    if rows:
         # Renvoie un dictionnaire avec uniquement les champs que vous voulez
         return {
-            "nom": row["nom"],
-            "prenom": row["prenom"],
-            "rapport_moyen": row["rapport_moyen"]
+            "nom": rows[0]["nom"],
+            "prenom": rows[0]["prenom"],
+            "rapport_moyen": rows[0]["avg_wkg"]
         }
     else:
-        return {"message": "Aucune performance trouvée."}
\ No newline at end of file
+        return {"message": "Aucune performance trouvée."}
+
+# Lire le rang d'un athlète pour le rapport poids/puissance
+@router.get("/poidspuissance/detail/{id_user}")
+async def get_performances(id_user: int, current_user: int = Depends(get_current_user)):
+    """Récupérer le rapport puissance max / poids moyen d'un athlète et son rang.
+
+        token (str): Token d'authentification
+        Returns:
+        rapport moyen, meilleur rapport, rang et nombre d'athlètes classés
+
+    Raises:
+        HTTPException: Athlète demandant le rapport d'un autre athlète (403)
+    """
+    def read(conn):
+        authorized_athletes(conn, current_user, [id_user])
+        return athlete_stats.rank(conn, id_user)
+
+    result = await db.read(read)
+    if result is None:
+        return {"message": "Aucune performance trouvée."}
+
+    row, position, total = result
+    return {
+        "nom": row["nom"],
+        "prenom": row["prenom"],
+        "rapport_moyen": row["avg_wkg"],
+        "meilleur_rapport": row["best_wkg"],
+        "rang": position,
+        "nombre_athletes": total
+    }
@@ -0,0 +1,65 @@
+import asyncio
+import os
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from app.async_database import db
+from app.utils.auth import authorized_athletes, get_current_user
+from app.utils.events import broker
+
+router = APIRouter(prefix="/stream", tags=["Stream"])
+
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))  # Commentaire envoyé sans événement
+
+
+async def _sse(id_users):
+    """Événements au format text/event-stream ; l'abonnement se termine à la déconnexion du client.
+
+    L'abonnement est pris à la première lecture du flux : une réponse jamais
+    envoyée (client déjà déconnecté) ne laisse pas d'abonné derrière elle.
+    """
+    try:
+        subscription = broker.subscribe(id_users)
+    except OverflowError:  # Places prises entre la vérification du handler et l'envoi
+        yield b"event: dropped\ndata: {}\n\n"
+        return
+    with subscription:
+        yield b": ok\n\n"  # Envoie les en-têtes au client sans attendre le premier événement
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if event is None:
+                yield b"event: dropped\ndata: {}\n\n"
+                return
+            event_id, kind, data = event
+            yield b"id: %d\nevent: %s\ndata: %s\n\n" % (event_id, kind.encode(), data)
+
+
+# Suivre les changements de performances
+@router.get("/")
+async def stream_performances(id_user: Optional[List[int]] = Query(None),
+                              current_user: int = Depends(get_current_user)):
+    """Flux Server-Sent Events des performances créées, modifiées ou supprimées.
+
+    Un athlète ne suit que ses performances ; un coach suit les athlètes
+    demandés ou, sans liste, tous les athlètes.
+
+        token (str): Token d'authentification
+        id_user (int, optional): Athlètes suivis (répétable)
+        Returns:
+        événements `created`, `bulk_created`, `updated`, `deleted` (données JSON), émis après le commit ;
+        `dropped` si le client ne lit pas assez vite (reconnexion à sa charge)
+
+    Raises:
+        HTTPException: Athlète suivant les performances d'autrui (403), trop d'abonnés (503)
+
+    Get: http://localhost:8000/performance/stream/?id_user=1&id_user=2
+    """
+    id_users = await db.read(authorized_athletes, current_user, id_user)
+    if len(broker) >= broker.max_subscribers:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Trop d'abonnés au flux")
+    return StreamingResponse(_sse(id_users), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
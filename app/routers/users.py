@@ -1,13 +1,25 @@
-from fastapi import APIRouter, HTTPException
-from app.database import get_db_connection
+import os
+import sqlite3
+from typing import List
+from fastapi import APIRouter, HTTPException, Body
+from app.async_database import db
 from app.schemas.user import UserCreate, UserResponse
-from app.utils.security import generate_token, hash_password
+from app.utils.security import (generate_token, hash_password_async, hash_passwords_async,
+                                rehash_if_changed_async)
+from app.utils.auth import token_cache
+from app.utils import athlete_stats, cohorts, leaderboard
+from app.utils.serialization import RowEncoder, json_response
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
+USER_BULK_MAX_ITEMS = int(os.getenv("USER_BULK_MAX_ITEMS", "1000"))  # Taille max d'un import groupé
+USER_BULK_INSERT_CHUNK = 100  # Lignes par INSERT multi-valeurs (7 paramètres par ligne)
+
+_user = RowEncoder(UserResponse)
+
 # Création d'un utilisateur
 @router.post("/", response_model=UserResponse)
-def create_user(user: UserCreate):
+async def create_user(user: UserCreate):
     """Create a new user.
 
     Args:
@@ -28,34 +40,79 @@ def create_user(user: UserCreate):
     "role": "athlete"
     }
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    try:
-        # 🔹 Générer un token avant insertion
-        token = generate_token(user.email)
+    # 🔹 Générer un token avant insertion
+    token = generate_token(user.email)
+    # 🔹 bcrypt est coûteux : calculé dans le pool de processus
+    password = await hash_password_async(user.password)
 
+    def insert(conn):
+        cursor = conn.cursor()
         # 🔹 Insérer l'utilisateur avec son token directement
         cursor.execute(''' 
             INSERT INTO users (username, nom, prenom, email, password, role, token)
             VALUES (?, ?, ?, ?, ?, ?, ?) 
-        ''', (user.username, user.nom, user.prenom, user.email, hash_password(user.password), user.role, token))
-        
-        conn.commit()
-        user_id = cursor.lastrowid
-
-    except Exception as e:
-        conn.rollback()
-        conn.close()
-        raise HTTPException(status_code=400, detail="User already exists")
+        ''', (user.username, user.nom, user.prenom, user.email, password, user.role, token))
+        return cursor.lastrowid
 
-    conn.close()
+    try:
+        user_id = await db.write(insert)
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=400, detail="User already exists")
 
     return UserResponse(id_user=user_id, **user.dict(exclude={"password"}), token=token)
 
+# Création d'utilisateurs en lot
+@router.post("/bulk", response_model=List[UserResponse])
+async def create_users_bulk(users: List[UserCreate] = Body(..., max_length=USER_BULK_MAX_ITEMS)):
+    """Create several users (club roster import) in a single transaction.
+
+    Passwords are hashed in parallel in the process pool; if any user
+    cannot be inserted, none is.
+
+    Raises:
+        HTTPException: Duplicate username/email in the batch, or user already exists
+
+    Returns:
+        List[UserResponse]: Users created, in the order provided
+
+    Post: localhost:8000/admin/users/bulk, Body:[{"username": ..., "password": ..., ...}, ...]
+    """
+    for field in ("username", "email"):
+        values = [getattr(user, field) for user in users]
+        if len(set(values)) != len(values):
+            raise HTTPException(status_code=400, detail=f"Duplicate {field} in batch")
+
+    tokens = [generate_token(user.email) for user in users]
+    passwords = await hash_passwords_async(user.password for user in users)
+
+    def insert(conn):
+        cursor = conn.cursor()
+        ids = {}
+        for start in range(0, len(users), USER_BULK_INSERT_CHUNK):
+            chunk = range(start, min(start + USER_BULK_INSERT_CHUNK, len(users)))
+            params = []
+            for i in chunk:
+                params.extend((users[i].username, users[i].nom, users[i].prenom, users[i].email,
+                               passwords[i], users[i].role, tokens[i]))
+            cursor.execute(f'''
+                INSERT INTO users (username, nom, prenom, email, password, role, token)
+                VALUES {", ".join(["(?, ?, ?, ?, ?, ?, ?)"] * len(chunk))}
+                RETURNING id_user, username
+            ''', params)
+            ids.update((row["username"], row["id_user"]) for row in cursor.fetchall())
+        return ids
+
+    try:
+        ids = await db.write(insert)
+    except sqlite3.IntegrityError as e:
+        raise HTTPException(status_code=400, detail=f"User already exists: {e}")
+
+    return [UserResponse(id_user=ids[user.username], **user.dict(exclude={"password"}), token=token)
+            for user, token in zip(users, tokens)]
+
 # Récupérer un utilisateur par son ID
 @router.get("/{user_id}", response_model=UserResponse)
-def get_user(user_id: int):
+async def get_user(user_id: int):
     """Recupérer un utilisateur par son ID.
 
     Args:
@@ -69,20 +126,16 @@ def get_user(user_id: int):
     
     Get: localhost:8000/admin/users/1
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id_user, username, nom, prenom, email, token, role FROM users WHERE id_user = ?", (user_id,))
-    user = cursor.fetchone()
-    conn.close()
+    user = await db.fetchone(f"SELECT {_user.columns} FROM users WHERE id_user = ?", (user_id,))
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    return UserResponse(**dict(user))
+    return json_response(_user.one(user))
 
 # Mettre à jour un utilisateur
 @router.put("/{user_id}", response_model=UserResponse)
-def update_user(user_id: int, user: UserCreate):
+async def update_user(user_id: int, user: UserCreate):
     """Mis à jour d'un utilisateur.
 
     Args:
@@ -108,43 +161,48 @@ def update_user(user_id: int, user: UserCreate):
     }
 
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    # Vérifier si l'utilisateur existe
-    cursor.execute("SELECT id_user FROM users WHERE id_user = ?", (user_id,))
-    if not cursor.fetchone():
-        conn.close()
+    stored = await db.fetchone("SELECT password FROM users WHERE id_user = ?", (user_id,))
+    if not stored:
         raise HTTPException(status_code=404, detail="User not found")
 
-    # Vérifier si l'email est déjà utilisé par un autre utilisateur
-    cursor.execute("SELECT id_user FROM users WHERE email = ? AND id_user != ?", (user.email, user_id))
-    if cursor.fetchone():
-        conn.close()
-        raise HTTPException(status_code=400, detail="Email already in use")
+    # 🔹 Mot de passe inchangé : on garde le hash stocké (sauf changement de BCRYPT_ROUNDS) ;
+    # une seule exécution de bcrypt dans tous les cas
+    password = await rehash_if_changed_async(user.password, stored["password"])
+
+    def update(conn):
+        cursor = conn.cursor()
 
-    # Vérifier si le username est déjà utilisé par un autre utilisateur
-    cursor.execute("SELECT id_user FROM users WHERE username = ? AND id_user != ?", (user.username, user_id))
-    if cursor.fetchone():
-        conn.close()
-        raise HTTPException(status_code=400, detail="Username already in use")
+        # Vérifier si l'utilisateur existe
+        cursor.execute("SELECT id_user FROM users WHERE id_user = ?", (user_id,))
+        if not cursor.fetchone():
+            raise HTTPException(status_code=404, detail="User not found")
 
-    # Mettre à jour l'utilisateur sans modifier le token
-    cursor.execute(''' 
-        UPDATE users
-        SET username = ?, nom = ?, prenom = ?, email = ?, password = ?, role = ?
-        WHERE id_user = ?
-    ''', (user.username, user.nom, user.prenom, user.email, hash_password(user.password), user.role, user_id))
+        # Vérifier si l'email est déjà utilisé par un autre utilisateur
+        cursor.execute("SELECT id_user FROM users WHERE email = ? AND id_user != ?", (user.email, user_id))
+        if cursor.fetchone():
+            raise HTTPException(status_code=400, detail="Email already in use")
 
-    conn.commit()
-    conn.close()
+        # Vérifier si le username est déjà utilisé par un autre utilisateur
+        cursor.execute("SELECT id_user FROM users WHERE username = ? AND id_user != ?", (user.username, user_id))
+        if cursor.fetchone():
+            raise HTTPException(status_code=400, detail="Username already in use")
+
+        # Mettre à jour l'utilisateur sans modifier le token
+        cursor.execute(''' 
+            UPDATE users
+            SET username = ?, nom = ?, prenom = ?, email = ?, password = ?, role = ?
+            WHERE id_user = ?
+        ''', (user.username, user.nom, user.prenom, user.email, password, user.role, user_id))
+
+    await db.write(update)
+    token_cache.invalidate_user(user_id)
 
     # Retourner la réponse sans le password
     return UserResponse(id_user=user_id, token="generated_token", **user.dict(exclude={"password"}))
 
 # Supprimer un utilisateur
 @router.delete("/{user_id}")
-def delete_user(user_id: int):
+async def delete_user(user_id: int):
     """supprimer un utilisateur.
 
     Args:
@@ -153,21 +211,25 @@ def delete_user(user_id: int):
     Returns:
         "message": "User deleted successfully"
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    # Vérifier si l'utilisateur existe
-    cursor.execute("SELECT * FROM users WHERE id_user = ?", (user_id,))
-    user = cursor.fetchone()
-
-    if not user:
-        conn.close()
+    def delete(conn):
+        cursor = conn.cursor()
+
+        # Vérifier si l'utilisateur existe
+        cursor.execute("SELECT * FROM users WHERE id_user = ?", (user_id,))
+        if not cursor.fetchone():
+            return False
+
+        # Si l'utilisateur existe, procéder à la suppression
+        cohort_member = cohorts.member(cursor, user_id)
+        cursor.execute("DELETE FROM users WHERE id_user = ?", (user_id,))
+        athlete_stats.forget_user(cursor, user_id)
+        leaderboard.forget_user(cursor, user_id)
+        cohorts.track(cursor, user_id, cohort_member)
+        return True
+
+    if not await db.write(delete):
         return {"error": "User not found"}
-
-    # Si l'utilisateur existe, procéder à la suppression
-    cursor.execute("DELETE FROM users WHERE id_user = ?", (user_id,))
-    conn.commit()
-    conn.close()
+    token_cache.invalidate_user(user_id)
 
     return {"message": "User deleted successfully"}
 
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
 class PerformanceBase(BaseModel):
@@ -26,4 +26,69 @@ class PerformanceResponse(PerformanceBase):
     date_performance: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class PerformanceBulkItemResult(BaseModel):
+    """
+    Résultat d'un élément d'un envoi groupé : id attribué ou erreurs de validation
+    """
+    index: int
+    id_performance: Optional[int] = None
+    errors: Optional[List[Any]] = None
+
+class PerformanceBulkResponse(BaseModel):
+    """
+    Réponse d'un envoi groupé de performances
+    """
+    inserted: int
+    failed: int
+    results: List[PerformanceBulkItemResult]
+
+class PerformanceSummaryRequest(BaseModel):
+    """
+    Athlètes d'un tableau de bord : résumé groupé, en colonnes si compact
+    """
+    id_users: List[int]
+    compact: bool = False
+
+class PerformanceFilters(BaseModel):
+    """
+    Filtres de la liste des performances (paramètres de requête), bornes incluses
+    """
+    vo2_class: Optional[str] = None  # Classe exacte : "74-88" ou "[74, 88]"
+    vo2_class_min: Optional[float] = None  # Borne basse de la classe >= vo2_class_min
+    vo2_class_max: Optional[float] = None  # Borne haute de la classe <= vo2_class_max
+    power_max_from: Optional[float] = None
+    power_max_to: Optional[float] = None
+    hr_max_from: Optional[float] = None
+    hr_max_to: Optional[float] = None
+    vo2_max_from: Optional[float] = None
+    vo2_max_to: Optional[float] = None
+    rf_max_from: Optional[float] = None
+    rf_max_to: Optional[float] = None
+    cadence_max_from: Optional[float] = None
+    cadence_max_to: Optional[float] = None
+    ressenti_from: Optional[int] = None
+    ressenti_to: Optional[int] = None
+
+class MetricRange(BaseModel):
+    """
+    Bornes incluses d'une métrique
+    """
+    min: Optional[float] = None
+    max: Optional[float] = None
+
+class PerformanceQuery(BaseModel):
+    """
+    Requête d'analyse : athlètes, dates, bornes par métrique, tri, projection et page
+    """
+    id_users: Optional[List[int]] = None  # Défaut : l'athlète authentifié (tous les athlètes pour un coach)
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    ranges: Dict[str, MetricRange] = {}  # {"power_max": {"min": 250}}
+    sort: str = "date_performance"  # "-power_max" : décroissant
+    fields: Optional[List[str]] = None  # Colonnes renvoyées (toutes par défaut)
+    limit: int = 100
+    cursor: Optional[str] = None  # curseur_suivant de la page précédente
+    compact: bool = False  # Colonnes et lignes au lieu d'un objet par performance
+    debug: bool = False  # Ajoute le plan d'exécution et le coût estimé
@@ -0,0 +1,162 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from app.utils import http_cache
+from app.utils.leaderboard import METRICS
+
+# 🔹 Analyses des séances d'un athlète : historique chargé en colonnes NumPy
+# (une requête), puis moyennes glissantes, tendance linéaire, progression des
+# records et évolution hebdomadaire calculées sans boucle par séance.
+ANALYTICS_CACHE_SIZE = int(os.getenv("ANALYTICS_CACHE_SIZE", "256"))  # Athlètes gardés en mémoire
+
+_SECONDS_PER_DAY = 86400.0
+
+
+class HistoryCache:
+    """Cache LRU des historiques par athlète : id_user -> (version, dates, valeurs).
+
+    Une entrée n'est valable que pour la version des performances de
+    l'athlète (table resource_versions) : toute écriture l'invalide.
+    """
+
+    def __init__(self, maxsize=ANALYTICS_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, id_user, version):
+        with self._lock:
+            entry = self._entries.get(id_user)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(id_user)
+            return entry[1], entry[2]
+
+    def set(self, id_user, version, dates, values):
+        with self._lock:
+            self._entries[id_user] = (version, dates, values)
+            self._entries.move_to_end(id_user)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+history_cache = HistoryCache()
+
+
+def load_history(conn, id_user):
+    """Historique d'un athlète trié par date : (dates datetime64[s], valeurs float64 (métrique, séance)).
+
+    Les valeurs absentes sont NaN. L'historique est relu seulement si la
+    version des performances de l'athlète a changé.
+    """
+    version, _ = http_cache.get_version(conn, http_cache.performances_resource(id_user))
+    cached = history_cache.get(id_user, version)
+    if cached is not None:
+        return cached
+
+    cursor = conn.cursor()
+    cursor.row_factory = None  # Tuples : plus rapide à transposer que sqlite3.Row
+    rows = cursor.execute(f'''
+        SELECT date_performance, {", ".join(METRICS)} FROM performances
+        WHERE id_user = ?
+        ORDER BY date_performance, id_performance
+    ''', (id_user,)).fetchall()
+
+    if rows:
+        columns = list(zip(*rows))
+        dates = np.array(columns[0], dtype="datetime64[s]")
+        values = np.array(columns[1:], dtype=np.float64)  # None -> NaN
+    else:
+        dates = np.empty(0, dtype="datetime64[s]")
+        values = np.empty((len(METRICS), 0), dtype=np.float64)
+    history_cache.set(id_user, version, dates, values)
+    return dates, values
+
+
+def _number(value):
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def _metric_summary(values, dates, days, week_index, window, first_week, weeks):
+    """Indicateurs d'une métrique, à partir des seules séances où elle est mesurée.
+    """
+    measured = ~np.isnan(values)
+    count = int(measured.sum())
+    if count == 0:
+        return None
+    values, dates, days, week_index = values[measured], dates[measured], days[measured], week_index[measured]
+
+    # Moyenne glissante sur les `window` dernières séances (sommes cumulées)
+    size = min(window, count)
+    cumsum = np.cumsum(values)
+    rolling = (cumsum[size - 1:] - np.concatenate(([0.0], cumsum[:-size]))) / size
+
+    # Tendance linéaire (moindres carrés) : variation par jour
+    slope = r2 = None
+    if count >= 2:
+        x = days - days.mean()
+        y = values - values.mean()
+        sxx = float(x @ x)
+        if sxx > 0:
+            slope = float(x @ y) / sxx
+            syy = float(y @ y)
+            r2 = (float(x @ y) ** 2 / (sxx * syy)) if syy > 0 else 1.0
+
+    # Progression des records : séances où le maximum courant augmente
+    running_max = np.maximum.accumulate(values)
+    records = np.flatnonzero(np.concatenate(([True], running_max[1:] > running_max[:-1])))
+
+    # Moyennes hebdomadaires (semaines du lundi) et écart avec la semaine précédente
+    in_range = week_index >= first_week
+    offsets = week_index[in_range] - first_week
+    sessions = np.bincount(offsets, minlength=weeks)
+    totals = np.bincount(offsets, weights=values[in_range], minlength=weeks)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = totals / sessions
+    deltas = np.concatenate(([np.nan], np.diff(means)))
+    week_starts = ((np.arange(weeks) + first_week) * 7 - 3).astype("datetime64[D]")
+
+    return {
+        "sessions": count,
+        "latest": float(values[-1]),
+        "mean": float(values.mean()),
+        "rolling_average": float(rolling[-1]),
+        "rolling_window": size,
+        "trend": {"slope_per_day": slope, "slope_per_week": None if slope is None else slope * 7, "r2": r2},
+        "personal_best": float(running_max[-1]),
+        "personal_best_progression": [
+            {"date": str(date), "value": float(value)} for date, value in zip(dates[records], values[records])
+        ],
+        "weekly": [
+            {"week": str(week_starts[i]), "sessions": int(sessions[i]),
+             "mean": _number(means[i]), "delta": _number(deltas[i])}
+            for i in np.flatnonzero(sessions)
+        ],
+    }
+
+
+def compute(dates, values, window=7, weeks=12):
+    """Indicateurs de chaque métrique sur l'historique chargé par load_history.
+    """
+    days = (dates - dates[0]).astype(np.float64) / _SECONDS_PER_DAY
+    # 1970-01-01 est un jeudi : +3 jours pour des semaines commençant le lundi
+    week_index = (dates.astype("datetime64[D]").astype(np.int64) + 3) // 7
+    first_week = int(week_index[-1]) - weeks + 1
+    return {
+        "sessions": len(dates),
+        "first_session": str(dates[0]),
+        "last_session": str(dates[-1]),
+        "metrics": {
+            metric: _metric_summary(values[i], dates, days, week_index, window, first_week, weeks)
+            for i, metric in enumerate(METRICS)
+        },
+    }
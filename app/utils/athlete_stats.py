@@ -0,0 +1,186 @@
+import sys
+
+# 🔹 Agrégats par athlète (table athlete_stats) : somme et nombre des puissances max,
+# meilleures puissance et VO2max, poids, rapport puissance/poids moyen et meilleur rapport.
+# Les insertions mettent à jour les sommes ; modifications et suppressions
+# recalculent la ligne de l'athlète (index id_user), jamais toute la table.
+
+# Classement et rang par rapport moyen, lus par idx_athlete_stats_avg_wkg
+TOP_SQL = '''
+    SELECT u.id_user, u.nom, u.prenom, s.avg_wkg, s.best_wkg
+    FROM athlete_stats s JOIN users u ON u.id_user = s.id_user
+    WHERE s.avg_wkg IS NOT NULL
+    ORDER BY s.avg_wkg DESC, s.id_user
+    LIMIT ?
+'''
+RANK_SQL = '''
+    SELECT (SELECT COUNT(*) FROM athlete_stats WHERE avg_wkg > ?)
+         + (SELECT COUNT(*) FROM athlete_stats WHERE avg_wkg = ? AND id_user < ?)
+'''
+
+_UPDATE_RATIOS = '''
+    UPDATE athlete_stats SET
+        avg_wkg = CASE WHEN power_count > 0 THEN power_sum / power_count / NULLIF(weight, 0) END,
+        best_wkg = best_power / NULLIF(weight, 0)
+    WHERE id_user = ?
+'''
+
+
+def record_inserted(cursor, id_user, powers, vo2s=()):
+    """Ajoute des performances nouvellement insérées aux agrégats de l'athlète.
+
+    À appeler dans la transaction de l'écriture, avant le commit.
+    """
+    powers = list(powers)
+    if not powers:
+        return
+    measured = [power for power in powers if power is not None]
+    best_vo2 = max((vo2 for vo2 in vo2s if vo2 is not None), default=None)
+    cursor.execute('''
+        INSERT INTO athlete_stats (id_user, session_count, power_sum, power_count, best_power, best_vo2, weight)
+        VALUES (?, ?, ?, ?, ?, ?, (SELECT weight FROM details WHERE id_user = ?))
+        ON CONFLICT(id_user) DO UPDATE SET
+            session_count = session_count + excluded.session_count,
+            power_sum = power_sum + excluded.power_sum,
+            power_count = power_count + excluded.power_count,
+            best_power = CASE
+                WHEN best_power IS NULL OR excluded.best_power > best_power THEN excluded.best_power
+                ELSE best_power END,
+            best_vo2 = CASE
+                WHEN best_vo2 IS NULL OR excluded.best_vo2 > best_vo2 THEN excluded.best_vo2
+                ELSE best_vo2 END
+    ''', (id_user, len(powers), sum(measured), len(measured), max(measured, default=None), best_vo2, id_user))
+    cursor.execute(_UPDATE_RATIOS, (id_user,))
+
+
+def refresh(cursor, id_user):
+    """Recalcule les agrégats d'un athlète (après modification ou suppression).
+    """
+    cursor.execute('''
+        INSERT INTO athlete_stats (id_user, session_count, power_sum, power_count, best_power, best_vo2, weight)
+        SELECT ?, COUNT(*), COALESCE(SUM(power_max), 0), COUNT(power_max), MAX(power_max), MAX(vo2_max),
+               (SELECT weight FROM details WHERE id_user = ?)
+        FROM performances WHERE id_user = ?
+        ON CONFLICT(id_user) DO UPDATE SET
+            session_count = excluded.session_count,
+            power_sum = excluded.power_sum,
+            power_count = excluded.power_count,
+            best_power = excluded.best_power,
+            best_vo2 = excluded.best_vo2,
+            weight = excluded.weight
+    ''', (id_user, id_user, id_user))
+    cursor.execute(_UPDATE_RATIOS, (id_user,))
+
+
+def set_weight(cursor, id_user, weight):
+    """Prend en compte un nouveau poids (création, modification ou suppression des détails).
+    """
+    cursor.execute('''
+        INSERT INTO athlete_stats (id_user, weight) VALUES (?, ?)
+        ON CONFLICT(id_user) DO UPDATE SET weight = excluded.weight
+    ''', (id_user, weight))
+    cursor.execute(_UPDATE_RATIOS, (id_user,))
+
+
+def forget_user(cursor, id_user):
+    """Supprime les agrégats d'un utilisateur supprimé.
+    """
+    cursor.execute("DELETE FROM athlete_stats WHERE id_user = ?", (id_user,))
+
+
+def populate(conn):
+    """Recalcule les agrégats de tous les athlètes, sans commit.
+    """
+    conn.execute("DELETE FROM athlete_stats")
+    conn.execute('''
+        INSERT INTO athlete_stats (id_user, session_count, power_sum, power_count, best_power, best_vo2, weight)
+        SELECT p.id_user, COUNT(*), COALESCE(SUM(p.power_max), 0), COUNT(p.power_max), MAX(p.power_max),
+               MAX(p.vo2_max), d.weight
+        FROM performances p
+        JOIN users u ON u.id_user = p.id_user
+        LEFT JOIN details d ON d.id_user = p.id_user
+        GROUP BY p.id_user
+    ''')
+    conn.execute('''
+        INSERT INTO athlete_stats (id_user, weight)
+        SELECT id_user, weight FROM details
+        WHERE id_user NOT IN (SELECT id_user FROM athlete_stats)
+    ''')
+    conn.execute('''
+        UPDATE athlete_stats SET
+            avg_wkg = CASE WHEN power_count > 0 THEN power_sum / power_count / NULLIF(weight, 0) END,
+            best_wkg = best_power / NULLIF(weight, 0)
+    ''')
+
+
+def rebuild(conn):
+    """Reconstruit les agrégats (démarrage à froid, après un chargement en masse).
+    """
+    populate(conn)
+    conn.commit()
+
+
+def top(conn, limit=1):
+    """Athlètes classés par rapport puissance/poids moyen, lus par l'index (O(k)).
+    """
+    return conn.execute(TOP_SQL, (limit,)).fetchall()
+
+
+def rank(conn, id_user):
+    """Rang d'un athlète par rapport puissance/poids moyen, ou None s'il n'est pas classé.
+
+    Returns:
+        tuple: (ligne de l'athlète, rang, nombre d'athlètes classés)
+    """
+    row = conn.execute('''
+        SELECT u.id_user, u.nom, u.prenom, s.avg_wkg, s.best_wkg
+        FROM athlete_stats s JOIN users u ON u.id_user = s.id_user
+        WHERE s.id_user = ? AND s.avg_wkg IS NOT NULL
+    ''', (id_user,)).fetchone()
+    if row is None:
+        return None
+    better = conn.execute(RANK_SQL, (row["avg_wkg"], row["avg_wkg"], id_user)).fetchone()[0]
+    total = conn.execute("SELECT COUNT(*) FROM athlete_stats WHERE avg_wkg IS NOT NULL").fetchone()[0]
+    return row, better + 1, total
+
+
+def check(conn, tolerance=1e-9):
+    """Compare les agrégats avec la requête d'agrégation complète.
+
+    Returns:
+        list: (id_user, rapport maintenu, rapport attendu) pour les écarts
+    """
+    expected = {row[0]: row[1] for row in conn.execute('''
+        SELECT u.id_user, AVG(p.power_max / d.weight)
+        FROM users u
+        JOIN performances p ON u.id_user = p.id_user
+        JOIN details d ON u.id_user = d.id_user
+        GROUP BY u.id_user
+    ''')}
+    actual = {row[0]: row[1] for row in conn.execute("SELECT id_user, avg_wkg FROM athlete_stats")
+              if row[0] in expected or row[1] is not None}
+    mismatches = []
+    for id_user in set(expected) | set(actual):
+        a, e = actual.get(id_user), expected.get(id_user)
+        if (a is None) != (e is None) or (a is not None and abs(a - e) > tolerance * max(1.0, abs(e))):
+            mismatches.append((id_user, a, e))
+    return mismatches
+
+
+if __name__ == "__main__":
+    # python -m app.utils.athlete_stats [rebuild | check]
+    from app.database import get_db_connection
+
+    conn = get_db_connection()
+    try:
+        if "rebuild" in sys.argv:
+            rebuild(conn)
+            print("✅ Agrégats par athlète reconstruits")
+        mismatches = check(conn)
+        for id_user, actual, expected in mismatches:
+            print(f"❌ athlète {id_user} : rapport {actual} != agrégation complète {expected}")
+        if mismatches:
+            sys.exit(1)
+        print("✅ Agrégats cohérents avec la table performances")
+    finally:
+        conn.close()
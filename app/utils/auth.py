@@ -0,0 +1,156 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from fastapi import HTTPException, status, Depends, Header
+from app.async_database import db
+from app.utils.security import decode_token
+
+# 🔹 Taille et durée de vie du cache token -> id_user
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))  # secondes
+
+TOKEN_USER_SQL = "SELECT id_user FROM users WHERE token = ?"  # Servie par idx_users_token
+
+
+class TokenCache:
+    """Cache LRU borné avec expiration (TTL) : token -> id_user.
+
+    Le cache est local au processus : invalidate_user doit être appelé à chaque
+    modification ou suppression de compte, le TTL borne la fraîcheur entre workers.
+    """
+
+    def __init__(self, maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # token -> (id_user, expire_a)
+        self._tokens_by_user = {}  # id_user -> {tokens}
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        """Retourne l'id_user associé au token, ou None (absent ou expiré).
+        """
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            id_user, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(token)
+                return None
+            self._entries.move_to_end(token)
+            return id_user
+
+    def set(self, token, id_user):
+        """Ajoute une entrée, valable ttl secondes.
+        """
+        with self._lock:
+            self._remove(token)
+            self._entries[token] = (id_user, time.monotonic() + self.ttl)
+            self._tokens_by_user.setdefault(id_user, set()).add(token)
+            while len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def invalidate_user(self, id_user):
+        """Supprime toutes les entrées d'un utilisateur (compte modifié ou supprimé).
+        """
+        with self._lock:
+            for token in list(self._tokens_by_user.get(id_user, ())):
+                self._remove(token)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def _remove(self, token):
+        entry = self._entries.pop(token, None)
+        if entry is not None:
+            tokens = self._tokens_by_user.get(entry[0])
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._tokens_by_user[entry[0]]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+token_cache = TokenCache()
+
+# Fonction pour extraire le token de l'Authorization header
+async def get_token_from_header(authorization: str = Header(None)):
+    """
+        Args: authorization (str, optional): champ Autorization dans header
+
+    Raises:
+        HTTPException: Token manquant dans les headers ou invalide
+
+    Returns:
+         token
+    """
+    if not authorization:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token manquant dans les headers")
+    token = authorization.split("Bearer ")[-1]  # Supposer que le format est 'Bearer <token>'
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalide")
+    return token
+
+# Fonction pour vérifier l'authentification via token
+async def get_current_user(token: str = Depends(get_token_from_header)):
+    """Vérifie l'authentification de l'utilisateur via le token fourni.
+
+    La signature du JWT est vérifiée sans base de données : un token forgé
+    ou corrompu est refusé sans requête. Le token stocké dans users reste la
+    référence (révocation à la suppression du compte) ; la base n'est
+    interrogée qu'en cas d'absence du token dans le cache, par
+    une lecture courte (db.fetchone) distincte de celles du handler : aucune
+    connexion n'est gardée pour toute la durée de la requête.
+
+    Args:
+        token (str): Token d'authentification
+
+    Raises:
+        HTTPException: Token invalide
+
+    Returns:
+        _type_: user["id_user"]
+    """
+    if decode_token(token) is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalide ou expiré")
+
+    id_user = token_cache.get(token)
+    if id_user is not None:
+        return id_user
+
+    user = await db.fetchone(TOKEN_USER_SQL, (token,))
+
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalide ou expiré")
+
+    token_cache.set(token, user["id_user"])
+    return user["id_user"]
+
+
+def authorized_athletes(conn, id_user, id_users=None):
+    """Athlètes dont l'utilisateur authentifié peut lire les performances.
+
+    Un athlète ne lit que les siennes ; un coach lit les athlètes demandés,
+    ou tous (None) sans liste.
+
+    Raises:
+        HTTPException: Athlète demandant les performances d'autrui (403)
+
+    Returns:
+        list: id_user autorisés, ou None pour tous les athlètes
+    """
+    role = conn.execute("SELECT role FROM users WHERE id_user = ?", (id_user,)).fetchone()
+    coach = role is not None and role[0] == "coach"
+    if id_users is None:
+        return None if coach else [id_user]
+    id_users = list(dict.fromkeys(id_users))
+    if not coach and id_users != [id_user]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="Seul un coach peut lire les performances d'autres athlètes")
+    return id_users
@@ -0,0 +1,186 @@
+import os
+import threading
+from bisect import bisect_left, bisect_right, insort
+from app.async_database import db
+from app.utils import http_cache
+
+# 🔹 Percentiles par cohorte (genre × tranche d'âge) : pour chaque cohorte et
+# chaque métrique, liste triée des meilleures valeurs des athlètes, interrogée
+# par recherche dichotomique. L'index vit en mémoire dans chaque worker :
+# - les écritures de ce worker y sont appliquées après leur commit (O(n) memmove, sans requête) ;
+# - le compteur de version "cohorts" (resource_versions) signale les écritures
+#   des autres workers ou des chargements en masse : l'index est alors relu.
+COHORT_AGE_BAND = int(os.getenv("COHORT_AGE_BAND", "10"))  # Largeur des tranches d'âge (ans)
+RESOURCE = "cohorts"
+
+# Métrique -> colonne de la meilleure valeur dans athlete_stats
+METRICS = {"power_max": "best_power", "vo2_max": "best_vo2"}
+
+_MEMBER_COLUMNS = "d.gender, d.age, " + ", ".join(f"s.{column}" for column in METRICS.values())
+MEMBER_SQL = f'''
+    SELECT {_MEMBER_COLUMNS}
+    FROM details d LEFT JOIN athlete_stats s ON s.id_user = d.id_user
+    WHERE d.id_user = ?
+'''
+
+
+def age_band(age):
+    start = age // COHORT_AGE_BAND * COHORT_AGE_BAND
+    return f"{start}-{start + COHORT_AGE_BAND - 1}"
+
+
+def cohort_of(gender, age):
+    """Cohorte (genre, tranche d'âge), ou None si le genre ou l'âge manque.
+    """
+    if not gender or age is None:
+        return None
+    return gender.strip().lower(), age_band(age)
+
+
+def member(cursor, id_user):
+    """(genre, âge, meilleures valeurs...) d'un athlète, ou None sans détails.
+    """
+    return cursor.execute(MEMBER_SQL, (id_user,)).fetchone()
+
+
+def track(cursor, id_user, before):
+    """Signale le changement de cohorte ou de meilleures valeurs d'un athlète.
+
+    `before` est le résultat de member() lu au début de l'écriture ; à appeler
+    après les agrégats, dans une fonction passée à db.write().
+    """
+    after = member(cursor, id_user)
+    after = tuple(after) if after is not None else None
+    if after == (tuple(before) if before is not None else None):
+        return
+    http_cache.bump(cursor, RESOURCE)
+    version = cursor.execute("SELECT version FROM resource_versions WHERE resource = ?", (RESOURCE,)).fetchone()[0]
+    db.after_commit(lambda: index.apply(version, id_user, after))
+
+
+class CohortIndex:
+    """Listes triées des meilleures valeurs par (cohorte, métrique).
+    """
+
+    def __init__(self):
+        self.version = None
+        self._members = {}  # id_user -> (cohorte, valeurs par métrique)
+        self._values = {}   # (cohorte, métrique) -> valeurs triées
+        self._lock = threading.Lock()
+
+    def _add(self, id_user, row):
+        cohort = cohort_of(row[0], row[1])
+        if cohort is None:
+            return
+        values = dict(zip(METRICS, row[2:]))
+        self._members[id_user] = (cohort, values)
+        for metric, value in values.items():
+            if value is not None:
+                insort(self._values.setdefault((cohort, metric), []), value)
+
+    def _remove(self, id_user):
+        entry = self._members.pop(id_user, None)
+        if entry is None:
+            return
+        cohort, values = entry
+        for metric, value in values.items():
+            if value is not None:
+                sorted_values = self._values[(cohort, metric)]
+                del sorted_values[bisect_left(sorted_values, value)]
+
+    def load(self, conn, version):
+        """Reconstruit l'index depuis details et athlete_stats (une lecture séquentielle).
+        """
+        rows = conn.execute(f'''
+            SELECT d.id_user, {_MEMBER_COLUMNS}
+            FROM details d LEFT JOIN athlete_stats s ON s.id_user = d.id_user
+        ''').fetchall()
+        members, values = {}, {}
+        for row in rows:
+            cohort = cohort_of(row[1], row[2])
+            if cohort is None:
+                continue
+            metrics = dict(zip(METRICS, row[3:]))
+            members[row[0]] = (cohort, metrics)
+            for metric, value in metrics.items():
+                if value is not None:
+                    values.setdefault((cohort, metric), []).append(value)
+        for sorted_values in values.values():
+            sorted_values.sort()
+        with self._lock:
+            self._members, self._values, self.version = members, values, version
+
+    def ensure(self, conn):
+        """Relit l'index si une écriture non appliquée a changé la version "cohorts".
+
+        La version est lue avant les lignes : l'index n'est jamais plus ancien
+        que sa version, au pire une mise à jour déjà lue est réappliquée.
+        """
+        version, _ = http_cache.get_version(conn, RESOURCE)
+        if self.version != version:
+            self.load(conn, version)
+
+    def apply(self, version, id_user, row):
+        """Applique une écriture validée ; ignorée si une autre version s'est intercalée.
+        """
+        with self._lock:
+            if self.version is None or version != self.version + 1:
+                return  # Rechargement complet à la prochaine lecture
+            self._remove(id_user)
+            if row is not None:
+                self._add(id_user, row)
+            self.version = version
+
+    def percentiles(self, id_user):
+        """Rang et percentile de l'athlète dans sa cohorte pour chaque métrique.
+
+        Le percentile compte les athlètes moins bons et la moitié des ex aequo
+        (rang percentile) ; le rang 1 est la meilleure valeur.
+
+        Returns:
+            dict: cohorte et résultats par métrique, ou None hors cohorte
+        """
+        with self._lock:
+            entry = self._members.get(id_user)
+            if entry is None:
+                return None
+            (gender, band), values = entry
+            metrics = {}
+            for metric, value in values.items():
+                sorted_values = self._values.get(((gender, band), metric), [])
+                if value is None:
+                    metrics[metric] = None
+                    continue
+                below = bisect_left(sorted_values, value)
+                above = len(sorted_values) - bisect_right(sorted_values, value)
+                equal = len(sorted_values) - below - above
+                metrics[metric] = {
+                    "valeur": value,
+                    "rang": above + 1,
+                    "percentile": round((below + equal / 2) / len(sorted_values) * 100, 1),
+                    "taille_cohorte": len(sorted_values),
+                }
+            return {"genre": gender, "tranche_age": band, "metriques": metrics}
+
+
+index = CohortIndex()
+
+
+def percentile(conn, id_user):
+    """Percentiles d'un athlète dans sa cohorte (fonction de lecture pour db.read).
+    """
+    index.ensure(conn)
+    return index.percentiles(id_user)
+
+
+if __name__ == "__main__":
+    # python -m app.utils.cohorts : taille des cohortes
+    from app.database import get_db_connection
+
+    conn = get_db_connection()
+    try:
+        index.ensure(conn)
+        for (cohort, metric), values in sorted(index._values.items()):
+            print(f"{cohort[0]:>8} {cohort[1]:>7} {metric:>9} : {len(values)} athlètes")
+    finally:
+        conn.close()
@@ -0,0 +1,120 @@
+import asyncio
+import itertools
+import os
+import threading
+from app.async_database import db
+from app.utils.serialization import dumps
+
+# 🔹 Flux des changements de performances (pub/sub en mémoire, par worker).
+# Les écritures publient après leur commit, depuis le thread écrivain : la
+# publication ne fait que déposer l'événement dans la boucle de chaque abonné,
+# elle n'attend jamais. Un abonné dont la file bornée déborde est déconnecté.
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "256"))  # Événements en attente par abonné
+SSE_MAX_SUBSCRIBERS = int(os.getenv("SSE_MAX_SUBSCRIBERS", "1000"))  # Abonnés simultanés par worker
+
+
+class Subscription:
+    """File bornée d'un abonné, lue dans sa boucle asyncio.
+    """
+
+    def __init__(self, broker, id_users, queue_size):
+        self.broker = broker
+        self.id_users = id_users  # None : tous les athlètes
+        self.dropped = False
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(queue_size)
+
+    def wants(self, id_user):
+        return not self.dropped and (self.id_users is None or id_user in self.id_users)
+
+    def _deliver(self, event):
+        if self.dropped:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self._drop()
+
+    def _drop(self):
+        # Consommateur trop lent : la file est vidée et None signale la déconnexion
+        self.dropped = True
+        self.broker.unsubscribe(self)
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(None)
+
+    async def get(self):
+        """Prochain événement (id, type, données JSON), ou None si l'abonné a été déconnecté.
+        """
+        return await self._queue.get()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """Abonnés du worker et publication depuis n'importe quel thread.
+    """
+
+    def __init__(self, queue_size=SSE_QUEUE_SIZE, max_subscribers=SSE_MAX_SUBSCRIBERS):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.dropped = 0
+        self._subscribers = set()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def subscribe(self, id_users=None):
+        """Nouvel abonné (à utiliser dans un bloc with, depuis la boucle asyncio).
+
+        Raises:
+            OverflowError: Nombre maximal d'abonnés atteint
+        """
+        subscription = Subscription(self, frozenset(id_users) if id_users else None, self.queue_size)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise OverflowError("Trop d'abonnés au flux")
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.discard(subscription)
+                self.dropped += subscription.dropped
+
+    def wants(self, id_user):
+        with self._lock:
+            return any(subscription.wants(id_user) for subscription in self._subscribers)
+
+    def publish(self, kind, id_user, payload):
+        """Diffuse un événement aux abonnés concernés ; le JSON est encodé une seule fois.
+        """
+        with self._lock:
+            targets = [subscription for subscription in self._subscribers if subscription.wants(id_user)]
+        if not targets:
+            return
+        event = (next(self._ids), kind, dumps({"type": kind, "id_user": id_user, **payload}))
+        for subscription in targets:
+            try:
+                subscription._loop.call_soon_threadsafe(subscription._deliver, event)
+            except RuntimeError:  # Boucle de l'abonné fermée
+                self.unsubscribe(subscription)
+
+    def __len__(self):
+        return len(self._subscribers)
+
+
+broker = Broker()
+
+
+def publish_after_commit(kind, id_user, payload):
+    """Publie l'événement après le commit de l'écriture en cours (dans une fonction passée à db.write()).
+
+    Sans abonné pour cet athlète, rien n'est programmé.
+    """
+    if broker.wants(id_user):
+        db.after_commit(lambda: broker.publish(kind, id_user, payload))
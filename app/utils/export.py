@@ -0,0 +1,261 @@
+import argparse
+import contextlib
+import csv
+import io
+import sys
+import tempfile
+import zipfile
+import numpy as np
+
+# 🔹 Export des performances (jointes aux utilisateurs et à leurs détails) :
+# lecture par blocs keyset sur id_performance, CSV découpé et Parquet par row group
+# (si pyarrow est installé) envoyés en flux, ou archive .npz de colonnes NumPy
+# (envoyée une fois toutes les lignes lues).
+EXPORT_CHUNK_SIZE = 5000  # Lignes lues par requête
+
+# (colonne, expression SQL, type)
+EXPORT_COLUMNS = [
+    ("id_performance", "p.id_performance", "int"),
+    ("id_user", "p.id_user", "int"),
+    ("username", "u.username", "text"),
+    ("nom", "u.nom", "text"),
+    ("prenom", "u.prenom", "text"),
+    ("gender", "d.gender", "text"),
+    ("age", "d.age", "float"),
+    ("weight", "d.weight", "float"),
+    ("height", "d.height", "float"),
+    ("date_performance", "p.date_performance", "datetime"),
+    ("power_max", "p.power_max", "float"),
+    ("hr_max", "p.hr_max", "float"),
+    ("vo2_max", "p.vo2_max", "float"),
+    ("rf_max", "p.rf_max", "float"),
+    ("cadence_max", "p.cadence_max", "float"),
+    ("vo2_class", "p.vo2_class", "text"),
+    ("ressenti", "p.ressenti", "float"),
+]
+COLUMN_NAMES = [name for name, _, _ in EXPORT_COLUMNS]
+FORMATS = ("csv", "parquet", "npz", "columnar")
+MEDIA_TYPES = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet", "npz": "application/zip"}
+
+
+def parquet_available():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def resolve_format(format):
+    """"columnar" désigne Parquet si pyarrow est installé, sinon .npz.
+
+    Raises:
+        ValueError: Parquet demandé sans pyarrow
+    """
+    if format == "columnar":
+        return "parquet" if parquet_available() else "npz"
+    if format == "parquet" and not parquet_available():
+        raise ValueError("Le format parquet nécessite pyarrow")
+    return format
+
+
+def iter_chunks(connection, date_from=None, date_to=None, id_users=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Génère les lignes à exporter par blocs (tuples dans l'ordre de EXPORT_COLUMNS).
+
+    `connection()` est un gestionnaire de contexte fournissant une connexion
+    pour chaque bloc : aucune transaction de lecture n'est gardée ouverte
+    pendant l'envoi, et la mémoire reste bornée par chunk_size.
+    """
+    clauses, params = ["p.id_performance > ?"], []
+    if date_from is not None:
+        clauses.append("p.date_performance >= ?")
+        params.append(date_from.strftime('%Y-%m-%d %H:%M:%S'))
+    if date_to is not None:
+        clauses.append("p.date_performance <= ?")
+        params.append(date_to.strftime('%Y-%m-%d %H:%M:%S'))
+    if id_users:
+        clauses.append(f"p.id_user IN ({', '.join('?' * len(id_users))})")
+        params.extend(id_users)
+    sql = f'''
+        SELECT {", ".join(expression for _, expression, _ in EXPORT_COLUMNS)}
+        FROM performances p
+        JOIN users u ON u.id_user = p.id_user
+        LEFT JOIN details d ON d.id_user = p.id_user
+        WHERE {" AND ".join(clauses)}
+        ORDER BY p.id_performance
+        LIMIT ?
+    '''
+    last_id = 0
+    while True:
+        with connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            rows = cursor.execute(sql, [last_id] + params + [chunk_size]).fetchall()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+        if len(rows) < chunk_size:
+            return
+
+
+class _StreamBuffer:
+    """Fichier en écriture seule dont le contenu est récupéré au fil de l'eau (pop).
+    """
+    closed = False
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def iter_csv(chunks):
+    """CSV (en-tête puis un morceau de texte par bloc).
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMN_NAMES)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _column_array(kind, values):
+    if kind == "int":
+        return np.array(values, dtype=np.int64)
+    if kind == "datetime":
+        return np.array(values, dtype="datetime64[s]")
+    return np.array(values, dtype=np.float64)  # None -> NaN
+
+
+def iter_parquet(chunks):
+    """Parquet : un row group par bloc, écrit au fil de l'eau.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {"int": pa.int64(), "float": pa.float64(), "text": pa.string(), "datetime": pa.timestamp("s")}
+    schema = pa.schema([(name, types[kind]) for name, _, kind in EXPORT_COLUMNS])
+    buffer = _StreamBuffer()
+    writer = pq.ParquetWriter(buffer, schema)
+    for rows in chunks:
+        columns = list(zip(*rows))
+        arrays = [pa.array(values, type=types[kind]) if kind == "text"
+                  else pa.array(_column_array(kind, values), type=types[kind])
+                  for (_, _, kind), values in zip(EXPORT_COLUMNS, columns)]
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+        yield buffer.pop()
+    writer.close()
+    yield buffer.pop()
+
+
+def iter_npz(chunks, copy_size=1024 * 1024):
+    """Archive .npz lisible par numpy.load : une colonne par tableau.
+
+    Les colonnes numériques sont en int64, float64 (NaN si absent) ou
+    datetime64[s] ; une colonne texte devient `<nom>.data` (octets UTF-8
+    concaténés, chaîne vide si absent) et `<nom>.offsets` (n + 1 bornes).
+    Ce format n'est pas un flux : la taille d'un .npy doit être connue avant
+    ses données, toutes les colonnes sont donc d'abord écrites dans des
+    fichiers temporaires (mémoire bornée, disque proportionnel à l'export) et
+    le premier octet n'est produit qu'après la lecture de la dernière ligne.
+    """
+    with contextlib.ExitStack() as stack:
+        spool = {}  # tableau -> (dtype, fichier temporaire)
+
+        def column_file(name, dtype):
+            if name not in spool:
+                spool[name] = (np.dtype(dtype), stack.enter_context(tempfile.TemporaryFile()))
+            return spool[name][1]
+
+        for name, _, kind in EXPORT_COLUMNS:
+            if kind == "text":
+                column_file(f"{name}.offsets", np.int64).write(np.zeros(1, dtype=np.int64).tobytes())
+        text_sizes = {name: 0 for name, _, kind in EXPORT_COLUMNS if kind == "text"}
+
+        count = 0
+        for rows in chunks:
+            count += len(rows)
+            for (name, _, kind), values in zip(EXPORT_COLUMNS, zip(*rows)):
+                if kind != "text":
+                    array = _column_array(kind, values)
+                    column_file(name, array.dtype).write(array.tobytes())
+                    continue
+                encoded = [(value or "").encode() for value in values]
+                offsets = np.cumsum([len(value) for value in encoded], dtype=np.int64) + text_sizes[name]
+                text_sizes[name] = int(offsets[-1])
+                column_file(f"{name}.data", np.uint8).write(b"".join(encoded))
+                column_file(f"{name}.offsets", np.int64).write(offsets.tobytes())
+
+        for name, _, kind in EXPORT_COLUMNS:  # Export vide : colonnes de longueur 0
+            if kind == "text":
+                column_file(f"{name}.data", np.uint8)
+            else:
+                column_file(name, "datetime64[s]" if kind == "datetime" else np.int64 if kind == "int" else np.float64)
+
+        buffer = _StreamBuffer()
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+            for name, (dtype, f) in spool.items():
+                length = f.tell() // dtype.itemsize
+                with archive.open(f"{name}.npy", "w", force_zip64=True) as entry:
+                    np.lib.format.write_array_header_1_0(entry, {
+                        "descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (length,)})
+                    f.seek(0)
+                    while block := f.read(copy_size):
+                        entry.write(block)
+                        yield buffer.pop()
+        yield buffer.pop()
+
+
+def iter_export(format, chunks):
+    """Octets de l'export dans le format demandé (csv, parquet ou npz).
+    """
+    return {"csv": iter_csv, "parquet": iter_parquet, "npz": iter_npz}[format](chunks)
+
+
+if __name__ == "__main__":
+    # python -m app.utils.export --format csv --output performances.csv [--date-from ...] [--user 1 --user 2]
+    from datetime import datetime
+    from app.database import get_db_connection
+
+    parser = argparse.ArgumentParser(description="Export des performances sans copier la base")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--output", default="-", help="fichier de sortie (- : sortie standard)")
+    parser.add_argument("--date-from", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--date-to", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--user", type=int, action="append", dest="users", help="id_user (répétable)")
+    args = parser.parse_args()
+
+    try:
+        format = resolve_format(args.format)
+    except ValueError as e:
+        parser.error(str(e))
+
+    conn = get_db_connection()
+    try:
+        chunks = iter_chunks(lambda: contextlib.nullcontext(conn), args.date_from, args.date_to, args.users)
+        with (open(args.output, "wb") if args.output != "-" else contextlib.nullcontext(sys.stdout.buffer)) as out:
+            for data in iter_export(format, chunks):
+                out.write(data)
+    finally:
+        conn.close()
@@ -0,0 +1,134 @@
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response
+from app.async_database import db
+
+# 🔹 Cache HTTP : compteurs de version par ressource (table resource_versions),
+# ETag / Last-Modified, 304 sans requête de données et cache des réponses en mémoire.
+# Les compteurs sont en base : tous les workers voient la même version.
+HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+VERSION_SQL = "SELECT version, updated_at FROM resource_versions WHERE resource = ?"
+
+
+def performances_resource(id_user):
+    return f"performances:{id_user}"
+
+
+def details_resource(id_user):
+    return f"details:{id_user}"
+
+
+def bump(cursor, *resources):
+    """Incrémente la version des ressources modifiées.
+
+    À appeler dans la transaction de l'écriture, avant le commit.
+    """
+    cursor.executemany('''
+        INSERT INTO resource_versions (resource, version, updated_at) VALUES (?, 1, CURRENT_TIMESTAMP)
+        ON CONFLICT(resource) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at
+    ''', [(resource,) for resource in resources])
+
+
+def get_version(conn, resource):
+    """Version et date de dernière modification (UTC) d'une ressource, (0, None) si jamais modifiée.
+    """
+    row = conn.execute(VERSION_SQL, (resource,)).fetchone()
+    if row is None:
+        return 0, None
+    return row["version"], datetime.strptime(row["updated_at"], "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+
+
+class ResponseCache:
+    """Cache LRU des corps de réponse, borné en octets.
+
+    Une entrée n'est servie que si elle a été produite pour la version
+    courante de sa ressource : une écriture, quel que soit le worker, la rend obsolète.
+    """
+
+    def __init__(self, max_bytes=HTTP_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()  # (ressource, variante) -> (version, corps, en-têtes)
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] != version:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1], entry[2]
+
+    def set(self, key, version, body, headers=None):
+        if len(body) > self.max_bytes // 4:
+            return  # Une seule grosse réponse ne doit pas vider le cache
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (version, body, headers or {})
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+    def __len__(self):
+        return len(self._entries)
+
+
+response_cache = ResponseCache()
+
+
+def _not_modified(request, etag, last_modified):
+    """Évalue If-None-Match, puis If-Modified-Since en son absence (RFC 9110).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        return last_modified <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+
+async def cached_response(request: Request, resource, produce, variant=""):
+    """Réponse JSON conditionnelle et mise en cache d'une ressource versionnée.
+
+    Seule la version est lue si le client a déjà la représentation (304) ou
+    si elle est en cache ; sinon `produce()` (coroutine) exécute la requête et
+    retourne (corps JSON en octets, en-têtes supplémentaires).
+    """
+    version, last_modified = await db.read(get_version, resource)
+    etag = f'W/"{version}-{zlib.crc32(variant.encode()):08x}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    key = (resource, variant)
+    cached = response_cache.get(key, version)
+    if cached is None:
+        cached = await produce()
+        response_cache.set(key, version, *cached)
+    body, extra_headers = cached
+    return Response(content=body, media_type="application/json", headers={**headers, **extra_headers})
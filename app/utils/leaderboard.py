@@ -0,0 +1,169 @@
+import os
+import sys
+
+# 🔹 Classements maintenus : top-N des performances par métrique (table leaderboard)
+METRICS = ("power_max", "vo2_max", "hr_max", "cadence_max", "rf_max")
+LEADERBOARD_SIZE = int(os.getenv("LEADERBOARD_SIZE", "100"))
+
+# Lecture d'un classement : parcours de idx_leaderboard_rank, k lignes
+TOP_SQL = '''
+    SELECT u.nom, u.prenom, p.id_performance, p.id_user, p.date_performance,
+           p.power_max, p.hr_max, p.vo2_max, p.rf_max, p.cadence_max,
+           p.vo2_class, p.ressenti
+    FROM leaderboard l
+    JOIN performances p ON p.id_performance = l.id_performance
+    JOIN users u ON u.id_user = p.id_user
+    WHERE l.metric = ?
+    ORDER BY l.value DESC, l.id_performance
+    LIMIT ?
+'''
+
+
+def _check_metric(metric):
+    if metric not in METRICS:
+        raise ValueError(f"Métrique inconnue : {metric}")
+
+
+def _fill(cursor, metric, count):
+    """Complète le classement avec les meilleures performances qui n'y sont pas encore.
+
+    Seules les performances d'un utilisateur existant sont classées, comme
+    dans top() : une ligne orpheline ne prend pas la place d'un athlète.
+    """
+    cursor.execute(f'''
+        INSERT INTO leaderboard (metric, id_performance, value)
+        SELECT ?, p.id_performance, p.{metric} FROM performances p
+        JOIN users u ON u.id_user = p.id_user
+        WHERE p.{metric} IS NOT NULL
+          AND p.id_performance NOT IN (SELECT id_performance FROM leaderboard WHERE metric = ?)
+        ORDER BY p.{metric} DESC, p.id_performance
+        LIMIT ?
+    ''', (metric, metric, count))
+
+
+def _trim(cursor, metric):
+    """Supprime les entrées classées au-delà de LEADERBOARD_SIZE.
+    """
+    cursor.execute('''
+        DELETE FROM leaderboard WHERE metric = ? AND id_performance IN (
+            SELECT id_performance FROM leaderboard WHERE metric = ?
+            ORDER BY value DESC, id_performance LIMIT -1 OFFSET ?
+        )
+    ''', (metric, metric, LEADERBOARD_SIZE))
+
+
+def record(cursor, ids):
+    """Met à jour les classements après insertion ou modification de performances.
+
+    À appeler dans la transaction de l'écriture, avant le commit.
+    """
+    ids = list(ids)
+    if not ids:
+        return
+    forget(cursor, ids, refill=False)
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        placeholders = ", ".join("?" * len(chunk))
+        for metric in METRICS:
+            count = cursor.execute("SELECT COUNT(*) FROM leaderboard WHERE metric = ?", (metric,)).fetchone()[0]
+            if count < LEADERBOARD_SIZE:
+                _fill(cursor, metric, LEADERBOARD_SIZE - count)  # Inclut les performances écrites
+                continue
+            cursor.execute(f'''
+                INSERT INTO leaderboard (metric, id_performance, value)
+                SELECT ?, p.id_performance, p.{metric} FROM performances p
+                JOIN users u ON u.id_user = p.id_user
+                WHERE p.id_performance IN ({placeholders}) AND p.{metric} IS NOT NULL
+            ''', [metric] + chunk)
+            _trim(cursor, metric)
+
+
+def forget(cursor, ids, refill=True):
+    """Retire des performances supprimées des classements et les complète.
+
+    À appeler dans la transaction de la suppression, avant le commit.
+    """
+    ids = list(ids)
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        cursor.execute(f"DELETE FROM leaderboard WHERE id_performance IN ({', '.join('?' * len(chunk))})", chunk)
+    if refill:
+        for metric in METRICS:
+            count = cursor.execute("SELECT COUNT(*) FROM leaderboard WHERE metric = ?", (metric,)).fetchone()[0]
+            if count < LEADERBOARD_SIZE:
+                _fill(cursor, metric, LEADERBOARD_SIZE - count)
+
+
+def forget_user(cursor, id_user):
+    """Retire des classements les performances d'un utilisateur supprimé et les complète.
+
+    À appeler dans la transaction de la suppression, après le DELETE de l'utilisateur.
+    """
+    ids = [row[0] for row in cursor.execute('''
+        SELECT DISTINCT l.id_performance FROM leaderboard l
+        JOIN performances p ON p.id_performance = l.id_performance
+        WHERE p.id_user = ?
+    ''', (id_user,))]
+    if ids:
+        forget(cursor, ids)
+
+
+def populate(conn):
+    """Recalcule tous les classements depuis la table performances, sans commit.
+    """
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM leaderboard")
+    for metric in METRICS:
+        _fill(cursor, metric, LEADERBOARD_SIZE)
+
+
+def rebuild(conn):
+    """Reconstruit tous les classements (démarrage à froid, après un chargement en masse).
+    """
+    populate(conn)
+    conn.commit()
+
+
+def top(conn, metric, limit=1):
+    """Les `limit` meilleures performances d'une métrique, lues dans le classement (O(k)).
+    """
+    _check_metric(metric)
+    return conn.execute(TOP_SQL, (metric, min(limit, LEADERBOARD_SIZE))).fetchall()
+
+
+def check(conn, limit=10):
+    """Compare chaque classement avec la requête de parcours complet.
+
+    Returns:
+        dict: métrique -> (valeurs du classement, valeurs attendues) pour les écarts
+    """
+    mismatches = {}
+    for metric in METRICS:
+        expected = [row[0] for row in conn.execute(f'''
+            SELECT p.{metric} FROM performances p JOIN users u ON p.id_user = u.id_user
+            WHERE p.{metric} IS NOT NULL
+            ORDER BY p.{metric} DESC LIMIT ?
+        ''', (limit,))]
+        actual = [row[metric] for row in top(conn, metric, limit)]
+        if actual != expected:
+            mismatches[metric] = (actual, expected)
+    return mismatches
+
+
+if __name__ == "__main__":
+    # python -m app.utils.leaderboard [rebuild | check]
+    from app.database import get_db_connection
+
+    conn = get_db_connection()
+    try:
+        if "rebuild" in sys.argv:
+            rebuild(conn)
+            print(f"✅ Classements reconstruits ({LEADERBOARD_SIZE} entrées max par métrique)")
+        mismatches = check(conn)
+        for metric, (actual, expected) in mismatches.items():
+            print(f"❌ {metric} : classement {actual} != parcours complet {expected}")
+        if mismatches:
+            sys.exit(1)
+        print("✅ Classements cohérents avec la table performances")
+    finally:
+        conn.close()
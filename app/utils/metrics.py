@@ -0,0 +1,282 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from functools import lru_cache
+
+# 🔹 Métriques au format texte Prometheus : latence par route (middleware ASGI)
+# et temps / lignes de chaque requête SQL (connexion instrumentée).
+# Désactivées par défaut : ni middleware ni connexion instrumentée, aucun surcoût.
+# Les valeurs sont propres à chaque processus (un worker uvicorn = une cible à collecter).
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SQL_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 5)
+SQL_STATEMENT_MAX_LENGTH = 200  # Libellé de requête tronqué au-delà
+
+_registry = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}  # Valeurs des libellés -> valeur
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+                                 for key, value in items]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, labels=(), value=0):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Histogram(_Metric):
+    """Histogramme à seuils fixes : une observation coûte une bissection et trois additions.
+    """
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=HTTP_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, labels, value):
+        index = bisect_left(self.buckets, value)  # Premier seuil >= value
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items())
+        lines = self._header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+def render():
+    """Toutes les métriques enregistrées, au format texte Prometheus.
+    """
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# 🔹 Requêtes HTTP
+http_requests = Counter("http_requests_total", "Requêtes HTTP traitées", ("method", "route", "status"))
+http_duration = Histogram("http_request_duration_seconds", "Durée des requêtes HTTP, corps envoyé compris",
+                          ("method", "route"), HTTP_BUCKETS)
+http_in_progress = Gauge("http_requests_in_progress", "Requêtes HTTP en cours")
+
+
+def _route_template(scope):
+    """Gabarit complet de la route appelée, préfixe d'inclusion compris.
+
+    Selon la version de FastAPI, route.path d'une route incluse contient ou non
+    le préfixe du router : il est repris du chemin reçu (autant de segments en
+    moins que le gabarit en compte).
+    """
+    template = getattr(scope.get("route"), "path", None)
+    if template is None:
+        return "<unmatched>"
+    return scope["path"].rsplit("/", template.count("/"))[0] + template
+
+
+class MetricsMiddleware:
+    """Middleware ASGI : durée, statut et requêtes en cours par route.
+
+    La route est le gabarit FastAPI (/performance/{id_user}) et non le chemin
+    reçu, pour borner le nombre de séries ; les chemins inconnus sont regroupés.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_progress.inc(amount=-1)
+            route = _route_template(scope)
+            http_duration.observe((scope["method"], route), elapsed)
+            http_requests.inc((scope["method"], route, str(status_code)))
+
+
+# 🔹 Requêtes SQL
+sql_duration = Histogram("sql_statement_duration_seconds",
+                         "Durée d'exécution des requêtes SQL (préparation et première ligne pour un SELECT)",
+                         ("statement",), SQL_BUCKETS)
+sql_fetch_seconds = Counter("sql_fetch_seconds_total", "Temps passé à lire les lignes des SELECT", ("statement",))
+sql_rows = Counter("sql_rows_total", "Lignes lues (SELECT) ou modifiées (INSERT, UPDATE, DELETE)", ("statement",))
+sql_errors = Counter("sql_errors_total", "Requêtes SQL en erreur", ("statement",))
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_TUPLE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")  # (?, ?, ?) : listes IN, lignes VALUES
+_REPEATED_TUPLES = re.compile(r"\(\?, …\)(?:\s*,\s*\(\?, …\))+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_statement(sql):
+    """Libellé stable d'une requête : littéraux remplacés par ?, listes de
+    paramètres de longueur variable repliées, espaces réduits.
+    """
+    statement = " ".join(sql.split())
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    statement = _PLACEHOLDER_TUPLE.sub("(?, …)", statement)
+    statement = _REPEATED_TUPLES.sub("(?, …), …", statement)
+    if len(statement) > SQL_STATEMENT_MAX_LENGTH:
+        statement = statement[:SQL_STATEMENT_MAX_LENGTH - 1] + "…"
+    return statement
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Curseur qui mesure chaque requête et compte ses lignes.
+
+    Un SELECT n'est lu qu'au fil des fetch : le temps de lecture des lignes
+    est compté à part (sql_fetch_seconds_total) sous le libellé de la requête.
+    """
+    _statement = None
+
+    def _run(self, method, sql, *args):
+        statement = self._statement = (normalize_statement(sql),)
+        started = time.perf_counter()
+        try:
+            result = method(sql, *args)
+        except Exception:
+            sql_errors.inc(statement)
+            raise
+        finally:
+            sql_duration.observe(statement, time.perf_counter() - started)
+        if self.rowcount > 0:
+            sql_rows.inc(statement, self.rowcount)
+        return result
+
+    def execute(self, sql, parameters=()):
+        return self._run(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._run(super().executemany, sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self._run(super().executescript, sql_script)
+
+    def _fetch(self, method, *args):
+        started = time.perf_counter()
+        rows = method(*args)
+        if self._statement is not None:
+            sql_fetch_seconds.inc(self._statement, time.perf_counter() - started)
+            count = len(rows) if isinstance(rows, list) else int(rows is not None)
+            if count:
+                sql_rows.inc(self._statement, count)
+        return rows
+
+    def fetchone(self):
+        return self._fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._fetch(super().fetchmany, self.arraysize if size is None else size)
+
+    def fetchall(self):
+        return self._fetch(super().fetchall)
+
+    def __next__(self):
+        row = self._fetch(super().fetchone)
+        if row is None:
+            raise StopIteration
+        return row
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connexion dont tous les curseurs (y compris ceux de conn.execute) sont instrumentés.
+    """
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+# Classe de connexion passée à sqlite3.connect
+CONNECTION_FACTORY = InstrumentedConnection if METRICS_ENABLED else sqlite3.Connection
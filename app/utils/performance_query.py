@@ -0,0 +1,291 @@
+import base64
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+
+# 🔹 Requêtes d'analyse sur performances : filtres (athlètes, dates, bornes par
+# métrique), tri, projection et pagination keyset, traduits en une requête SQL
+# paramétrée. Le plan (EXPLAIN QUERY PLAN, mis en cache par forme de requête)
+# est vérifié avant l'exécution : un parcours complet ou une estimation au-delà
+# de QUERY_MAX_ROWS lignes examinées est refusé au lieu d'être exécuté.
+QUERY_MAX_ROWS = int(os.getenv("PERFORMANCE_QUERY_MAX_ROWS", "100000"))  # Lignes examinées max (estimation)
+QUERY_MAX_ATHLETES = int(os.getenv("PERFORMANCE_QUERY_MAX_ATHLETES", "500"))  # Athlètes par requête
+QUERY_MAX_LIMIT = 1000  # Lignes renvoyées par page
+PLAN_CACHE_SIZE = 256  # Formes de requête dont le plan est gardé en mémoire
+RANGE_SELECTIVITY = 4  # Réduction estimée par borne d'intervalle (heuristique de SQLite sans stat4)
+DEFAULT_ROWS_PER_KEY = 10  # Lignes par valeur d'index sans statistiques (valeur par défaut de SQLite)
+
+# Colonnes projetables, dans l'ordre par défaut
+COLUMNS = ("id_performance", "id_user", "date_performance", "power_max", "hr_max", "vo2_max", "rf_max",
+           "cadence_max", "vo2_class", "vo2_class_low", "vo2_class_high", "ressenti")
+# Colonnes filtrables par intervalle et clés de tri
+RANGE_COLUMNS = ("power_max", "hr_max", "vo2_max", "rf_max", "cadence_max", "ressenti",
+                 "vo2_class_low", "vo2_class_high")
+SORT_COLUMNS = ("date_performance",) + RANGE_COLUMNS
+# Colonnes d'un index mono-colonne sur tous les athlètes (idx_performances_power, idx_performances_vo2)
+GLOBAL_INDEXED = ("power_max", "vo2_max")
+
+# "SEARCH performances ..." (SQLite >= 3.36) ou "SEARCH TABLE performances ..." (versions antérieures)
+_PLAN_LINE = re.compile(r"^(SCAN|SEARCH) (?:TABLE )?performances(?: USING (?:COVERING )?INDEX (\w+)| USING INTEGER PRIMARY KEY)?"
+                        r"(?: \((.*)\))?")
+
+
+class QueryRejected(ValueError):
+    """Requête refusée : plan sans index ou trop de lignes à examiner.
+    """
+
+    def __init__(self, message, cost):
+        super().__init__(message)
+        self.cost = cost
+
+
+def encode_cursor(value, id_performance):
+    return base64.urlsafe_b64encode(json.dumps([value, id_performance]).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """(valeur de la clé de tri, id_performance) d'un curseur.
+
+    Raises:
+        ValueError: Curseur invalide
+    """
+    try:
+        value, id_performance = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return value, int(id_performance)
+    except (ValueError, TypeError):
+        raise ValueError("Curseur invalide")
+
+
+def _sort_key(query):
+    """(colonne de tri, ordre décroissant) d'une PerformanceQuery.
+    """
+    return query.sort.lstrip("-"), query.sort.startswith("-")
+
+
+def _may_be_null(query):
+    """True si des lignes sans valeur pour la clé de tri peuvent correspondre aux filtres.
+    """
+    sort, _ = _sort_key(query)
+    bounds = query.ranges.get(sort)
+    bounded = bounds is not None and (bounds.min is not None or bounds.max is not None)
+    return sort != "date_performance" and not bounded
+
+
+def build(query, id_users, nulls=False, limit=None):
+    """Requête SQL paramétrée d'une PerformanceQuery.
+
+    `id_users` est la liste des athlètes autorisés, ou None pour tous. La clé
+    de tri et id_performance sont ajoutés en fin de projection (curseur).
+    Une clé de tri nullable est lue en deux temps (NULLS LAST) : les lignes
+    avec valeur dans l'ordre de la clé, puis, avec nulls=True, les lignes
+    sans valeur dans l'ordre de id_performance. Un curseur dont la valeur est
+    null désigne une position dans cette seconde partie.
+
+    Raises:
+        ValueError: Colonne, tri, limite ou curseur invalide
+
+    Returns:
+        tuple: (sql, paramètres, colonnes projetées)
+    """
+    fields = list(dict.fromkeys(query.fields or COLUMNS))
+    unknown = [field for field in fields if field not in COLUMNS]
+    unknown += [column for column in query.ranges if column not in RANGE_COLUMNS]
+    if unknown:
+        raise ValueError(f"Colonnes inconnues : {', '.join(unknown)}")
+    sort, descending = _sort_key(query)
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f"Tri possible sur : {', '.join(SORT_COLUMNS)}")
+    if not 1 <= query.limit <= QUERY_MAX_LIMIT:
+        raise ValueError(f"limit doit être compris entre 1 et {QUERY_MAX_LIMIT}")
+
+    # Avec une liste d'athlètes, le + unaire écarte les index mono-colonne : le planificateur
+    # reste sur les index (id_user, ...) au lieu de parcourir les valeurs de tous les athlètes
+    def ref(column):
+        return f"+{column}" if id_users is not None and column in GLOBAL_INDEXED else column
+
+    clauses, params = [], []
+    if id_users is not None:
+        # Liste passée en un seul paramètre : une seule forme de requête, quel que soit le nombre d'athlètes
+        clauses.append("id_user IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps(id_users))
+    if query.date_from is not None:
+        clauses.append("date_performance >= ?")
+        params.append(query.date_from.strftime('%Y-%m-%d %H:%M:%S'))
+    if query.date_to is not None:
+        clauses.append("date_performance <= ?")
+        params.append(query.date_to.strftime('%Y-%m-%d %H:%M:%S'))
+    for column, bounds in query.ranges.items():
+        if bounds.min is not None:
+            clauses.append(f"{ref(column)} >= ?")
+            params.append(bounds.min)
+        if bounds.max is not None:
+            clauses.append(f"{ref(column)} <= ?")
+            params.append(bounds.max)
+    if sort != "date_performance":
+        # Comparaison keyset impossible sur NULL : lignes sans valeur lues à part
+        clauses.append(f"{sort} IS NULL" if nulls else f"{sort} IS NOT NULL")
+    comparison = "<" if descending else ">"
+    if query.cursor:
+        value, id_performance = decode_cursor(query.cursor)
+        if not nulls:
+            clauses.append(f"({ref(sort)}, id_performance) {comparison} (?, ?)")
+            params.extend((value, id_performance))
+        elif value is None:
+            clauses.append(f"id_performance {comparison} ?")
+            params.append(id_performance)
+
+    direction = " DESC" if descending else ""
+    sql = f"SELECT {', '.join(fields)}, {sort}, id_performance FROM performances"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    order = f"id_performance{direction}" if nulls else f"{ref(sort)}{direction}, id_performance{direction}"
+    sql += f" ORDER BY {order} LIMIT ?"
+    params.append(query.limit + 1 if limit is None else limit)  # Une ligne de plus : reste-t-il une page ?
+    return sql, params, fields
+
+
+class Planner:
+    """Plans des formes de requête et estimation des lignes examinées.
+
+    Le plan ne dépend que du texte SQL (paramètres liés) : il est mis en cache
+    par worker ; seules les statistiques (sqlite_stat1) sont relues à chaque appel.
+    """
+
+    def __init__(self, max_rows=QUERY_MAX_ROWS, cache_size=PLAN_CACHE_SIZE):
+        self.max_rows = max_rows
+        self.cache_size = cache_size
+        self._plans = {}
+        self._lock = threading.Lock()
+
+    def plan(self, conn, sql, params):
+        with self._lock:
+            plan = self._plans.get(sql)
+        if plan is None:
+            plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+            with self._lock:
+                if len(self._plans) >= self.cache_size:
+                    self._plans.clear()
+                self._plans[sql] = plan
+        return plan
+
+    @staticmethod
+    def _table_rows(conn, stats):
+        if stats:
+            return max(stat[0] for stat in stats.values() if stat)  # Un index partiel compte moins de lignes
+        # Sans ANALYZE : id_performance croissant, MAX() est lu au bout de l'index primaire
+        return conn.execute("SELECT MAX(id_performance) FROM performances").fetchone()[0] or 0
+
+    def estimate(self, conn, plan, keys=1):
+        """Coût estimé : lignes de performances examinées d'après le plan et sqlite_stat1.
+
+        Args:
+            keys (int): Valeurs de la liste IN (athlètes) pour une recherche sur id_user
+
+        Returns:
+            dict: {"lignes_examinees", "index", "parcours_complet", "tri_temporaire", "plan"}
+        """
+        try:
+            stats = {index: [int(value) for value in stat.split()[:8] if value.isdigit()]
+                     for index, stat in conn.execute("SELECT idx, stat FROM sqlite_stat1 WHERE tbl = 'performances'")
+                     if index}
+        except sqlite3.OperationalError:  # Base jamais analysée : pas de table sqlite_stat1
+            stats = {}
+        table_rows = self._table_rows(conn, stats)
+
+        rows, index, full_scan = table_rows, None, True
+        for line in plan:
+            match = _PLAN_LINE.match(line)
+            if match is None:
+                continue
+            kind, index, constraints = match.groups()
+            full_scan = kind == "SCAN"
+            if full_scan:
+                rows = table_rows
+                break
+            # "ANY(col)" (saut de préfixe d'index) ne réduit rien : toutes les valeurs de col sont parcourues
+            terms = constraints.split(" AND ") if constraints else []
+            equalities = sum(1 for term in terms if term.endswith("=?"))
+            ranges = sum(1 for term in terms if "<" in term or ">" in term)
+            stat = stats.get(index)
+            if equalities == 0:
+                rows = table_rows
+            elif stat and len(stat) > equalities:
+                rows = stat[equalities]
+            else:
+                rows = DEFAULT_ROWS_PER_KEY
+            if terms and terms[0].startswith("id_user="):
+                rows *= max(keys, 1)
+            rows = max(rows // RANGE_SELECTIVITY ** ranges, 1) if ranges else rows
+            break
+        return {"lignes_examinees": min(rows, table_rows), "index": index, "parcours_complet": full_scan,
+                "tri_temporaire": any("TEMP B-TREE" in line for line in plan), "plan": plan}
+
+    def check(self, conn, sql, params, keys=1):
+        """Plan et coût d'une requête ; refuse les parcours non bornés des grandes tables.
+
+        Raises:
+            QueryRejected: Parcours complet ou estimation au-delà de max_rows
+
+        Returns:
+            dict: Coût estimé (voir estimate)
+        """
+        cost = self.estimate(conn, self.plan(conn, sql, params), keys)
+        if cost["lignes_examinees"] > self.max_rows:
+            reason = ("parcours complet de la table" if cost["parcours_complet"]
+                      else f"environ {cost['lignes_examinees']} lignes à examiner")
+            raise QueryRejected(f"Requête refusée ({reason}, maximum {self.max_rows}) : "
+                                "limitez les athlètes ou resserrez les bornes", cost)
+        return cost
+
+
+planner = Planner()
+
+
+def run(conn, query, id_users):
+    """Exécute une PerformanceQuery (fonction de lecture pour db.read).
+
+    Raises:
+        ValueError: Requête invalide
+        QueryRejected: Plan non borné
+
+    Returns:
+        dict: {"colonnes", "lignes" (listes), "curseur_suivant", "cout"}
+    """
+    keys = len(id_users) if id_users is not None else 1
+    phases = []
+    if not query.cursor or decode_cursor(query.cursor)[0] is not None:
+        phases.append(False)  # Lignes avec valeur (ordre de la clé de tri)
+    if _may_be_null(query):
+        phases.append(True)  # Puis lignes sans valeur (NULLS LAST)
+
+    rows, cost = [], None
+    for nulls in phases:
+        sql, params, fields = build(query, id_users, nulls, query.limit + 1 - len(rows))
+        phase_cost = planner.check(conn, sql, params, keys)
+        phase_cost["sql"] = sql
+        if cost is None:
+            cost = phase_cost
+        else:
+            cost["valeurs_nulles"] = phase_cost
+        rows.extend(conn.execute(sql, params).fetchall())
+        if len(rows) > query.limit:
+            break
+    if cost is None:  # Curseur invalide pour ce tri (valeur nulle sur une clé non nullable)
+        raise ValueError("Curseur invalide")
+
+    next_cursor = None
+    if len(rows) > query.limit:
+        rows = rows[:query.limit]
+        next_cursor = encode_cursor(rows[-1][-2], rows[-1][-1])
+    dates = [i for i, field in enumerate(fields) if field == "date_performance"]
+    lines = []
+    for row in rows:
+        line = list(row[:len(fields)])
+        for i in dates:
+            if line[i] is not None:
+                line[i] = datetime.fromisoformat(line[i])
+        lines.append(line)
+    return {"colonnes": fields, "lignes": lines, "curseur_suivant": next_cursor, "cout": cost}
@@ -0,0 +1,129 @@
+import os
+import numpy as np
+
+# 🔹 Séries temporelles brutes des séances (puissance, FC, VO2, FR, cadence) :
+# une ligne de performance_samples par (performance, essai, canal), valeurs
+# en float32 little-endian dans un BLOB. Résumés (min, max, moyenne) calculés
+# en NumPy à l'ingestion ; les lectures de plage ne lisent que les octets
+# demandés (blobopen) et les exposent sans copie (np.frombuffer).
+DTYPE = np.dtype("<f4")
+
+# Canal -> colonne de la table performances (maximum de la séance)
+MAX_COLUMNS = {"power": "power_max", "hr": "hr_max", "vo2": "vo2_max", "rf": "rf_max", "cadence": "cadence_max"}
+
+# Lectures servies par ux_performance_samples (id_performance, trial, channel)
+LIST_SQL = '''
+    SELECT trial, channel, sample_count, min_value, max_value, mean_value
+    FROM performance_samples WHERE id_performance = ? ORDER BY trial, channel
+'''
+RANGE_SQL = '''
+    SELECT id_sample, sample_count FROM performance_samples
+    WHERE id_performance = ? AND trial = ? AND channel = ?
+'''
+
+
+def _has_header(line):
+    return any(char.isalpha() for char in line)
+
+
+def read_trial_csv(path, columns):
+    """Colonnes d'un CSV d'essai en tableaux float32 (cellules vides -> NaN).
+
+    Les noms de colonnes viennent de l'en-tête s'il existe, sinon de `columns`
+    (champ "input" de l'entrée JSON).
+
+    Returns:
+        dict: canal -> np.ndarray
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        first = f.readline()
+        header = _has_header(first)
+        names = [name.strip().lower() for name in first.split(",")] if header else list(columns)
+        f.seek(0)
+        data = np.genfromtxt(f, delimiter=",", skip_header=1 if header else 0, dtype=np.float64, ndmin=2)
+    return {name: np.ascontiguousarray(data[:, i], dtype=DTYPE)
+            for i, name in enumerate(names) if name and i < data.shape[1]}
+
+
+def entry_trials(entry, json_dir):
+    """Essais d'une entrée sbj_N.json dont le CSV est présent à côté du fichier JSON.
+
+    Returns:
+        dict: essai (nom du CSV sans préfixe ni extension) -> {canal: np.ndarray}
+    """
+    prefix = f"{entry.get('name', '')}_"
+    file_names = dict.fromkeys(name for key, names in entry.items()
+                               if key.startswith("csv_trial") for name in names)
+    trials = {}
+    for file_name in file_names:
+        path = os.path.join(json_dir, file_name)
+        if os.path.exists(path):
+            trial = os.path.splitext(file_name)[0]
+            trials[trial[len(prefix):] if trial.startswith(prefix) else trial] = \
+                read_trial_csv(path, entry.get("input", ()))
+    return trials
+
+
+def summarize(values):
+    """(nombre, min, max, moyenne) d'un canal, NaN ignorés.
+    """
+    measured = values[~np.isnan(values)]
+    if measured.size == 0:
+        return len(values), None, None, None
+    return len(values), float(measured.min()), float(measured.max()), float(measured.mean(dtype=np.float64))
+
+
+def session_maxima(trials):
+    """Maximum de chaque canal sur tous les essais, par colonne de performances.
+    """
+    maxima = {}
+    for channels in trials.values():
+        for channel, values in channels.items():
+            column = MAX_COLUMNS.get(channel)
+            maximum = summarize(values)[2] if column else None
+            if maximum is not None and (maxima.get(column) is None or maximum > maxima[column]):
+                maxima[column] = maximum
+    return maxima
+
+
+def store(cursor, id_performance, trials):
+    """Enregistre les essais d'une performance, sans commit.
+
+    Les tableaux float32 sont liés tels quels (protocole buffer) : pas de copie en bytes.
+    """
+    cursor.executemany('''
+        INSERT INTO performance_samples
+            (id_performance, trial, channel, sample_count, min_value, max_value, mean_value, data)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(id_performance, trial, channel) DO UPDATE SET
+            sample_count = excluded.sample_count, min_value = excluded.min_value,
+            max_value = excluded.max_value, mean_value = excluded.mean_value, data = excluded.data
+    ''', [(id_performance, trial, channel, *summarize(values), memoryview(values.astype(DTYPE, copy=False)))
+          for trial, channels in trials.items() for channel, values in channels.items()])
+
+
+def list_samples(conn, id_performance):
+    """Essais et canaux d'une performance avec leurs résumés (sans les données).
+    """
+    return conn.execute(LIST_SQL, (id_performance,)).fetchall()
+
+
+def read_range(conn, id_performance, trial, channel, start=0, stop=None):
+    """Valeurs [start, stop[ d'un canal, lues directement dans le BLOB.
+
+    Seuls les octets de la plage sont lus (E/S incrémentale du BLOB) et le
+    tableau renvoyé est une vue en lecture seule sur ces octets.
+
+    Returns:
+        np.ndarray: float32, ou None si le canal n'existe pas
+    """
+    row = conn.execute(RANGE_SQL, (id_performance, trial, channel)).fetchone()
+    if row is None:
+        return None
+    id_sample, count = row
+    start, stop, _ = slice(start, stop).indices(count)
+    if stop <= start:
+        return np.empty(0, dtype=DTYPE)
+    with conn.blobopen("performance_samples", "data", id_sample, readonly=True) as blob:
+        blob.seek(start * DTYPE.itemsize)
+        return np.frombuffer(blob.read((stop - start) * DTYPE.itemsize), dtype=DTYPE)
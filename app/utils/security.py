@@ -1,11 +1,16 @@
+import asyncio
+import hmac
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
 from dotenv import load_dotenv
 import bcrypt
 import jwt
 from datetime import datetime, timedelta
 
 # Charger les variables d'environnement à partir du fichier .env
-load_dotenv("app\.env")
+# (cherché depuis ce dossier vers la racine du projet : app/.env ou .env)
+load_dotenv()
 
 # Récupérer la clé secrète à partir des variables d'environnement
 SECRET_KEY = os.getenv("SECRET_KEY")
@@ -14,15 +19,92 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 if not SECRET_KEY:
     raise ValueError("SECRET_KEY is not set in the .env file")
 
+# 🔹 Coût bcrypt et nombre de processus dédiés au hachage
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+
 def hash_password(password: str) -> str:
     """_hash_password
     """
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
 
 def verify_password(password: str, hashed_password: str) -> bool:
     """verify_password
+        output: False si le hash stocké n'est pas un hash bcrypt valide
+    """
+    try:
+        return bcrypt.checkpw(password.encode(), hashed_password.encode())
+    except ValueError:
+        return False
+
+def needs_rehash(hashed_password: str) -> bool:
+    """needs_rehash
+        output: True si le hash n'a pas été calculé avec BCRYPT_ROUNDS ($2b$<coût>$...)
+    """
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+def rehash_if_changed(password: str, hashed_password: str) -> str:
+    """rehash_if_changed
+        output: hash à stocker pour password, en une seule exécution de bcrypt
+        - hashed_password tel quel s'il correspond déjà à password
+        - sinon le hash de password avec le sel et le coût de hashed_password
+        - un hash avec un nouveau sel si le coût stocké n'est plus BCRYPT_ROUNDS
     """
-    return bcrypt.checkpw(password.encode(), hashed_password.encode())
+    if needs_rehash(hashed_password):
+        return hash_password(password)
+    stored = hashed_password.encode()
+    try:
+        candidate = bcrypt.hashpw(password.encode(), stored[:29])  # "$2b$<coût>$" + sel de 22 caractères
+    except ValueError:  # Hash stocké invalide
+        return hash_password(password)
+    return hashed_password if hmac.compare_digest(candidate, stored) else candidate.decode()
+
+# 🔹 bcrypt occupe un cœur pendant tout le calcul : les routes l'exécutent dans
+# un pool de processus borné pour ne bloquer ni la boucle d'événements ni les autres requêtes.
+# Le pool est créé à la première requête, quand les threads de la base tournent déjà :
+# ses processus ne sont jamais issus d'un fork de ce processus multithreadé (verrous hérités)
+_HASH_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+_hash_executor = None
+
+def _get_hash_executor():
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ProcessPoolExecutor(PASSWORD_HASH_WORKERS,
+                                             mp_context=multiprocessing.get_context(_HASH_START_METHOD))
+    return _hash_executor
+
+async def hash_password_async(password: str) -> str:
+    """hash_password exécuté dans le pool de processus
+    """
+    return await asyncio.get_running_loop().run_in_executor(_get_hash_executor(), hash_password, password)
+
+async def hash_passwords_async(passwords) -> list:
+    """Hache plusieurs mots de passe en parallèle, dans l'ordre fourni
+    """
+    return list(await asyncio.gather(*(hash_password_async(password) for password in passwords)))
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    """verify_password exécuté dans le pool de processus
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        _get_hash_executor(), verify_password, password, hashed_password)
+
+async def rehash_if_changed_async(password: str, hashed_password: str) -> str:
+    """rehash_if_changed exécuté dans le pool de processus
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        _get_hash_executor(), rehash_if_changed, password, hashed_password)
+
+def shutdown_hash_executor():
+    """Arrête les processus de hachage (arrêt de l'application)
+    """
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=True)
+        _hash_executor = None
 
 def generate_token(username: str) -> str:
     """generate_token
@@ -35,4 +117,15 @@ def generate_token(username: str) -> str:
         "exp": expiration,
     }
     token = jwt.encode(payload, SECRET_KEY, algorithm="HS256")
-    return token
\ No newline at end of file
+    return token
+
+def decode_token(token: str):
+    """decode_token
+        input: token
+        output: payload si la signature est valide, sinon None
+        (exp n'est pas vérifié : aucune route ne renouvelle encore les tokens)
+    """
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=["HS256"], options={"verify_exp": False})
+    except jwt.InvalidTokenError:
+        return None
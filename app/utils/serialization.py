@@ -0,0 +1,122 @@
+import json
+from datetime import datetime
+from json.encoder import encode_basestring
+from typing import get_args
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # Repli sur le module json de la bibliothèque standard
+    orjson = None
+
+# 🔹 Sérialisation directe des lignes SQLite : les lignes lues en base sont
+# déjà conformes aux modèles de réponse, elles sont encodées en JSON sans
+# passer par sqlite3.Row -> dict -> validation pydantic -> modèle -> JSON.
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Type non sérialisable : {type(value).__name__}")
+
+
+def dumps(value):
+    """JSON compact en octets (orjson s'il est installé).
+    """
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=_default).encode()
+
+
+def dumps_array(values):
+    """Tableau NumPy en liste JSON ; orjson encode les float32 sans passer par des objets Python.
+    """
+    if orjson is not None:
+        return orjson.dumps(values, option=orjson.OPT_SERIALIZE_NUMPY)
+    return dumps(values.tolist())
+
+
+def json_response(body, status_code=200, headers=None):
+    """Réponse JSON déjà encodée : FastAPI la renvoie telle quelle, sans revalider response_model.
+    """
+    return Response(content=body, status_code=status_code, headers=headers, media_type="application/json")
+
+
+def _dumps_text(values):
+    if orjson is not None:
+        return orjson.dumps(values).decode()
+    return json.dumps(values, separators=(",", ":"))
+
+
+def _encode_scalars(column):
+    # Nombres, booléens et null ne contiennent jamais de virgule : la colonne
+    # est encodée en un seul appel, puis découpée en valeurs
+    return _dumps_text(column)[1:-1].split(",")
+
+
+def _encode_strings(column):
+    return ["null" if value is None else encode_basestring(value) for value in column]
+
+
+def _isoformat(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if len(value) == 19 and value[10] == " ":  # "YYYY-MM-DD HH:MM:SS", format écrit par les routes
+        return f"{value[:10]}T{value[11:]}"
+    return datetime.fromisoformat(value).isoformat()
+
+
+def _encode_datetimes(column):
+    return ["null" if value is None else f'"{_isoformat(value)}"' for value in column]
+
+
+class RowEncoder:
+    """Encode les lignes d'une requête au format JSON d'un modèle de réponse.
+
+    Les lignes doivent sélectionner `columns` (les champs du modèle, dans
+    l'ordre) : le JSON produit est identique à celui de pydantic, sans
+    validation ni construction de modèle. Les lignes sont encodées colonne
+    par colonne puis assemblées dans un gabarit précompilé
+    ({"champ":%s,...}) : aucun dict n'est créé par ligne.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.fields = tuple(model.model_fields)
+        self.columns = ", ".join(self.fields)
+        self._datetimes = tuple(name for name, field in model.model_fields.items()
+                                if datetime in (field.annotation, *get_args(field.annotation)))
+        self._encoders = tuple(
+            _encode_datetimes if name in self._datetimes
+            else _encode_strings if str in (field.annotation, *get_args(field.annotation))
+            else _encode_scalars
+            for name, field in model.model_fields.items())
+        self._template = "{" + ",".join(f"{encode_basestring(name)}:%s" for name in self.fields) + "}"
+
+    def _objects(self, rows):
+        """Objet JSON (texte) de chaque ligne.
+        """
+        if not rows:
+            return []
+        columns = [encode(column) for encode, column in zip(self._encoders, zip(*rows))]
+        return [self._template % values for values in zip(*columns)]
+
+    def values(self, row):
+        """Dict d'une ligne, pour l'inclure dans un autre document (événements).
+        """
+        values = dict(zip(self.fields, row))
+        for name in self._datetimes:
+            if isinstance(values[name], str):
+                values[name] = datetime.fromisoformat(values[name])
+        return values
+
+    def one(self, row):
+        return self._objects([row])[0].encode()
+
+    def many(self, rows):
+        return f"[{','.join(self._objects(rows))}]".encode()
+
+    def lines(self, rows):
+        """NDJSON : une ligne JSON par ligne SQL.
+        """
+        return "".join(f"{line}\n" for line in self._objects(rows)).encode()
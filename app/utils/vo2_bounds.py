@@ -0,0 +1,63 @@
+import re
+import sys
+from functools import lru_cache
+
+# 🔹 Classe VO2 normalisée : le texte libre de performances.vo2_class ("[74, 88]"
+# écrit par extraction.py, "74-88" saisi dans l'API...) est décomposé en deux
+# colonnes typées vo2_class_low / vo2_class_high, indexées avec id_user, pour
+# filtrer en SQL sans relire ni parser chaque ligne en Python.
+BACKFILL_BATCH = 10000  # Lignes converties par lot lors de la migration
+
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+
+@lru_cache(maxsize=4096)
+def parse(text):
+    """Bornes (basse, haute) d'une classe VO2, ou (None, None) si le texte n'en contient pas.
+
+    Les deux premiers nombres du texte sont les bornes ; un seul nombre donne
+    une classe réduite à cette valeur.
+    """
+    if not text:
+        return None, None
+    numbers = [float(number) for number in _NUMBER.findall(text)[:2]]
+    if not numbers:
+        return None, None
+    return min(numbers), max(numbers)
+
+
+def backfill(conn, batch=BACKFILL_BATCH):
+    """Remplit vo2_class_low / vo2_class_high des lignes existantes, par lots keyset sur id_performance.
+
+    La mémoire reste bornée à un lot ; la transaction est celle de l'appelant.
+
+    Returns:
+        int: lignes converties
+    """
+    converted = 0
+    last = 0
+    while True:
+        rows = conn.execute('''
+            SELECT id_performance, vo2_class FROM performances
+            WHERE id_performance > ? AND vo2_class IS NOT NULL
+            ORDER BY id_performance LIMIT ?
+        ''', (last, batch)).fetchall()
+        if not rows:
+            return converted
+        conn.executemany("UPDATE performances SET vo2_class_low = ?, vo2_class_high = ? WHERE id_performance = ?",
+                         [(*parse(text), id_performance) for id_performance, text in rows])
+        converted += len(rows)
+        last = rows[-1][0]
+
+
+if __name__ == "__main__":
+    # python -m app.utils.vo2_bounds : reconvertit toutes les classes (après un import SQL direct)
+    from app.database import get_db_connection
+
+    conn = get_db_connection()
+    try:
+        converted = backfill(conn, int(sys.argv[1]) if len(sys.argv) > 1 else BACKFILL_BATCH)
+        conn.commit()
+        print(f"✅ {converted} classes VO2 converties")
+    finally:
+        conn.close()
@@ -0,0 +1,79 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# 🔹 Démarrage à froid d'un worker : nouvel interpréteur, import de l'application,
+# lifespan (schéma, préchauffage) puis première requête. Chaque mesure est un
+# processus neuf, comme un worker lancé par l'autoscaler.
+
+_CHILD = '''
+import asyncio, json, time
+import httpx  # Client de mesure : hors du temps mesuré
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def main():
+    # Client créé avant les mesures (contexte SSL de httpx coûteux)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        starting = time.perf_counter()
+        async with app.router.lifespan_context(app):
+            ready = time.perf_counter()
+            response = await client.get("/")
+            answered = time.perf_counter()
+    return starting, ready, answered, response.status_code
+
+starting, ready, answered, status_code = asyncio.run(main())
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (ready - starting) * 1000,
+    "first_request_ms": (answered - ready) * 1000,
+    "status": status_code,
+}))
+'''
+
+
+def measure_once(env=None):
+    """Un démarrage à froid : durées (ms) de l'import, du lifespan, de la première requête et du processus.
+    """
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", _CHILD], env=env or os.environ.copy(), check=True,
+                            capture_output=True, text=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    if result.pop("status") != 200:
+        raise RuntimeError("La première requête a échoué")
+    result["process_ms"] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def measure(runs=5, env=None):
+    """Médiane et maximum de chaque durée sur `runs` démarrages.
+    """
+    samples = [measure_once(env) for _ in range(runs)]
+    return {
+        name: {"median": round(statistics.median(s[name] for s in samples), 2),
+               "max": round(max(s[name] for s in samples), 2)}
+        for name in samples[0]
+    }
+
+
+def print_report(report):
+    for name, values in report.items():
+        print(f"  {name:18} médiane {values['median']:.1f} ms  max {values['max']:.1f} ms")
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.cold_start --db benchmarks/bench.db --runs 5
+    parser = argparse.ArgumentParser(description="Temps de démarrage à froid d'un worker")
+    parser.add_argument("--db", default=os.path.join("benchmarks", "bench.db"))
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    env = os.environ.copy()
+    env["DB_PATH"] = os.path.abspath(args.db)
+    env.setdefault("SECRET_KEY", "benchmark-secret")
+    print_report(measure(args.runs, env))
@@ -0,0 +1,59 @@
+import argparse
+import json
+import sys
+
+# 🔹 Comparaison de deux résultats de benchmarks.run : une régression est une
+# latence p95 plus élevée, un débit plus faible ou un démarrage à froid plus
+# long que la référence au-delà du seuil.
+
+
+def compare(baseline, current, threshold=0.15):
+    """Régressions de current par rapport à baseline (mêmes modes et scénarios).
+
+    Returns:
+        list: (mode, scénario, indicateur, référence, actuel, écart relatif)
+    """
+    regressions = []
+    for mode, results in current.get("results", {}).items():
+        reference = baseline.get("results", {}).get(mode, {})
+        for name, result in results.items():
+            base = reference.get(name)
+            if not base:
+                continue
+            p95, base_p95 = result.get("p95_ms"), base.get("p95_ms")
+            if p95 is not None and base_p95 and p95 > base_p95 * (1 + threshold):
+                regressions.append((mode, name, "p95_ms", base_p95, p95, p95 / base_p95 - 1))
+            rps, base_rps = result.get("throughput_rps"), base.get("throughput_rps")
+            if rps is not None and base_rps and rps < base_rps * (1 - threshold):
+                regressions.append((mode, name, "throughput_rps", base_rps, rps, rps / base_rps - 1))
+
+    reference = baseline.get("cold_start") or {}
+    for name, values in (current.get("cold_start") or {}).items():
+        base = reference.get(name, {}).get("median")
+        if base and values["median"] > base * (1 + threshold):
+            regressions.append(("cold_start", name, "median_ms", base, values["median"], values["median"] / base - 1))
+    return regressions
+
+
+def print_report(regressions, threshold):
+    for mode, name, metric, base, value, change in regressions:
+        print(f"❌ [{mode}] {name} : {metric} {base:.2f} -> {value:.2f} ({change:+.0%})")
+    if not regressions:
+        print(f"✅ Aucune régression au-delà de {threshold:.0%}")
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.compare reference.json actuel.json [--threshold 0.15]
+    parser = argparse.ArgumentParser(description="Compare deux résultats de benchmarks")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.15)
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+    regressions = compare(baseline, current, args.threshold)
+    print_report(regressions, args.threshold)
+    sys.exit(1 if regressions else 0)
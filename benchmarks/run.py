@@ -0,0 +1,429 @@
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+# 🔹 Benchmarks des routes de app.main.app : en processus (ASGI) et contre uvicorn.
+# Chaque scénario est lancé `requests` fois avec `concurrency` requêtes en vol ;
+# débit et latences p50/p95/p99 sont écrits en JSON pour comparer deux commits.
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    route: str  # Chemin de la route FastAPI couverte (rapport de couverture)
+    build: Callable  # build(ctx, i) -> (url, corps JSON ou None, token ou None)
+    max_requests: Optional[int] = None  # Scénarios coûteux (bcrypt, export)
+    after: Optional[Callable] = None  # after(ctx, réponse) : garde les ressources créées
+    available: Optional[Callable] = None  # available(ctx) : ressources à consommer (borne le nombre de requêtes)
+
+
+@dataclass
+class Context:
+    athletes: list  # (id_user, token)
+    rng: random.Random
+    run_id: str
+    created_performances: list = field(default_factory=list)  # (id_performance, token)
+    created_users: list = field(default_factory=list)
+    sample_sessions: list = field(default_factory=list)  # (id_performance, token) avec séries brutes
+
+    def athlete(self):
+        return self.athletes[self.rng.randrange(len(self.athletes))]
+
+    def created_performance(self, i):
+        return self.created_performances[i % len(self.created_performances)]
+
+    def created_user(self, i):
+        return self.created_users[i % len(self.created_users)]
+
+    def sample_session(self, i):
+        return self.sample_sessions[i % len(self.sample_sessions)]
+
+
+def _performance_body(ctx):
+    return {"power_max": round(ctx.rng.uniform(150, 450), 1), "hr_max": 180, "vo2_max": round(ctx.rng.uniform(35, 70), 1),
+            "rf_max": 40, "cadence_max": 90, "vo2_class": "[74, 88]", "ressenti": ctx.rng.randint(1, 10)}
+
+
+def _user_body(ctx, i, suffix=""):
+    return {"username": f"bench_{ctx.run_id}_{i}{suffix}", "nom": "Bench", "prenom": "User",
+            "email": f"bench_{ctx.run_id}_{i}{suffix}@bench.local", "password": "benchmark", "role": "athlete"}
+
+
+def _with_token(build):
+    """Scénario authentifié avec le token d'un athlète tiré au hasard.
+    """
+    def wrapped(ctx, i):
+        id_user, token = ctx.athlete()
+        url, body = build(ctx, i, id_user)
+        return url, body, token
+    return wrapped
+
+
+def _keep_performance(ctx, response):
+    if response.status_code == 200:
+        ctx.created_performances.append((response.json()["id_performance"], response.request.headers["authorization"][7:]))
+
+
+def _keep_user(ctx, response):
+    if response.status_code == 200:
+        ctx.created_users.append(response.json()["id_user"])
+
+
+def _pop_performance(ctx, i):
+    id_performance, token = ctx.created_performances.pop()
+    return f"/performance/performances/{id_performance}", None, token
+
+
+def _pop_user(ctx, i):
+    return f"/admin/users/{ctx.created_users.pop()}", None, None
+
+
+def _users_created(ctx):
+    return len(ctx.created_users)
+
+
+def _performances_created(ctx):
+    return len(ctx.created_performances)
+
+
+def _sample_sessions(ctx):
+    return len(ctx.sample_sessions)
+
+
+def _if_any(created):
+    """available() d'un scénario qui relit les ressources créées sans les consommer
+    (ignoré si le scénario de création a été filtré par --only).
+    """
+    return lambda ctx: float("inf") if created(ctx) else 0
+
+
+PERF = "/performance/performances"
+
+# Ordre d'exécution : les scénarios d'écriture créent les ressources utilisées ensuite
+SCENARIOS = [
+    Scenario("home", "GET", "/", lambda ctx, i: ("/", None, None)),
+    Scenario("auth.login", "POST", "/auth/login", lambda ctx, i: ("/auth/login", None, None)),
+    Scenario("auth.register", "POST", "/auth/register", lambda ctx, i: ("/auth/register", None, None)),
+    # Lectures authentifiées (token tiré parmi tous les athlètes : cache d'authentification chaud et froid)
+    Scenario("performances.list", "GET", f"{PERF}/", _with_token(lambda ctx, i, u: (f"{PERF}/?limit=100", None))),
+    Scenario("performances.list_ndjson", "GET", f"{PERF}/",
+             _with_token(lambda ctx, i, u: (f"{PERF}/?format=ndjson&limit=500", None))),
+    Scenario("performances.list_filtered", "GET", f"{PERF}/",
+             _with_token(lambda ctx, i, u: (f"{PERF}/?vo2_class_min=65&vo2_class_max=95&power_max_from=250&limit=100",
+                                            None))),
+    Scenario("performances.create", "POST", f"{PERF}/",
+             _with_token(lambda ctx, i, u: (f"{PERF}/", _performance_body(ctx))), after=_keep_performance),
+    Scenario("performances.bulk", "POST", f"{PERF}/bulk",
+             _with_token(lambda ctx, i, u: (f"{PERF}/bulk", [_performance_body(ctx) for _ in range(100)])),
+             max_requests=200),
+    Scenario("performances.get", "GET", f"{PERF}/{{id_performance}}",
+             lambda ctx, i: (f"{PERF}/{ctx.created_performance(i)[0]}", None, ctx.created_performance(i)[1]),
+             available=_if_any(_performances_created)),
+    Scenario("performances.update", "PUT", f"{PERF}/{{id_performance}}",
+             lambda ctx, i: (f"{PERF}/{ctx.created_performance(i)[0]}", _performance_body(ctx),
+                             ctx.created_performance(i)[1]),
+             available=_if_any(_performances_created)),
+    Scenario("performances.summary", "POST", f"{PERF}/summary",
+             _with_token(lambda ctx, i, u: (f"{PERF}/summary",
+                                            {"id_users": [ctx.athlete()[0] for _ in range(200)], "compact": i % 2 == 0}))),
+    Scenario("performances.query", "POST", f"{PERF}/query",
+             _with_token(lambda ctx, i, u: (f"{PERF}/query",
+                                            {"sort": "-power_max", "ranges": {"power_max": {"min": 200}},
+                                             "fields": ["id_performance", "date_performance", "power_max", "vo2_max"],
+                                             "limit": 100, "compact": i % 2 == 0}))),
+    Scenario("performances.samples", "GET", f"{PERF}/{{id_performance}}/samples",
+             lambda ctx, i: (f"{PERF}/{ctx.sample_session(i)[0]}/samples", None, ctx.sample_session(i)[1]),
+             available=_if_any(_sample_sessions)),
+    Scenario("performances.sample_range", "GET", f"{PERF}/{{id_performance}}/samples/{{trial}}/{{channel}}",
+             lambda ctx, i: (f"{PERF}/{ctx.sample_session(i)[0]}/samples/incremental/power?start={i % 3000}&stop={i % 3000 + 600}"
+                             f"&format={'raw' if i % 2 else 'json'}", None, ctx.sample_session(i)[1]),
+             available=_if_any(_sample_sessions)),
+    # Classements
+    Scenario("leaderboard.puissance", "GET", f"{PERF}/puissance/details",
+             _with_token(lambda ctx, i, u: (f"{PERF}/puissance/details?limit=10", None))),
+    Scenario("leaderboard.puissance_user", "GET", f"{PERF}/puissance/detail/{{id_user}}",
+             _with_token(lambda ctx, i, u: (f"{PERF}/puissance/detail/{u}", None))),
+    Scenario("leaderboard.vo2max", "GET", f"{PERF}/VO2max/details",
+             _with_token(lambda ctx, i, u: (f"{PERF}/VO2max/details?limit=10", None))),
+    Scenario("leaderboard.vo2max_user", "GET", f"{PERF}/VO2max/detail/{{id_user}}",
+             _with_token(lambda ctx, i, u: (f"{PERF}/VO2max/detail/{u}", None))),
+    Scenario("leaderboard.metric", "GET", f"{PERF}/leaderboard/{{metric}}",
+             _with_token(lambda ctx, i, u: (f"{PERF}/leaderboard/{('power_max', 'hr_max', 'rf_max')[i % 3]}", None))),
+    Scenario("leaderboard.poidspuissance", "GET", f"{PERF}/poidspuissance/details",
+             _with_token(lambda ctx, i, u: (f"{PERF}/poidspuissance/details?limit=10", None))),
+    Scenario("leaderboard.poidspuissance_user", "GET", f"{PERF}/poidspuissance/detail/{{id_user}}",
+             _with_token(lambda ctx, i, u: (f"{PERF}/poidspuissance/detail/{u}", None))),
+    Scenario("percentile", "GET", "/performance/percentile/{id_user}",
+             _with_token(lambda ctx, i, u: (f"/performance/percentile/{u}", None))),
+    Scenario("analytics", "GET", "/performance/analytics/{id_user}",
+             _with_token(lambda ctx, i, u: (f"/performance/analytics/{u}", None))),
+    Scenario("export.csv_user", "GET", "/performance/export/",
+             _with_token(lambda ctx, i, u: (f"/performance/export/?format=csv&id_user={u}", None)), max_requests=100),
+    # CRUD utilisateurs et détails (bcrypt : nombre de requêtes limité)
+    Scenario("users.create", "POST", "/admin/users/", lambda ctx, i: ("/admin/users/", _user_body(ctx, i), None),
+             max_requests=100, after=_keep_user),
+    Scenario("users.bulk", "POST", "/admin/users/bulk",
+             lambda ctx, i: ("/admin/users/bulk", [_user_body(ctx, i, f"_b{j}") for j in range(10)], None),
+             max_requests=20),
+    Scenario("details.create", "POST", "/admin/details/{id_user}",
+             lambda ctx, i: (f"/admin/details/{ctx.created_users[i]}",
+                             {"gender": "F", "age": 30, "weight": 60, "height": 170}, None),
+             available=_users_created),
+    Scenario("details.get", "GET", "/admin/details/{id_user}",
+             lambda ctx, i: (f"/admin/details/{ctx.created_user(i)}", None, None), available=_if_any(_users_created)),
+    Scenario("details.update", "PUT", "/admin/details/{id_user}",
+             lambda ctx, i: (f"/admin/details/{ctx.created_user(i)}",
+                             {"gender": "F", "age": 31, "weight": 61, "height": 170}, None),
+             available=_if_any(_users_created)),
+    Scenario("details.delete", "DELETE", "/admin/details/{id_user}",
+             lambda ctx, i: (f"/admin/details/{ctx.created_users[i]}", None, None), available=_users_created),
+    Scenario("users.get", "GET", "/admin/users/{user_id}",
+             lambda ctx, i: (f"/admin/users/{ctx.created_user(i)}", None, None), available=_if_any(_users_created)),
+    Scenario("users.update", "PUT", "/admin/users/{user_id}",
+             lambda ctx, i: (f"/admin/users/{ctx.created_user(i)}", _user_body(ctx, ctx.created_user(i), "_u"), None),
+             max_requests=100, available=_if_any(_users_created)),
+    Scenario("performances.delete", "DELETE", f"{PERF}/{{id_performance}}", _pop_performance,
+             available=_performances_created),
+    Scenario("users.delete", "DELETE", "/admin/users/{user_id}", _pop_user, available=_users_created),
+]
+
+
+def _request_count(scenario, ctx, requests):
+    count = requests if scenario.max_requests is None else min(requests, scenario.max_requests)
+    if scenario.available is not None:
+        count = min(count, scenario.available(ctx))
+    return count
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+async def run_scenario(client, scenario, ctx, requests, concurrency):
+    """Lance un scénario et retourne ses statistiques (débit, latences en ms, statuts).
+    """
+    count = _request_count(scenario, ctx, requests)
+    latencies, statuses = [], {}
+    counter = iter(range(count))
+
+    async def worker():
+        for i in counter:
+            url, body, token = scenario.build(ctx, i)
+            headers = {"Authorization": f"Bearer {token}"} if token else {}
+            started = time.perf_counter()
+            response = await client.request(scenario.method, url, json=body, headers=headers)
+            await response.aread()
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if scenario.after is not None:
+                scenario.after(ctx, response)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, max(count, 1)))))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "route": f"{scenario.method} {scenario.route}",
+        "requests": count,
+        "errors": sum(n for status, n in statuses.items() if status >= 400),
+        "statuses": {str(status): n for status, n in sorted(statuses.items())},
+        "throughput_rps": round(count / elapsed, 2) if elapsed > 0 and count else None,
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else None,
+        "p50_ms": _percentile(latencies, 0.50),
+        "p95_ms": _percentile(latencies, 0.95),
+        "p99_ms": _percentile(latencies, 0.99),
+    }
+
+
+def _load_context(db_path, sample, random_seed):
+    import sqlite3
+    conn = sqlite3.connect(db_path)
+    try:
+        athletes = conn.execute('''
+            SELECT id_user, token FROM users WHERE role = 'athlete' AND username LIKE 'athlete%'
+            ORDER BY random() LIMIT ?
+        ''', (sample,)).fetchall()
+        sessions = conn.execute('''
+            SELECT p.id_performance, u.token
+            FROM (SELECT DISTINCT id_performance FROM performance_samples) s
+            JOIN performances p ON p.id_performance = s.id_performance
+            JOIN users u ON u.id_user = p.id_user
+        ''').fetchall()
+    finally:
+        conn.close()
+    if not athletes:
+        raise SystemExit(f"Aucun athlète dans {db_path} : lancer d'abord python -m benchmarks.seed")
+    return Context(athletes=athletes, rng=random.Random(random_seed), run_id=f"{int(time.time())}{os.getpid()}",
+                   sample_sessions=sessions)
+
+
+async def _run_all(client, args, ctx):
+    results = {}
+    for scenario in SCENARIOS:
+        if args.only and not any(scenario.name.startswith(prefix) for prefix in args.only):
+            continue
+        results[scenario.name] = await run_scenario(client, scenario, ctx, args.requests, args.concurrency)
+        print(f"  {scenario.name:32} {results[scenario.name]['throughput_rps']} req/s  "
+              f"p50 {_fmt(results[scenario.name]['p50_ms'])}  p95 {_fmt(results[scenario.name]['p95_ms'])}  "
+              f"p99 {_fmt(results[scenario.name]['p99_ms'])}  erreurs {results[scenario.name]['errors']}")
+    return results
+
+
+def _fmt(value):
+    return "-" if value is None else f"{value:.2f} ms"
+
+
+async def run_inprocess(args, ctx):
+    """Appels ASGI directs (httpx.ASGITransport) : coût de l'application seule, sans réseau.
+    """
+    import httpx
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            return await _run_all(client, args, ctx)
+
+
+async def run_uvicorn(args, ctx):
+    """Serveur uvicorn local (processus séparé, --workers) : pile HTTP complète.
+    """
+    import httpx
+
+    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+               "--port", str(args.port), "--workers", str(args.workers), "--log-level", "warning"]
+    server = subprocess.Popen(command, env=os.environ.copy())
+    try:
+        base_url = f"http://127.0.0.1:{args.port}"
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+            deadline = time.monotonic() + 60
+            while True:
+                try:
+                    if (await client.get("/")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline or server.poll() is not None:
+                    raise SystemExit("uvicorn n'a pas démarré")
+                await asyncio.sleep(0.1)
+            return await _run_all(client, args, ctx)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+# Routes sans latence par requête mesurable (flux SSE ouvert jusqu'à la déconnexion)
+UNMEASURED_ROUTES = {("GET", "/performance/stream/")}
+
+
+def uncovered_routes():
+    """Routes de app.main.app sans scénario (hors UNMEASURED_ROUTES).
+    """
+    from fastapi.routing import APIRoute
+    from app.main import app
+
+    covered = {(scenario.method, scenario.route) for scenario in SCENARIOS} | UNMEASURED_ROUTES
+    return sorted(f"{method} {route.path}" for route in app.routes if isinstance(route, APIRoute)
+                  for method in route.methods if (method, route.path) not in covered)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks des routes de l'API")
+    parser.add_argument("--db", default=os.path.join("benchmarks", "bench.db"))
+    parser.add_argument("--seed-db", action="store_true", help="(re)créer la base synthétique avant les mesures")
+    parser.add_argument("--athletes", type=int, default=1000)
+    parser.add_argument("--performances", type=int, default=100000)
+    parser.add_argument("--mode", choices=("inprocess", "uvicorn", "both"), default="inprocess")
+    parser.add_argument("--requests", type=int, default=500, help="requêtes par scénario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=1, help="workers uvicorn")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--only", action="append", help="préfixe de scénario (répétable)")
+    parser.add_argument("--random-seed", type=int, default=42)
+    parser.add_argument("--cold-starts", type=int, default=5, help="démarrages à froid mesurés (0 : aucun)")
+    parser.add_argument("--output", default=None, help="fichier JSON (défaut : benchmarks/results/<date>-<commit>.json)")
+    parser.add_argument("--baseline", default=None, help="résultats de référence à comparer")
+    parser.add_argument("--threshold", type=float, default=0.15, help="régression tolérée (0.15 = 15 %%)")
+    args = parser.parse_args(argv)
+
+    # Les modules de l'application lisent leur configuration à l'import
+    os.environ["DB_PATH"] = os.path.abspath(args.db)
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+    from benchmarks import cold_start
+    from benchmarks.seed import seed
+    if args.seed_db or not os.path.exists(args.db):
+        print(f"🔹 Remplissage de {args.db} : {seed(args.db, args.athletes, args.performances, args.random_seed)}")
+
+    commit = _git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "db": os.path.abspath(args.db),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+        },
+        "uncovered_routes": uncovered_routes(),
+        "cold_start": None,
+        "results": {},
+    }
+    if args.cold_starts:
+        print(f"🔹 Démarrage à froid ({args.cold_starts} processus)")
+        report["cold_start"] = cold_start.measure(args.cold_starts)
+        cold_start.print_report(report["cold_start"])
+    modes = ("inprocess", "uvicorn") if args.mode == "both" else (args.mode,)
+    for mode in modes:
+        print(f"🔹 Mode {mode}")
+        ctx = _load_context(args.db, 1000, args.random_seed)
+        runner = run_inprocess if mode == "inprocess" else run_uvicorn
+        report["results"][mode] = asyncio.run(runner(args, ctx))
+
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"{datetime.datetime.now():%Y%m%d-%H%M%S}-{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Résultats écrits dans {output}")
+    if report["uncovered_routes"]:
+        print(f"⚠️ Routes sans scénario : {', '.join(report['uncovered_routes'])}")
+
+    if args.baseline:
+        from benchmarks.compare import compare, print_report
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        print_report(regressions, args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.run --mode both --requests 1000 --concurrency 32 [--seed-db --athletes 10000 --performances 10000000]
+    sys.exit(main())
@@ -0,0 +1,143 @@
+import argparse
+import json
+import os
+import random
+import sqlite3
+import time
+
+# 🔹 Base synthétique pour les benchmarks : athlètes (avec détails et token),
+# quelques coachs et des performances réparties sur deux ans, dont quelques
+# séances avec leurs séries brutes (performance_samples).
+BENCH_PASSWORD = "benchmark"
+COACH_RATIO = 0.05
+INSERT_BATCH = 20000
+SAMPLE_TRIALS = ("incremental", "Wingate")
+SAMPLE_LENGTH = 3600  # Échantillons par canal (une heure à 1 Hz)
+
+PERFORMANCE_SQL = '''
+    INSERT INTO performances (id_user, power_max, hr_max, vo2_max, rf_max, cadence_max, vo2_class, ressenti, date_performance,
+                              vo2_class_low, vo2_class_high)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def _remove_database(db_path):
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+def _performance_rows(rng, id_users, count, start, span):
+    for _ in range(count):
+        power = rng.gauss(280, 60)
+        vo2 = rng.gauss(52, 8)
+        vo2_class = (round(vo2 * 1.4), round(vo2 * 1.7))
+        yield (
+            rng.choice(id_users),
+            round(max(power, 50.0), 1),
+            round(rng.uniform(150, 200), 1),
+            round(max(vo2, 20.0), 1),
+            round(rng.uniform(30, 60), 1),
+            round(rng.uniform(70, 110), 1),
+            json.dumps(list(vo2_class)),
+            rng.randint(1, 10),
+            time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(start + rng.random() * span)),
+            *vo2_class,
+        )
+
+
+def _store_sessions(conn, sessions, random_seed):
+    """Séries synthétiques pour `sessions` performances tirées au hasard.
+    """
+    import numpy as np
+    from app.utils import samples
+
+    rng = np.random.default_rng(random_seed)
+    ids = [row[0] for row in conn.execute("SELECT id_performance FROM performances ORDER BY random() LIMIT ?",
+                                          (sessions,))]
+    cursor = conn.cursor()
+    for id_performance in ids:
+        ramp = np.linspace(0, 1, SAMPLE_LENGTH)
+        trials = {trial: {
+            "power": 100 + 300 * ramp + rng.normal(0, 15, SAMPLE_LENGTH),
+            "hr": 100 + 90 * ramp + rng.normal(0, 3, SAMPLE_LENGTH),
+            "vo2": 1000 + 3500 * ramp + rng.normal(0, 80, SAMPLE_LENGTH),
+            "rf": 20 + 40 * ramp + rng.normal(0, 2, SAMPLE_LENGTH),
+            "cadence": rng.normal(90, 5, SAMPLE_LENGTH),
+        } for trial in SAMPLE_TRIALS}
+        samples.store(cursor, id_performance, {trial: {channel: values.astype(samples.DTYPE)
+                                                       for channel, values in channels.items()}
+                                               for trial, channels in trials.items()})
+    conn.commit()
+
+
+def seed(db_path, athletes=1000, performances=100000, random_seed=42, sessions=200):
+    """Crée une base synthétique à db_path (remplacée si elle existe).
+
+    Les tokens sont signés avec SECRET_KEY : le serveur mesuré doit utiliser la même clé.
+
+    Returns:
+        dict: échelle et durée du remplissage
+    """
+    import bcrypt
+    from app.migrations import migrate
+    from app.utils import athlete_stats, leaderboard
+    from app.utils.security import generate_token
+
+    started = time.perf_counter()
+    rng = random.Random(random_seed)
+    _remove_database(db_path)
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")  # Base jetable : durabilité inutile pendant le remplissage
+    migrate(conn)
+
+    password = bcrypt.hashpw(BENCH_PASSWORD.encode(), bcrypt.gensalt(rounds=4)).decode()
+    users = []
+    for i in range(athletes):
+        email = f"athlete{i}@bench.local"
+        role = "coach" if rng.random() < COACH_RATIO else "athlete"
+        users.append((f"athlete{i}", f"Nom{i}", f"Prenom{i}", email, password, role, generate_token(email)))
+    conn.executemany('''
+        INSERT INTO users (username, nom, prenom, email, password, role, token) VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', users)
+    id_users = [row[0] for row in conn.execute("SELECT id_user FROM users WHERE role = 'athlete'")]
+    conn.executemany('''
+        INSERT INTO details (id_user, gender, age, weight, height) VALUES (?, ?, ?, ?, ?)
+    ''', [(id_user, rng.choice(("M", "F")), rng.randint(18, 60), round(rng.uniform(50, 100), 1),
+           round(rng.uniform(155, 200), 1)) for id_user in id_users])
+    conn.commit()
+
+    end = time.time()
+    span = 2 * 365 * 86400
+    rows = _performance_rows(rng, id_users, performances, end - span, span)
+    inserted = 0
+    while inserted < performances:
+        batch = [row for _, row in zip(range(INSERT_BATCH), rows)]
+        conn.executemany(PERFORMANCE_SQL, batch)
+        conn.commit()
+        inserted += len(batch)
+    _store_sessions(conn, sessions, random_seed)
+
+    leaderboard.rebuild(conn)
+    athlete_stats.rebuild(conn)
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+    return {"athletes": athletes, "performances": performances, "sessions": sessions, "seed": random_seed,
+            "seconds": round(time.perf_counter() - started, 2)}
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.seed --db benchmarks/bench.db --athletes 10000 --performances 10000000 --sessions 1000
+    parser = argparse.ArgumentParser(description="Base synthétique pour les benchmarks")
+    parser.add_argument("--db", default=os.path.join("benchmarks", "bench.db"))
+    parser.add_argument("--athletes", type=int, default=1000)
+    parser.add_argument("--performances", type=int, default=100000)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    print(seed(args.db, args.athletes, args.performances, args.seed, args.sessions))
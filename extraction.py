@@ -1,102 +1,354 @@
 from datetime import datetime
+import argparse
 import json
+import multiprocessing
 import re
 import sqlite3
 import os
+import threading
+import time
+from concurrent.futures import CancelledError, ProcessPoolExecutor, as_completed
 from rich import print  # Pour un affichage coloré (optionnel)
+from rich.progress import Progress
+from app.migrations import migrate
+from app.utils import athlete_stats, cohorts, http_cache, leaderboard, samples, vo2_bounds
 
 # 🔹 Chemin de ta base SQLite
-DB_PATH = "athlete_performance.db"
+DB_PATH = os.getenv("DB_PATH", "athlete_performance.db")
 
 # 🔹 Dossier où se trouvent les fichiers JSON
-JSON_DIR = "app\\utils\\data"
-
-# 🔹 Connexion à la base SQLite
-conn = sqlite3.connect(DB_PATH)
-cursor = conn.cursor()
-
-# 🔹 Création de la table si elle n'existe pas
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS performances (
-    id_performance INTEGER PRIMARY KEY AUTOINCREMENT,
-    id_user INTEGER NOT NULL,
-    power_max REAL,
-    hr_max REAL,
-    vo2_max REAL,
-    rf_max REAL,
-    cadence_max REAL,
-    vo2_class TEXT,
-    ressenti INTEGER DEFAULT NULL,
-    date_performance TEXT DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (id_user) REFERENCES users(id_user)
-);
-""")
-conn.commit()
-
-# 🔹 Fonction pour insérer les données
-def insert_performance(data, id_user):
-    """ Insère une performance dans la base de données avec id_user extrait du nom du fichier """
-    date_performance = datetime.now().strftime('%Y-%m-%d %H:%M:%S')  # Date actuelle
-    ressenti = data.get("ressenti", 5)  # Valeur par défaut : 5
-
-    # Extraction des valeurs depuis le JSON
-    power_max = data.get("power.max", None)
-    hr_max = data.get("hr.max", None)
-    vo2_max = data.get("vo2.max", None)
-    rf_max = data.get("rf.max", None)
-    cadence_max = data.get("cadence.max", None)
-    vo2_class = json.dumps(data.get("vo2.class", []))  # Stocke comme JSON, [74, 88] dans cet exemple
+JSON_DIR = os.path.join("app", "utils", "data")
+
+# 🔹 Paramètres du chargement par lots
+BATCH_SIZE = 1000  # Lignes par executemany
+COMMIT_EVERY = 50000  # Lignes par transaction (chargement parallèle)
+READ_CHUNK_SIZE = 64 * 1024  # Caractères lus à chaque étape du décodage en flux
+
+INSERT_SQL = """
+INSERT INTO performances (id_user, power_max, hr_max, vo2_max, rf_max, cadence_max, vo2_class, ressenti, date_performance,
+                          vo2_class_low, vo2_class_high)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+def open_connection():
+    """ Ouvre la base SQLite et applique les migrations du schéma """
+    connection = sqlite3.connect(DB_PATH)
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("PRAGMA synchronous = NORMAL")
+    migrate(connection)  # 🔹 Création des tables et index s'ils n'existent pas
+    return connection
 
-    # Affiche les données pour débogage
-    print(f"🎯 Données à insérer pour ID utilisateur {id_user}:")
-    print(f"Power Max: {power_max}, HR Max: {hr_max}, VO2 Max: {vo2_max}, RF Max: {rf_max}, Cadence Max: {cadence_max}, VO2 Class: {vo2_class}, Ressenti: {ressenti}, Date Performance: {date_performance}")
+# 🔹 Conversion d'une entrée JSON en ligne de la table performances
+def performance_row(data, id_user, date_performance, maxima=None):
+    """ Extrait les valeurs d'une entrée JSON dans l'ordre des colonnes de INSERT_SQL.
 
-    cursor.execute("""
-    INSERT INTO performances (id_user, power_max, hr_max, vo2_max, rf_max, cadence_max, vo2_class, ressenti, date_performance)
-    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
+    Un maximum absent de l'entrée est pris dans `maxima` (calculé sur les séries brutes).
+    """
+    maxima = maxima or {}
+    vo2_class = json.dumps(data.get("vo2.class", []))  # Stocke comme JSON, [74, 88] dans cet exemple
+    return (
         id_user,
-        power_max,
-        hr_max,
-        vo2_max,
-        rf_max,
-        cadence_max,
+        data.get("power.max", maxima.get("power_max")),
+        data.get("hr.max", maxima.get("hr_max")),
+        data.get("vo2.max", maxima.get("vo2_max")),
+        data.get("rf.max", maxima.get("rf_max")),
+        data.get("cadence.max", maxima.get("cadence_max")),
         vo2_class,
-        ressenti,
-        date_performance
-    ))
-    conn.commit()
-    print(f"[bold green]✅ Performance insérée pour ID utilisateur {id_user}[/bold green]")
+        data.get("ressenti", 5),  # Valeur par défaut : 5
+        date_performance,
+        *vo2_bounds.parse(vo2_class),  # Bornes typées et indexées de la classe
+    )
 
-# 🔹 Lire et traiter les fichiers JSON
-def load_json_files():
-    """ Charge les fichiers JSON et insère les performances """
-    for file_name in os.listdir(JSON_DIR):
+# 🔹 Lecture en flux d'un fichier JSON (tableau d'entrées ou objet unique)
+_decoder = json.JSONDecoder()
+_NUMBER_CHARS = frozenset("0123456789.eE+-")  # Suite possible d'un nombre coupé en fin de bloc
+
+def iter_json_entries(f, chunk_size=READ_CHUNK_SIZE):
+    """ Génère les entrées du tableau JSON de premier niveau une par une.
+
+    Le fichier est lu par blocs et chaque entrée est décodée avec raw_decode
+    dès qu'elle est complète : la mémoire dépend de la taille d'une entrée,
+    pas de celle du fichier. Un objet unique est renvoyé comme seule entrée.
+
+    Raises:
+        json.JSONDecodeError: JSON invalide ou tronqué
+    """
+    buffer = f.read(chunk_size)
+    eof = not buffer
+    pos = 0
+
+    def skip_whitespace():
+        nonlocal buffer, pos, eof
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            buffer, pos = f.read(chunk_size), 0
+            eof = not buffer
+
+    def decode_value():
+        nonlocal buffer, pos, eof
+        read_size = chunk_size
+        while True:
+            try:
+                value, end = _decoder.raw_decode(buffer, pos)
+                # Un nombre n'est complet que si le caractère suivant ne peut pas le prolonger
+                truncated = end == len(buffer) or (type(value) in (int, float) and buffer[end] in _NUMBER_CHARS)
+                if eof or not truncated:
+                    pos = end
+                    return value
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            more = f.read(read_size)
+            read_size *= 2  # Entrée plus grande qu'un bloc : lectures croissantes
+            eof = not more
+            buffer, pos = buffer[pos:] + more, 0
+
+    skip_whitespace()
+    if pos >= len(buffer):
+        raise json.JSONDecodeError("Expecting value", buffer, pos)
+
+    if buffer[pos] != "[":
+        yield decode_value()  # Objet unique
+        return
+
+    pos += 1
+    expect_value = True
+    empty = True
+    while True:
+        skip_whitespace()
+        if pos >= len(buffer):
+            raise json.JSONDecodeError("Unterminated array", buffer, pos)
+        char = buffer[pos]
+        if char == "]" and (empty or not expect_value):
+            return
+        if char == "," and not expect_value:
+            pos += 1
+            expect_value = True
+            continue
+        if not expect_value:
+            raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+        yield decode_value()
+        expect_value = False
+        empty = False
+        if pos > chunk_size:
+            buffer, pos = buffer[pos:], 0  # Libère les entrées déjà décodées
+
+# 🔹 Lecture d'un fichier par lots de lignes
+def file_batches(file_path, id_user, batch_size=BATCH_SIZE):
+    """ Génère les lignes d'un fichier sbj_N.json par lots de batch_size (ligne, essais).
+
+    Les séries brutes des CSV d'essai, s'ils sont présents, sont lues et
+    résumées ici : un maximum absent du JSON est calculé à partir des séries.
+
+    Raises:
+        json.JSONDecodeError: JSON invalide (les lots déjà générés restent valides)
+    """
+    date_performance = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    json_dir = os.path.dirname(file_path)
+    batch = []
+    with open(file_path, "r", encoding="utf-8") as f:
+        try:
+            for entry in iter_json_entries(f):
+                trials = samples.entry_trials(entry, json_dir)
+                batch.append((performance_row(entry, id_user, date_performance, samples.session_maxima(trials)), trials))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        except json.JSONDecodeError:
+            if batch:
+                yield batch  # Entrées lues avant l'erreur
+            raise
+    if batch:
+        yield batch
+
+# 🔹 Insertion d'un lot
+def insert_rows(connection, batch):
+    """ Insère un lot de (ligne, essais) sans commit.
+
+    Les lignes sans séries brutes partent en un seul executemany ; les
+    autres sont insérées une à une pour rattacher leurs séries à leur id.
+    """
+    connection.executemany(INSERT_SQL, [row for row, trials in batch if not trials])
+    for row, trials in batch:
+        if trials:
+            cursor = connection.execute(INSERT_SQL, row)
+            samples.store(cursor, cursor.lastrowid, trials)
+
+# 🔹 Liste des fichiers sbj_N.json à charger
+def subject_files(json_dir=JSON_DIR):
+    """ Retourne [(chemin, id_user)] des fichiers sbj_N.json, signale les autres """
+    files = []
+    for file_name in sorted(os.listdir(json_dir)):
         match = re.match(r"sbj_(\d+)\.json", file_name)  # Extrait N depuis "sbj_N.json"
         if match:
-            id_user = int(match.group(1))  # Convertit N en entier
-            file_path = os.path.join(JSON_DIR, file_name)
-            print(f"[bold cyan]📂 Chargement : {file_name} | ID utilisateur : {id_user}[/bold cyan]")
+            files.append((os.path.join(json_dir, file_name), int(match.group(1))))  # Convertit N en entier
+        else:
+            print(f"[bold yellow]⚠️ Fichier ignoré : {file_name} (nom incorrect)[/bold yellow]")
+    return files
 
-            with open(file_path, "r", encoding="utf-8") as f:
-                try:
-                    json_data = json.load(f)
+# 🔹 Invalidation des ETag des utilisateurs chargés
+def bump_versions(connection, files):
+    """ Incrémente la version des performances de chaque utilisateur chargé et celle des cohortes """
+    http_cache.bump(connection.cursor(), *{http_cache.performances_resource(id_user) for _, id_user in files},
+                    cohorts.RESOURCE)
+    connection.commit()
 
-                    # Si le JSON est un objet unique, le convertir en liste
-                    if isinstance(json_data, dict):
-                        json_data = [json_data]
+# 🔹 Recalcul des tables dérivées après un chargement
+def finish_load(connection, files):
+    """ Recalcule classements et agrégats une seule fois, puis invalide les ETag """
+    leaderboard.rebuild(connection)
+    athlete_stats.rebuild(connection)
+    bump_versions(connection, files)
 
-                    for entry in json_data:
-                        insert_performance(entry, id_user)
+# 🔹 Lire et traiter les fichiers JSON
+def load_json_files(batch_size=BATCH_SIZE):
+    """ Charge les fichiers JSON un par un, par lots, dans une seule transaction.
+
+    Un fichier au JSON invalide est signalé ; ses entrées lues avant l'erreur
+    sont gardées. Affiche un résumé (lignes/seconde) et retourne le nombre de
+    performances insérées.
+    """
+    files = subject_files(JSON_DIR)
+    rows = 0
+    errors = 0
+    start = time.perf_counter()
+    connection = open_connection()
+    try:
+        with Progress() as progress:
+            task = progress.add_task("📂 Chargement", total=len(files))
+            for file_path, id_user in files:
+                try:
+                    for batch in file_batches(file_path, id_user, batch_size):
+                        insert_rows(connection, batch)
+                        rows += len(batch)
                 except json.JSONDecodeError as e:
-                    print(f"[bold red]❌ Erreur JSON dans {file_name} : {e}[/bold red]")
-        else:
-            print(f"[bold yellow]⚠️ Fichier ignoré : {file_name} (nom incorrect)[/bold yellow]")
+                    errors += 1
+                    progress.console.print(f"[bold red]❌ Erreur JSON dans {os.path.basename(file_path)} : {e}[/bold red]")
+                progress.advance(task)
+        connection.commit()
+        finish_load(connection, files)
+    finally:
+        connection.close()
 
-# 🔹 Exécuter le script
-if __name__ == "__main__":
+    elapsed = time.perf_counter() - start
+    print(f"[bold green]✅ {rows} performances insérées depuis {len(files) - errors} fichiers "
+          f"en {elapsed:.2f} s ({rows / elapsed:.0f} lignes/s)[/bold green]")
+    return rows
+
+# 🔹 Chargement parallèle : lecture dans des processus, écriture par un seul thread
+_rows_queue = None
+
+def _init_worker(rows_queue):
+    """ Initialise un processus de lecture avec la file partagée vers l'écrivain """
+    global _rows_queue
+    _rows_queue = rows_queue
+
+def _parse_file(file_path, id_user, batch_size):
+    """ Lit un fichier en flux dans un processus et envoie ses lignes par lots à l'écrivain.
+
+    Les séries brutes sont lues et résumées dans le processus de lecture,
+    l'écrivain ne fait qu'insérer.
+    """
+    count = 0
+    for batch in file_batches(file_path, id_user, batch_size):
+        _rows_queue.put(batch)
+        count += len(batch)
+    return count
+
+def _write_rows(rows_queue, commit_every, stats):
+    """ Thread écrivain : executemany par lot, commit toutes les commit_every lignes.
+
+    Toute exception est enregistrée dans stats["error"] et la file continue
+    d'être vidée : les processus de lecture ne restent jamais bloqués sur put().
+    """
+    connection = None
+    pending = 0
+    try:
+        while True:
+            try:
+                batch = rows_queue.get()
+                if batch is None:
+                    break
+                if "error" in stats:
+                    continue  # Vider la file pour ne pas bloquer les processus de lecture
+                if connection is None:
+                    connection = open_connection()
+                insert_rows(connection, batch)
+                pending += len(batch)
+                stats["rows"] += len(batch)
+                if pending >= commit_every:
+                    connection.commit()
+                    pending = 0
+            except BaseException as e:
+                stats.setdefault("error", e)
+        if "error" not in stats and connection is not None:
+            connection.commit()
+    except BaseException as e:
+        stats.setdefault("error", e)
+    finally:
+        if connection is not None:
+            connection.close()
+
+def load_json_files_parallel(workers=None, batch_size=BATCH_SIZE, commit_every=COMMIT_EVERY):
+    """ Charge les fichiers JSON en parallèle et affiche un résumé (lignes/seconde) """
+    files = subject_files(JSON_DIR)
+    rows_queue = multiprocessing.Queue(maxsize=(workers or os.cpu_count() or 1) * 4)  # Contre-pression
+    stats = {"rows": 0}
+    writer = threading.Thread(target=_write_rows, args=(rows_queue, commit_every, stats))
+    start = time.perf_counter()
+    writer.start()
+
+    errors = 0
     try:
-        load_json_files()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(rows_queue,)) as executor, \
+                Progress() as progress:
+            task = progress.add_task("📂 Chargement", total=len(files))
+            futures = {executor.submit(_parse_file, file_path, id_user, batch_size): file_path
+                       for file_path, id_user in files}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except (OSError, json.JSONDecodeError) as e:
+                    errors += 1
+                    progress.console.print(f"[bold red]❌ Erreur dans {os.path.basename(futures[future])} : {e}[/bold red]")
+                except CancelledError:
+                    pass
+                progress.advance(task)
+                if "error" in stats:
+                    executor.shutdown(wait=False, cancel_futures=True)  # Écrivain en échec : fichiers restants abandonnés
     finally:
-        conn.close()
-        print("[bold magenta]🚀 Chargement terminé ![/bold magenta]")
\ No newline at end of file
+        rows_queue.put(None)
+        writer.join()
+
+    if "error" in stats:
+        print(f"[bold red]❌ Erreur d'écriture : {stats['error']}[/bold red]")
+        raise stats["error"]
+
+    connection = open_connection()
+    try:
+        finish_load(connection, files)
+    finally:
+        connection.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"[bold green]✅ {stats['rows']} performances insérées depuis {len(files) - errors} fichiers "
+          f"en {elapsed:.2f} s ({stats['rows'] / elapsed:.0f} lignes/s)[/bold green]")
+    return stats["rows"]
+
+# 🔹 Exécuter le script
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chargement des fichiers sbj_N.json dans la base")
+    parser.add_argument("--parallel", action="store_true", help="lecture multi-processus et écriture par lots")
+    parser.add_argument("--workers", type=int, default=None, help="nombre de processus de lecture")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="lignes par executemany")
+    parser.add_argument("--commit-every", type=int, default=COMMIT_EVERY, help="lignes par transaction (--parallel)")
+    args = parser.parse_args()
+
+    if args.parallel:
+        load_json_files_parallel(args.workers, args.batch_size, args.commit_every)
+    else:
+        load_json_files(args.batch_size)
+    print("[bold magenta]🚀 Chargement terminé ![/bold magenta]")
@@ -0,0 +1,55 @@
+import itertools
+import os
+import sqlite3
+import tempfile
+
+# 🔹 Base et secrets de test, fixés avant le premier import de l'application
+os.environ.setdefault("SECRET_KEY", "test-secret-key-for-the-athlete-performance-api")
+os.environ["DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="athlete-tests-"), "test.db")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "1")
+
+import pytest
+
+_names = itertools.count(1)
+
+
+@pytest.fixture
+def conn():
+    """Base en mémoire migrée jusqu'à la dernière version du schéma.
+    """
+    from app.migrations import migrate
+
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    migrate(conn)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Application complète (lifespan compris) sur la base de test.
+    """
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def make_user(client):
+    """Crée un utilisateur et retourne (id_user, en-têtes d'authentification).
+    """
+    def make_user(role="athlete"):
+        name = f"user{next(_names)}"
+        response = client.post("/admin/users/", json={
+            "username": name, "nom": name, "prenom": name, "email": f"{name}@example.com",
+            "password": "password", "role": role,
+        })
+        assert response.status_code == 200, response.text
+        user = response.json()
+        return user["id_user"], {"Authorization": f"Bearer {user['token']}"}
+
+    return make_user
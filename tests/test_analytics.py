@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from app.utils import analytics
+
+
+def test_analytics_of_an_athlete(client, make_user):
+    id_user, headers = make_user()
+    for power in (250, 300, 280):
+        client.post("/performance/performances/", json={"power_max": power}, headers=headers)
+
+    response = client.get(f"/performance/analytics/{id_user}", params={"window": 2}, headers=headers)
+    assert response.status_code == 200
+    power = response.json()["metrics"]["power_max"]
+    assert power["sessions"] == 3
+    assert power["personal_best"] == 300
+    assert power["rolling_average"] == 290
+    assert response.json()["metrics"]["vo2_max"] is None
+
+
+def test_analytics_without_performances(client, make_user):
+    id_user, headers = make_user()
+    response = client.get(f"/performance/analytics/{id_user}", headers=headers)
+    assert response.json() == {"message": "Aucune performance trouvée."}
+
+
+def test_analytics_are_scoped_to_the_caller(client, make_user):
+    id_user, headers = make_user()
+    client.post("/performance/performances/", json={"power_max": 250}, headers=headers)
+    path = f"/performance/analytics/{id_user}"
+
+    _, other_headers = make_user()
+    assert client.get(path, headers=other_headers).status_code == 403
+    _, coach_headers = make_user("coach")
+    assert client.get(path, headers=coach_headers).json() == client.get(path, headers=headers).json()
+    assert client.get(path, headers={"Authorization": "Bearer not-a-token"}).status_code == 401
+
+
+def test_write_invalidates_cached_analytics(client, make_user):
+    id_user, headers = make_user()
+    path = f"/performance/analytics/{id_user}"
+    client.post("/performance/performances/", json={"power_max": 250}, headers=headers)
+    first = client.get(path, headers=headers)
+    assert client.get(path, headers={**headers, "If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    client.post("/performance/performances/", json={"power_max": 300}, headers=headers)
+    second = client.get(path, headers={**headers, "If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert second.json()["metrics"]["power_max"]["sessions"] == 2
+
+    other_window = client.get(path, params={"window": 1}, headers={**headers, "If-None-Match": second.headers["ETag"]})
+    assert other_window.status_code == 200  # Chaque jeu de paramètres a son ETag
+
+
+@pytest.mark.parametrize("params", [{"window": 0}, {"weeks": 105}])
+def test_analytics_parameters_are_bounded(client, make_user, params):
+    id_user, headers = make_user()
+    assert client.get(f"/performance/analytics/{id_user}", params=params, headers=headers).status_code == 422
+
+
+def test_compute_trend_records_and_weeks():
+    dates = np.array(["2025-01-06T08:00", "2025-01-07T08:00", "2025-01-13T08:00"], dtype="datetime64[s]")
+    values = np.full((len(analytics.METRICS), 3), np.nan)
+    values[analytics.METRICS.index("power_max")] = [100, 200, 150]
+
+    result = analytics.compute(dates, values, window=2, weeks=2)
+    power = result["metrics"]["power_max"]
+    assert (power["sessions"], power["latest"], power["mean"], power["rolling_average"]) == (3, 150, 150, 175)
+    assert power["trend"]["slope_per_day"] == pytest.approx(50 / (258 / 9))
+    assert [record["value"] for record in power["personal_best_progression"]] == [100, 200]
+    assert power["weekly"] == [
+        {"week": "2025-01-06", "sessions": 2, "mean": 150.0, "delta": None},
+        {"week": "2025-01-13", "sessions": 1, "mean": 150.0, "delta": 0.0},
+    ]
+    assert result["metrics"]["hr_max"] is None
+
+
+def test_history_cache_entries_follow_the_resource_version():
+    cache = analytics.HistoryCache(maxsize=1)
+    dates, values = np.empty(0, dtype="datetime64[s]"), np.empty((5, 0))
+    cache.set(1, 3, dates, values)
+    assert cache.get(1, 3) is not None and cache.get(1, 4) is None
+    cache.set(2, 1, dates, values)
+    assert cache.get(1, 3) is None and len(cache) == 1
@@ -0,0 +1,187 @@
+import asyncio
+import threading
+import time
+import pytest
+from fastapi import HTTPException
+from app.async_database import AsyncDatabase
+
+
+def _run(scenario, **options):
+    """Exécute scenario(db) sur une couche asynchrone dédiée, fermée ensuite.
+    """
+    async def main():
+        db = AsyncDatabase(**options)
+        try:
+            return await scenario(db)
+        finally:
+            db.close()
+
+    return asyncio.run(main())
+
+
+def _table(name):
+    def create(conn):
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {name} (value INTEGER)")
+        conn.execute(f"DELETE FROM {name}")
+    return create
+
+
+def test_failed_write_is_rolled_back():
+    async def scenario(db):
+        await db.write(_table("rolled_back"))
+
+        def insert_then_fail(conn):
+            conn.execute("INSERT INTO rolled_back VALUES (1)")
+            raise RuntimeError("échec")
+
+        with pytest.raises(RuntimeError):
+            await db.write(insert_then_fail)
+        return await db.read(lambda conn: conn.execute("SELECT COUNT(*) FROM rolled_back").fetchone()[0])
+
+    assert _run(scenario) == 0
+
+
+def test_after_commit_runs_only_for_committed_writes():
+    called = []
+
+    async def scenario(db):
+        def write(conn, fail):
+            db.after_commit(lambda: called.append(fail))
+            if fail:
+                raise RuntimeError("échec")
+
+        await db.write(write, False)
+        with pytest.raises(RuntimeError):
+            await db.write(write, True)
+
+    _run(scenario)
+    assert called == [False]
+
+
+def test_reads_do_not_wait_for_a_running_write():
+    writing = threading.Event()
+    release = threading.Event()
+
+    async def scenario(db):
+        await db.write(_table("slow_write"))
+        await db.write(lambda conn: conn.execute("INSERT INTO slow_write VALUES (1)"))
+
+        def slow_write(conn):
+            conn.execute("INSERT INTO slow_write VALUES (2)")
+            writing.set()
+            release.wait(5)
+
+        write = asyncio.ensure_future(db.write(slow_write))
+        await asyncio.get_running_loop().run_in_executor(None, writing.wait, 5)
+        # Lecture servie pendant la transaction d'écriture, sans ses lignes non validées
+        count = await db.read(lambda conn: conn.execute("SELECT COUNT(*) FROM slow_write").fetchone()[0])
+        done = write.done()
+        release.set()
+        await write
+        return count, done
+
+    assert _run(scenario) == (1, False)
+
+
+def test_event_loop_keeps_running_during_a_slow_read():
+    async def scenario(db):
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.ensure_future(ticker())
+        await db.read(lambda conn: time.sleep(0.2))
+        task.cancel()
+        return ticks
+
+    assert _run(scenario) >= 5
+
+
+def test_full_write_queue_answers_503():
+    release = threading.Event()
+
+    async def scenario(db):
+        first = asyncio.ensure_future(db.write(lambda conn: release.wait(5)))
+        await asyncio.sleep(0.01)
+        with pytest.raises(HTTPException) as error:
+            await db.write(lambda conn: None)
+        release.set()
+        await first
+        return error.value.status_code
+
+    assert _run(scenario, max_pending_writes=1, write_timeout=0.05) == 503
+
+
+def _grouped_insert(table):
+    def insert(conn, value):
+        if value < 0:
+            raise ValueError("valeur négative")
+        conn.execute(f"INSERT INTO {table} VALUES (?)", (value,))
+        return value
+    return insert
+
+
+def _values(table):
+    return lambda conn: [row[0] for row in conn.execute(f"SELECT value FROM {table} ORDER BY value")]
+
+
+def test_grouped_writes_fail_individually():
+    called = []
+
+    async def scenario(db):
+        await db.write(_table("grouped_writes"))
+        insert = _grouped_insert("grouped_writes")
+
+        def insert_and_notify(conn, value):
+            db.after_commit(lambda: called.append(value))
+            return insert(conn, value)
+
+        results = await asyncio.gather(*(db.write_grouped(insert_and_notify, value) for value in (1, -1, 2)),
+                                       return_exceptions=True)
+        return results, await db.read(_values("grouped_writes"))
+
+    results, stored = _run(scenario, group_commit=True, group_delay_ms=20)
+    assert results[0] == 1 and results[2] == 2 and isinstance(results[1], ValueError)
+    assert stored == [1, 2]
+    assert sorted(called) == [1, 2]  # Pas de callback pour l'écriture annulée
+
+
+def test_grouped_write_is_committed_when_acknowledged():
+    async def scenario(db):
+        await db.write(_table("grouped_acks"))
+        insert = _grouped_insert("grouped_acks")
+        seen = []
+        for value in (1, 2):
+            await db.write_grouped(insert, value)
+            seen.append(await db.read(_values("grouped_acks")))  # Connexion de lecture distincte
+        return seen
+
+    assert _run(scenario, group_commit=True, group_delay_ms=5) == [[1], [1, 2]]
+
+
+def test_grouped_batches_are_bounded_by_group_rows():
+    batches = []
+
+    async def scenario(db):
+        commit_group = db._commit_group
+        db._commit_group = lambda batch: batches.append(len(batch)) or commit_group(batch)
+        await db.write(_table("grouped_batches"))
+        insert = _grouped_insert("grouped_batches")
+        await asyncio.gather(*(db.write_grouped(insert, value) for value in range(5)))
+        return await db.read(_values("grouped_batches"))
+
+    assert _run(scenario, group_commit=True, group_rows=2, group_delay_ms=50) == [0, 1, 2, 3, 4]
+    assert batches == [2, 2, 1]
+
+
+def test_write_grouped_without_group_commit_commits_each_write():
+    async def scenario(db):
+        await db.write(_table("ungrouped"))
+        result = await db.write_grouped(_grouped_insert("ungrouped"), 7)
+        return result, await db.read(_values("ungrouped")), db.pending_grouped_writes
+
+    assert _run(scenario, group_commit=False) == (7, [7], 0)
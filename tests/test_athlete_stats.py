@@ -0,0 +1,98 @@
+from app.utils import athlete_stats
+
+DETAIL = "/performance/performances/poidspuissance/detail/{}"
+
+
+def _user(conn, name, weight=None):
+    id_user = conn.execute("INSERT INTO users (username, nom, prenom, email, password, role) "
+                           "VALUES (?, ?, ?, ?, 'x', 'athlete')", (name, name, name, f"{name}@example.com")).lastrowid
+    if weight is not None:
+        conn.execute("INSERT INTO details (id_user, weight) VALUES (?, ?)", (id_user, weight))
+        athlete_stats.set_weight(conn.cursor(), id_user, weight)
+    return id_user
+
+
+def _insert(conn, id_user, powers):
+    for power in powers:
+        conn.execute("INSERT INTO performances (id_user, power_max) VALUES (?, ?)", (id_user, power))
+    athlete_stats.record_inserted(conn.cursor(), id_user, powers)
+
+
+def test_maintained_ratios_match_full_aggregation(conn):
+    light, heavy = _user(conn, "light", 60), _user(conn, "heavy", 80)
+    _insert(conn, light, [300, 200])
+    _insert(conn, heavy, [320, None])
+
+    assert athlete_stats.check(conn) == []
+    assert [row["id_user"] for row in athlete_stats.top(conn, 2)] == [light, heavy]
+    _, position, total = athlete_stats.rank(conn, heavy)
+    assert (position, total) == (2, 2)
+
+    conn.execute("DELETE FROM performances WHERE id_user = ? AND power_max = 300", (light,))
+    athlete_stats.refresh(conn.cursor(), light)
+    assert athlete_stats.check(conn) == []
+    assert [row["id_user"] for row in athlete_stats.top(conn, 2)] == [heavy, light]
+
+
+def test_weight_change_updates_ratios(conn):
+    id_user = _user(conn, "athlete", 50)
+    _insert(conn, id_user, [300])
+    assert athlete_stats.top(conn)[0]["avg_wkg"] == 6
+
+    conn.execute("UPDATE details SET weight = 60 WHERE id_user = ?", (id_user,))
+    athlete_stats.set_weight(conn.cursor(), id_user, 60)
+    assert athlete_stats.top(conn)[0]["avg_wkg"] == 5
+    assert athlete_stats.check(conn) == []
+
+
+def test_unranked_athletes(conn):
+    no_weight = _user(conn, "no_weight")
+    _insert(conn, no_weight, [300])
+    zero_weight = _user(conn, "zero_weight", 0)
+    _insert(conn, zero_weight, [300])
+    no_power = _user(conn, "no_power", 70)
+    _insert(conn, no_power, [None])
+
+    assert athlete_stats.top(conn, 10) == []
+    assert [athlete_stats.rank(conn, id_user) for id_user in (no_weight, zero_weight, no_power)] == [None] * 3
+    assert athlete_stats.check(conn) == []
+
+
+def test_ties_rank_by_id_user(conn):
+    first, second = _user(conn, "first", 50), _user(conn, "second", 100)
+    _insert(conn, first, [200])
+    _insert(conn, second, [400])
+    assert [athlete_stats.rank(conn, id_user)[1] for id_user in (first, second)] == [1, 2]
+
+
+def test_populate_matches_incremental_maintenance(conn):
+    light, heavy = _user(conn, "light", 60), _user(conn, "heavy", 80)
+    _insert(conn, light, [300, 200])
+    _insert(conn, heavy, [320])
+    maintained = conn.execute("SELECT * FROM athlete_stats ORDER BY id_user").fetchall()
+
+    athlete_stats.populate(conn)
+    assert [tuple(row) for row in conn.execute("SELECT * FROM athlete_stats ORDER BY id_user")] == \
+        [tuple(row) for row in maintained]
+
+
+def test_detail_route_is_scoped_to_the_caller(client, make_user):
+    id_user, headers = make_user()
+    client.post(f"/admin/details/{id_user}", json={"gender": "x", "age": 30, "weight": 50, "height": 180})
+    client.post("/performance/performances/", json={"power_max": 300}, headers=headers)
+
+    own = client.get(DETAIL.format(id_user), headers=headers).json()
+    assert (own["rapport_moyen"], own["meilleur_rapport"]) == (6, 6)
+    assert 1 <= own["rang"] <= own["nombre_athletes"]
+
+    _, other_headers = make_user()
+    assert client.get(DETAIL.format(id_user), headers=other_headers).status_code == 403
+    _, coach_headers = make_user("coach")
+    assert client.get(DETAIL.format(id_user), headers=coach_headers).json() == own
+    response = client.get(DETAIL.format(id_user), headers={"Authorization": "Bearer not-a-token"})
+    assert response.status_code == 401
+
+
+def test_detail_route_without_ratio(client, make_user):
+    id_user, headers = make_user()
+    assert client.get(DETAIL.format(id_user), headers=headers).json() == {"message": "Aucune performance trouvée."}
@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta
+import sqlite3
+import jwt
+import pytest
+from app.async_database import db
+from app.database import DB_PATH
+from app.utils.auth import TOKEN_USER_SQL, TokenCache, token_cache
+from app.utils.security import SECRET_KEY
+
+# Routes qui doivent refuser un en-tête Authorization présent mais invalide
+PROTECTED_ROUTES = [
+    "/performance/percentile/{}",
+    "/performance/analytics/{}",
+]
+
+
+@pytest.mark.parametrize("path", PROTECTED_ROUTES)
+def test_invalid_token_is_rejected(client, path):
+    response = client.get(path.format(1), headers={"Authorization": "Bearer not-a-token"})
+    assert response.status_code == 401
+
+
+@pytest.mark.parametrize("path", PROTECTED_ROUTES)
+def test_valid_token_is_accepted(client, make_user, path):
+    id_user, headers = make_user()
+    assert client.get(path.format(id_user), headers=headers).status_code == 200
+
+
+@pytest.fixture
+def token_queries(monkeypatch):
+    """Compte les recherches de token en base faites par get_current_user.
+    """
+    queries = []
+    fetchone = db.fetchone
+
+    async def counting_fetchone(sql, params=()):
+        if sql == TOKEN_USER_SQL:
+            queries.append(params)
+        return await fetchone(sql, params)
+
+    monkeypatch.setattr(db, "fetchone", counting_fetchone)
+    token_cache.clear()
+    return queries
+
+
+def _token(headers):
+    return headers["Authorization"].split("Bearer ")[-1]
+
+
+def test_token_cache_evicts_least_recently_used():
+    cache = TokenCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert len(cache) == 2
+
+
+def test_token_cache_entries_expire_after_ttl():
+    cache = TokenCache(maxsize=10, ttl=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_token_cache_invalidates_every_token_of_a_user():
+    cache = TokenCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 1)
+    cache.set("c", 2)
+    cache.invalidate_user(1)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (None, None, 2)
+
+
+def test_cached_token_skips_the_database(client, make_user, token_queries):
+    _, headers = make_user()
+    for _ in range(3):
+        assert client.get("/performance/performances/", headers=headers).status_code == 200
+    assert token_queries == [(_token(headers),)]
+
+
+def test_forged_token_is_rejected_without_a_query(client, make_user, token_queries):
+    forged = jwt.encode({"sub": "x@example.com"}, "une-autre-cle-de-signature-bien-assez-longue", algorithm="HS256")
+    response = client.get("/performance/performances/", headers={"Authorization": f"Bearer {forged}"})
+    assert response.status_code == 401
+    assert token_queries == []
+
+
+def test_stored_token_past_its_exp_still_authenticates(client, make_user):
+    # Aucune route ne renouvelle les tokens : un compte ne doit pas expirer 72h après sa création
+    id_user, _ = make_user()
+    expired = jwt.encode({"sub": f"{id_user}", "exp": datetime.utcnow() - timedelta(days=1)},
+                         SECRET_KEY, algorithm="HS256")
+    with sqlite3.connect(DB_PATH) as conn:
+        conn.execute("UPDATE users SET token = ? WHERE id_user = ?", (expired, id_user))
+    response = client.get("/performance/performances/", headers={"Authorization": f"Bearer {expired}"})
+    assert response.status_code == 200
+
+
+def test_update_invalidates_the_cached_token(client, make_user, token_queries):
+    id_user, headers = make_user()
+    client.get("/performance/performances/", headers=headers)
+    assert token_cache.get(_token(headers)) == id_user
+
+    user = client.get(f"/admin/users/{id_user}").json()
+    body = {field: user[field] for field in ("username", "nom", "prenom", "email", "role")}
+    assert client.put(f"/admin/users/{id_user}", json={**body, "password": "password"}).status_code == 200
+    assert token_cache.get(_token(headers)) is None
+
+    assert client.get("/performance/performances/", headers=headers).status_code == 200
+    assert len(token_queries) == 2
+
+
+def test_deleted_user_token_is_rejected(client, make_user):
+    id_user, headers = make_user()
+    assert client.get("/performance/performances/", headers=headers).status_code == 200
+    client.delete(f"/admin/users/{id_user}")
+    assert client.get("/performance/performances/", headers=headers).status_code == 401
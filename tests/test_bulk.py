@@ -0,0 +1,89 @@
+import pytest
+from app.database import pool
+from app.routers import performances
+from app.utils import events, http_cache
+
+BULK = "/performance/performances/bulk"
+
+
+@pytest.fixture
+def published(monkeypatch):
+    """Événements programmés par les écritures (type, id_user, données).
+    """
+    published = []
+    monkeypatch.setattr(events, "publish_after_commit",
+                        lambda kind, id_user, payload: published.append((kind, id_user, payload)))
+    return published
+
+
+def _version(id_user):
+    with pool.connection() as conn:
+        return http_cache.get_version(conn, http_cache.performances_resource(id_user))[0]
+
+
+def test_bulk_reports_invalid_items_and_inserts_the_rest(client, make_user, published):
+    id_user, headers = make_user()
+    response = client.post(BULK, json=[{"power_max": 250}, {"power_max": "beaucoup"}, {"power_max": 300}],
+                           headers=headers)
+    body = response.json()
+    assert (body["inserted"], body["failed"]) == (2, 1)
+    assert [result["index"] for result in body["results"]] == [0, 1, 2]
+    assert body["results"][1]["errors"][0]["loc"] == ["power_max"]
+
+    ids = [body["results"][0]["id_performance"], body["results"][2]["id_performance"]]
+    listed = client.get("/performance/performances/", headers=headers).json()
+    assert [(p["id_performance"], p["power_max"]) for p in listed] == list(zip(ids, [250, 300]))
+    assert published == [("bulk_created", id_user, {"ids": ids})]
+
+
+def test_bulk_ids_follow_item_order_across_chunks(client, make_user, monkeypatch):
+    monkeypatch.setattr(performances, "BULK_INSERT_CHUNK", 2)
+    _, headers = make_user()
+    powers = [100, 500, 200, 400, 300]
+    body = client.post(BULK, json=[{"power_max": power} for power in powers], headers=headers).json()
+    ids = [result["id_performance"] for result in body["results"]]
+
+    for id_performance, power in zip(ids, powers):
+        response = client.get(f"/performance/performances/{id_performance}", headers=headers)
+        assert response.json()["power_max"] == power
+
+
+def test_bulk_without_valid_items_writes_nothing(client, make_user, published):
+    id_user, headers = make_user()
+    client.post("/performance/performances/", json={"power_max": 250}, headers=headers)
+    listed = client.get("/performance/performances/", headers=headers)
+    version = _version(id_user)
+    published.clear()
+
+    body = client.post(BULK, json=[{"power_max": "x"}, {"hr_max": []}], headers=headers).json()
+    assert (body["inserted"], body["failed"]) == (0, 2)
+    assert _version(id_user) == version
+    assert published == []
+    cached = client.get("/performance/performances/", headers={**headers, "If-None-Match": listed.headers["ETag"]})
+    assert cached.status_code == 304
+
+
+def test_bulk_accepts_ndjson(client, make_user):
+    _, headers = make_user()
+    response = client.post(BULK, content=b'{"power_max": 1}\n\n{"power_max": 2}\n',
+                           headers={**headers, "Content-Type": "application/x-ndjson"})
+    assert response.json()["inserted"] == 2
+
+
+@pytest.mark.parametrize("content", [b"[{", b'{"power_max": 1}'])
+def test_bulk_rejects_unreadable_bodies(client, make_user, content):
+    _, headers = make_user()
+    response = client.post(BULK, content=content, headers={**headers, "Content-Type": "application/json"})
+    assert response.status_code == 400
+
+
+def test_bulk_rejects_oversized_batches(client, make_user, monkeypatch):
+    monkeypatch.setattr(performances, "BULK_MAX_ITEMS", 2)
+    _, headers = make_user()
+    response = client.post(BULK, json=[{"power_max": 1}] * 3, headers=headers)
+    assert response.status_code == 413
+
+
+def test_bulk_requires_a_valid_token(client):
+    response = client.post(BULK, json=[{"power_max": 1}], headers={"Authorization": "Bearer not-a-token"})
+    assert response.status_code == 401
@@ -0,0 +1,90 @@
+import threading
+import time
+import pytest
+from app.database import DB_BUSY_TIMEOUT_MS, ConnectionPool
+
+
+@pytest.fixture
+def make_pool(tmp_path):
+    pools = []
+
+    def make_pool(**kwargs):
+        pools.append(ConnectionPool(str(tmp_path / "pool.db"), **kwargs))
+        return pools[-1]
+
+    yield make_pool
+    for pool in pools:
+        pool.close_all()
+
+
+def test_connections_are_configured_once(make_pool):
+    pool = make_pool(pool_size=1, max_overflow=0)
+    with pool.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == DB_BUSY_TIMEOUT_MS
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+        assert conn.execute("SELECT 1 AS un").fetchone()["un"] == 1
+        first = conn
+    with pool.connection() as conn:
+        assert conn is first
+
+
+def test_pool_reuses_connections_and_closes_overflow(make_pool):
+    pool = make_pool(pool_size=1, max_overflow=1, timeout=0.1)
+    first = pool.acquire()
+    second = pool.acquire()  # Connexion de débordement
+    assert pool.stats()["open"] == 2
+
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+
+    pool.release(first)
+    pool.release(second)  # Pool plein : fermée
+    stats = pool.stats()
+    assert (stats["open"], stats["idle"], stats["checked_out"]) == (1, 1, 0)
+    with pool.connection() as conn:
+        assert conn is first
+
+
+def test_waiting_acquire_gets_the_released_connection(make_pool):
+    pool = make_pool(pool_size=1, max_overflow=0, timeout=5)
+    held = pool.acquire()
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+    waiter.start()
+    while pool.stats()["waiting"] == 0:
+        time.sleep(0.001)
+
+    pool.release(held)
+    waiter.join(5)
+    assert acquired == [held]
+    pool.release(held)
+
+
+def test_released_connection_is_rolled_back(make_pool):
+    pool = make_pool(pool_size=1, max_overflow=0)
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE t (x)")
+        conn.commit()
+        conn.execute("INSERT INTO t VALUES (1)")
+    with pool.connection() as conn:
+        assert not conn.in_transaction
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+
+def test_broken_connection_is_not_reused(make_pool):
+    pool = make_pool(pool_size=1, max_overflow=0)
+    conn = pool.acquire()
+    conn.close()
+    pool.release(conn)
+    assert pool.stats()["open"] == 0
+    with pool.connection() as fresh:
+        assert fresh is not conn
+
+
+def test_warm_opens_the_whole_pool(make_pool):
+    pool = make_pool(pool_size=3, max_overflow=0)
+    prepared = []
+    pool.warm(prepared.append)
+    assert len(set(map(id, prepared))) == 3
+    assert pool.stats()["idle"] == 3
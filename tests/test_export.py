@@ -0,0 +1,38 @@
+import csv
+import io
+
+
+def _exported_users(response):
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    return {int(row["id_user"]) for row in rows}
+
+
+def test_export_requires_valid_token(client):
+    response = client.get("/performance/export/", headers={"Authorization": "Bearer not-a-token"})
+    assert response.status_code == 401
+
+
+def test_athlete_exports_only_own_performances(client, make_user):
+    athlete, headers = make_user()
+    other, other_headers = make_user()
+    client.post("/performance/performances/", json={"power_max": 300}, headers=headers)
+    client.post("/performance/performances/", json={"power_max": 250}, headers=other_headers)
+
+    response = client.get("/performance/export/", headers=headers)
+    assert response.status_code == 200
+    assert _exported_users(response) == {athlete}
+
+    response = client.get("/performance/export/", params={"id_user": other}, headers=headers)
+    assert response.status_code == 403
+
+
+def test_coach_exports_requested_athletes(client, make_user):
+    athlete, headers = make_user()
+    other, other_headers = make_user()
+    _, coach_headers = make_user("coach")
+    client.post("/performance/performances/", json={"power_max": 300}, headers=headers)
+    client.post("/performance/performances/", json={"power_max": 250}, headers=other_headers)
+
+    response = client.get("/performance/export/", params={"id_user": [athlete, other]}, headers=coach_headers)
+    assert response.status_code == 200
+    assert _exported_users(response) == {athlete, other}
@@ -0,0 +1,83 @@
+import io
+import json
+import pytest
+from extraction import iter_json_entries
+
+DOCUMENTS = [
+    "[1.5, 2]",
+    "[1e5]",
+    "[-12.25e-3, 0, 42]",
+    '[{"power.max": 310.5, "vo2.class": [74, 88]}, {"hr.max": 190}]',
+    '{"power.max": 1234.5}',
+    "  [ ]  ",
+    "3.25",
+]
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 8, 64])
+def test_entries_split_at_any_chunk_boundary(document, chunk_size):
+    expected = json.loads(document)
+    expected = expected if isinstance(expected, list) else [expected]
+    assert list(iter_json_entries(io.StringIO(document), chunk_size)) == expected
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64])
+def test_invalid_json_is_reported(chunk_size):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_entries(io.StringIO("[1, 2"), chunk_size))
+
+
+def test_writer_keeps_draining_after_any_error(tmp_path, monkeypatch):
+    import queue
+    import threading
+    import extraction
+
+    def failing_store(*args):
+        raise RuntimeError("échec d'écriture")
+
+    monkeypatch.setattr(extraction, "DB_PATH", str(tmp_path / "load.db"))
+    monkeypatch.setattr(extraction.samples, "store", failing_store)
+    row = extraction.performance_row({"power.max": 300}, 1, "2025-01-01 00:00:00")
+    rows_queue = queue.Queue(maxsize=2)
+    stats = {"rows": 0}
+    writer = threading.Thread(target=extraction._write_rows, args=(rows_queue, 10, stats))
+    writer.start()
+
+    for _ in range(5):  # Plus de lots que la file n'en contient : bloquerait si l'écrivain s'arrêtait
+        rows_queue.put([(row, {"trial": {}})], timeout=5)
+    rows_queue.put(None, timeout=5)
+    writer.join(5)
+
+    assert not writer.is_alive()
+    assert isinstance(stats["error"], RuntimeError)
+
+
+def test_sequential_load_batches_every_file_in_one_transaction(tmp_path, monkeypatch):
+    import sqlite3
+    import extraction
+
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "sbj_1.json").write_text(json.dumps([{"power.max": power} for power in (250, 300, 280)]))
+    (data / "sbj_2.json").write_text('[{"power.max": 400}, {"power.max": ')  # Tronqué après une entrée
+    monkeypatch.setattr(extraction, "JSON_DIR", str(data))
+    monkeypatch.setattr(extraction, "DB_PATH", str(tmp_path / "load.db"))
+
+    statements = []
+    open_connection = extraction.open_connection
+
+    def traced_connection():
+        connection = open_connection()
+        connection.set_trace_callback(statements.append)
+        return connection
+
+    monkeypatch.setattr(extraction, "open_connection", traced_connection)
+    assert extraction.load_json_files(batch_size=2) == 4
+
+    inserts = [i for i, sql in enumerate(statements) if sql.lstrip().startswith("INSERT INTO performances")]
+    assert len(inserts) == 4
+    assert "COMMIT" not in statements[inserts[0]:inserts[-1]]  # Une seule transaction pour tous les fichiers
+    with sqlite3.connect(tmp_path / "load.db") as conn:
+        rows = conn.execute("SELECT id_user, power_max FROM performances ORDER BY id_performance").fetchall()
+    assert rows == [(1, 250), (1, 300), (1, 280), (2, 400)]
@@ -0,0 +1,107 @@
+from app.utils.http_cache import ResponseCache
+
+
+def test_conditional_get_returns_304_until_the_next_write(client, make_user):
+    _, headers = make_user()
+    client.post("/performance/performances/", json={"power_max": 250}, headers=headers)
+
+    first = client.get("/performance/performances/", headers=headers)
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and "Last-Modified" in first.headers
+
+    cached = client.get("/performance/performances/", headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+
+    client.post("/performance/performances/", json={"power_max": 300}, headers=headers)
+    changed = client.get("/performance/performances/", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert [p["power_max"] for p in changed.json()] == [250, 300]
+
+
+def test_variants_of_a_resource_have_distinct_etags(client, make_user):
+    _, headers = make_user()
+    client.post("/performance/performances/", json={"power_max": 250}, headers=headers)
+
+    full = client.get("/performance/performances/", headers=headers)
+    page = client.get("/performance/performances/", params={"limit": 1}, headers=headers)
+    assert full.headers["ETag"] != page.headers["ETag"]
+
+
+def test_details_etag_changes_on_update(client, make_user):
+    id_user, _ = make_user()
+    body = {"gender": "f", "age": 30, "weight": 60, "height": 170}
+    assert client.post(f"/admin/details/{id_user}", json=body).status_code == 200
+
+    etag = client.get(f"/admin/details/{id_user}").headers["ETag"]
+    assert client.get(f"/admin/details/{id_user}", headers={"If-None-Match": etag}).status_code == 304
+
+    client.put(f"/admin/details/{id_user}", json={**body, "weight": 58})
+    response = client.get(f"/admin/details/{id_user}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["weight"] == 58
+
+
+def test_update_and_delete_invalidate_the_etag(client, make_user):
+    _, headers = make_user()
+    created = client.post("/performance/performances/", json={"power_max": 250}, headers=headers).json()
+    path = f"/performance/performances/{created['id_performance']}"
+
+    etag = client.get("/performance/performances/", headers=headers).headers["ETag"]
+    client.put(path, json={"power_max": 260}, headers=headers)
+    updated = client.get("/performance/performances/", headers={**headers, "If-None-Match": etag})
+    assert updated.status_code == 200 and updated.json()[0]["power_max"] == 260
+
+    etag = updated.headers["ETag"]
+    client.delete(path, headers=headers)
+    deleted = client.get("/performance/performances/", headers={**headers, "If-None-Match": etag})
+    assert deleted.status_code == 200 and deleted.json() == []
+
+
+def test_writes_of_one_athlete_keep_other_etags(client, make_user):
+    _, headers = make_user()
+    _, other_headers = make_user()
+    client.post("/performance/performances/", json={"power_max": 250}, headers=headers)
+    etag = client.get("/performance/performances/", headers=headers).headers["ETag"]
+
+    client.post("/performance/performances/", json={"power_max": 300}, headers=other_headers)
+    assert client.get("/performance/performances/", headers={**headers, "If-None-Match": etag}).status_code == 304
+
+
+def test_conditional_headers(client, make_user):
+    _, headers = make_user()
+    client.post("/performance/performances/", json={"power_max": 250}, headers=headers)
+    first = client.get("/performance/performances/", headers=headers)
+
+    def status(**conditions):
+        return client.get("/performance/performances/", headers={**headers, **conditions}).status_code
+
+    assert status(**{"If-None-Match": f'W/"0-0", {first.headers["ETag"]}'}) == 304
+    assert status(**{"If-None-Match": "*"}) == 304
+    assert status(**{"If-None-Match": 'W/"0-0"'}) == 200
+    assert status(**{"If-Modified-Since": first.headers["Last-Modified"]}) == 304
+    assert status(**{"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"}) == 200
+    assert status(**{"If-Modified-Since": "hier"}) == 200
+    # If-None-Match l'emporte sur If-Modified-Since
+    assert status(**{"If-None-Match": 'W/"0-0"', "If-Modified-Since": first.headers["Last-Modified"]}) == 200
+
+
+def test_response_cache_serves_only_the_current_version():
+    cache = ResponseCache(max_bytes=1000)
+    cache.set(("r", ""), 1, b"v1")
+    assert cache.get(("r", ""), 1) == (b"v1", {})
+    assert cache.get(("r", ""), 2) is None
+    assert len(cache) == 0 and cache.size == 0
+
+
+def test_response_cache_is_bounded_in_bytes():
+    cache = ResponseCache(max_bytes=100)
+    cache.set(("big", ""), 1, b"x" * 26)  # Plus du quart du cache : jamais gardé
+    assert cache.get(("big", ""), 1) is None
+
+    for name in "abcde":
+        cache.set((name, ""), 1, b"x" * 25)
+    assert cache.size == 100 and cache.get(("a", ""), 1) is None
+    cache.get(("b", ""), 1)
+    cache.set(("f", ""), 1, b"x" * 25)
+    assert [cache.get((name, ""), 1) is not None for name in "bcdef"] == [True, False, True, True, True]
@@ -0,0 +1,59 @@
+from app.utils import leaderboard
+
+
+def _user(conn, name):
+    return conn.execute("INSERT INTO users (username, nom, prenom, email, password, role) "
+                        "VALUES (?, ?, ?, ?, 'x', 'athlete')", (name, name, name, f"{name}@example.com")).lastrowid
+
+
+def _performance(conn, id_user, power):
+    return conn.execute("INSERT INTO performances (id_user, power_max) VALUES (?, ?)", (id_user, power)).lastrowid
+
+
+def test_orphan_performances_do_not_take_leaderboard_slots(conn):
+    id_user = _user(conn, "athlete")
+    for i in range(leaderboard.LEADERBOARD_SIZE + 50):
+        _performance(conn, 10_000, 200 + i)  # Aucun utilisateur 10000
+    _performance(conn, id_user, 100)
+    leaderboard.populate(conn)
+
+    assert [row["id_user"] for row in leaderboard.top(conn, "power_max")] == [id_user]
+    assert leaderboard.check(conn) == {}
+
+
+def test_record_ignores_orphan_performances(conn):
+    id_user = _user(conn, "athlete")
+    ids = [_performance(conn, 10_000, 200 + i) for i in range(leaderboard.LEADERBOARD_SIZE + 50)]
+    leaderboard.record(conn.cursor(), ids)
+    leaderboard.record(conn.cursor(), [_performance(conn, id_user, 100)])
+
+    assert [row["id_user"] for row in leaderboard.top(conn, "power_max")] == [id_user]
+
+
+def test_forget_user_refills_leaderboard(conn):
+    best = _user(conn, "best")
+    other = _user(conn, "other")
+    leaderboard.record(conn.cursor(), [_performance(conn, best, 400), _performance(conn, other, 300)])
+
+    conn.execute("DELETE FROM users WHERE id_user = ?", (best,))
+    leaderboard.forget_user(conn.cursor(), best)
+
+    assert [row["id_user"] for row in leaderboard.top(conn, "power_max", 10)] == [other]
+    assert conn.execute("SELECT COUNT(*) FROM leaderboard WHERE metric = 'power_max'").fetchone()[0] == 1
+
+
+def test_leaderboard_route_requires_a_valid_token(client):
+    response = client.get("/performance/performances/leaderboard/power_max",
+                          headers={"Authorization": "Bearer not-a-token"})
+    assert response.status_code == 401
+    assert client.get("/performance/performances/leaderboard/power_max").status_code == 401
+
+
+def test_leaderboard_route_ranks_by_metric(client, make_user):
+    _, headers = make_user()
+    for power in (999_001, 999_003, 999_002):  # Au-dessus des performances des autres tests
+        client.post("/performance/performances/", json={"power_max": power}, headers=headers)
+
+    response = client.get("/performance/performances/leaderboard/power_max", params={"limit": 2}, headers=headers)
+    assert [entry["power_max"] for entry in response.json()] == [999_003, 999_002]
+    assert client.get("/performance/performances/leaderboard/poids", headers=headers).status_code == 404
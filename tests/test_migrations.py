@@ -0,0 +1,57 @@
+import sqlite3
+import pytest
+from app.migrations import MIGRATIONS, SCHEMA_VERSION, get_schema_version, migrate
+
+
+def _migrate_to(conn, version):
+    """Applique les migrations jusqu'à `version` incluse."""
+    for target, _, statements in MIGRATIONS:
+        if target > version:
+            break
+        for step in statements:
+            step(conn) if callable(step) else conn.execute(step)
+        conn.execute(f"PRAGMA user_version = {target}")
+    conn.commit()
+
+
+def test_migrations_apply_to_a_database_at_each_version():
+    for version in range(SCHEMA_VERSION + 1):
+        conn = sqlite3.connect(":memory:")
+        _migrate_to(conn, version)
+        assert migrate(conn) == SCHEMA_VERSION
+        assert get_schema_version(conn) == SCHEMA_VERSION
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(athlete_stats)")}
+        assert "best_vo2" in columns
+        conn.close()
+
+
+def test_migrations_fill_rankings_and_stats_from_existing_rows():
+    conn = sqlite3.connect(":memory:")
+    _migrate_to(conn, 2)
+    conn.execute("INSERT INTO users (username, nom, prenom, email, password, role) "
+                 "VALUES ('a', 'a', 'a', 'a@example.com', 'x', 'athlete')")
+    conn.execute("INSERT INTO details (id_user, weight) VALUES (1, 50)")
+    conn.executemany("INSERT INTO performances (id_user, power_max, vo2_max) VALUES (1, ?, ?)",
+                     [(300, 60), (200, None)])
+    conn.execute("INSERT INTO performances (id_user, power_max) VALUES (99, 400)")  # Utilisateur inconnu
+    conn.commit()
+
+    migrate(conn)
+    ranked = conn.execute("SELECT metric, value FROM leaderboard ORDER BY metric, value DESC").fetchall()
+    assert ranked == [("power_max", 300), ("power_max", 200), ("vo2_max", 60)]
+    stats = conn.execute("SELECT session_count, best_power, best_vo2, avg_wkg FROM athlete_stats").fetchall()
+    assert stats == [(2, 300, 60, 5)]
+    conn.close()
+
+
+def test_duplicate_details_stop_migration_without_deleting_rows():
+    conn = sqlite3.connect(":memory:")
+    _migrate_to(conn, 1)
+    conn.executemany("INSERT INTO details (id_user, age) VALUES (?, ?)", [(1, 30), (1, 31), (2, 40)])
+    conn.commit()
+
+    with pytest.raises(RuntimeError, match="details.id_user"):
+        migrate(conn)
+    assert get_schema_version(conn) == 1
+    assert conn.execute("SELECT COUNT(*) FROM details").fetchone()[0] == 3
+    conn.close()
@@ -0,0 +1,46 @@
+PATH = "/performance/percentile/{}"
+
+
+def _cohort(client, make_user, gender, powers):
+    athletes = []
+    for power in powers:
+        id_user, headers = make_user()
+        client.post(f"/admin/details/{id_user}", json={"gender": gender, "age": 33, "weight": 70, "height": 180})
+        client.post("/performance/performances/", json={"power_max": power}, headers=headers)
+        athletes.append((id_user, headers))
+    return athletes
+
+
+def test_percentiles_within_a_cohort(client, make_user):
+    athletes = _cohort(client, make_user, "cohorte-rang", (200, 300, 400))
+    id_user, headers = athletes[1]
+    result = client.get(PATH.format(id_user), headers=headers).json()
+    power = result["metriques"]["power_max"]
+    assert (power["rang"], power["taille_cohorte"], power["percentile"]) == (2, 3, 50.0)
+
+
+def test_new_best_value_moves_the_percentile(client, make_user):
+    athletes = _cohort(client, make_user, "cohorte-maj", (200, 300))
+    id_user, headers = athletes[0]
+    assert client.get(PATH.format(id_user), headers=headers).json()["metriques"]["power_max"]["rang"] == 2
+
+    client.post("/performance/performances/", json={"power_max": 350}, headers=headers)
+    power = client.get(PATH.format(id_user), headers=headers).json()["metriques"]["power_max"]
+    assert (power["rang"], power["taille_cohorte"]) == (1, 2)
+
+
+def test_athlete_without_cohort(client, make_user):
+    id_user, headers = make_user()
+    response = client.get(PATH.format(id_user), headers=headers)
+    assert response.json() == {"message": "Aucune cohorte trouvée (genre et âge requis)."}
+
+
+def test_percentile_is_scoped_to_the_caller(client, make_user):
+    [(id_user, headers)] = _cohort(client, make_user, "cohorte-acces", (250,))
+    path = PATH.format(id_user)
+
+    _, other_headers = make_user()
+    assert client.get(path, headers=other_headers).status_code == 403
+    _, coach_headers = make_user("coach")
+    assert client.get(path, headers=coach_headers).json() == client.get(path, headers=headers).json()
+    assert client.get(path, headers={"Authorization": "Bearer not-a-token"}).status_code == 401
@@ -0,0 +1,49 @@
+import pytest
+from app.schemas.performance import PerformanceQuery
+from app.utils import performance_query
+
+
+def _insert(conn, id_user, powers):
+    return [conn.execute("INSERT INTO performances (id_user, power_max, date_performance) VALUES (?, ?, ?)",
+                         (id_user, power, f"2025-01-{day + 1:02d} 00:00:00")).lastrowid
+            for day, power in enumerate(powers)]
+
+
+def _pages(conn, id_users, **query):
+    cursor, ids = None, []
+    while True:
+        result = performance_query.run(conn, PerformanceQuery(cursor=cursor, **query), id_users)
+        ids.extend(line[0] for line in result["lignes"])
+        cursor = result["curseur_suivant"]
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize("sort", ["power_max", "-power_max"])
+@pytest.mark.parametrize("limit", [1, 2, 3, 10])
+def test_nullable_sort_keeps_null_rows_last(conn, sort, limit):
+    ids = _insert(conn, 1, [300, None, 250, None, 400])
+    with_value = sorted((power, id_performance) for id_performance, power in zip(ids, [300, None, 250, None, 400])
+                        if power is not None)
+    if sort.startswith("-"):
+        with_value.reverse()
+    nulls = [ids[1], ids[3]] if not sort.startswith("-") else [ids[3], ids[1]]
+
+    pages = _pages(conn, [1], sort=sort, limit=limit, fields=["id_performance"])
+    assert pages == [id_performance for _, id_performance in with_value] + nulls
+
+
+def test_bounded_sort_column_excludes_null_rows(conn):
+    ids = _insert(conn, 1, [300, None, 250])
+    pages = _pages(conn, [1], sort="power_max", ranges={"power_max": {"min": 0}}, fields=["id_performance"])
+    assert pages == [ids[2], ids[0]]
+
+
+@pytest.mark.parametrize("line", [
+    "SEARCH performances USING INDEX idx_performances_user_date (id_user=?)",
+    "SEARCH TABLE performances USING INDEX idx_performances_user_date (id_user=?)",
+])
+def test_plan_lines_of_every_sqlite_version_are_costed(conn, line):
+    cost = performance_query.planner.estimate(conn, [line])
+    assert cost["index"] == "idx_performances_user_date"
+    assert not cost["parcours_complet"]
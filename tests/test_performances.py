@@ -0,0 +1,30 @@
+import json
+from app.routers import performances
+
+
+def _create(client, headers, *powers):
+    for power in powers:
+        assert client.post("/performance/performances/", json={"power_max": power}, headers=headers).status_code == 200
+
+
+def test_json_list_without_limit_is_paginated(client, make_user, monkeypatch):
+    monkeypatch.setattr(performances, "DEFAULT_PAGE_SIZE", 2)
+    _, headers = make_user()
+    _create(client, headers, 250, 300, 280)
+
+    first = client.get("/performance/performances/", headers=headers)
+    assert [p["power_max"] for p in first.json()] == [250, 300]
+    cursor = first.headers["X-Next-Cursor"]
+
+    second = client.get("/performance/performances/", params={"cursor": cursor}, headers=headers)
+    assert [p["power_max"] for p in second.json()] == [280]
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_ndjson_streams_the_whole_history(client, make_user, monkeypatch):
+    monkeypatch.setattr(performances, "DEFAULT_PAGE_SIZE", 2)
+    _, headers = make_user()
+    _create(client, headers, 250, 300, 280)
+
+    response = client.get("/performance/performances/", params={"format": "ndjson"}, headers=headers)
+    assert [json.loads(line)["power_max"] for line in response.text.splitlines()] == [250, 300, 280]
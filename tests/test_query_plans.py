@@ -0,0 +1,10 @@
+import pytest
+from app.migrations import explain, hot_queries
+
+HOT_QUERIES = hot_queries()
+
+
+@pytest.mark.parametrize("name, sql, params, index", HOT_QUERIES, ids=[query[0] for query in HOT_QUERIES])
+def test_hot_query_uses_its_index(conn, name, sql, params, index):
+    plan = explain(conn, sql, params)
+    assert any(index in line for line in plan), f"{name} n'utilise pas {index} : {plan}"
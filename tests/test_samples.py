@@ -0,0 +1,102 @@
+import os
+import sqlite3
+import numpy as np
+import pytest
+from app.utils import samples
+
+POWER = np.array([100, 150, 200, 300], dtype=np.float32)
+
+
+def _performance(conn):
+    return conn.execute("INSERT INTO performances (id_user) VALUES (1)").lastrowid
+
+
+def test_channel_ranges_round_trip_as_float32(conn):
+    id_performance = _performance(conn)
+    power = np.array([100, 150, np.nan, 300], dtype=np.float64)
+    samples.store(conn.cursor(), id_performance, {"incremental": {"power": power}})
+
+    listed = samples.list_samples(conn, id_performance)
+    assert [tuple(row) for row in listed] == [("incremental", "power", 4, 100.0, 300.0, pytest.approx(550 / 3))]
+    assert samples.read_range(conn, id_performance, "incremental", "power", 1, 2).tolist() == [150.0]
+    values = samples.read_range(conn, id_performance, "incremental", "power")
+    assert values.dtype == samples.DTYPE and np.isnan(values[2])
+    assert samples.read_range(conn, id_performance, "incremental", "hr") is None
+
+
+@pytest.mark.parametrize("start, stop, expected", [
+    (0, None, [100, 150, 200, 300]),
+    (2, 100, [200, 300]),  # Fin bornée au nombre d'échantillons
+    (3, 3, []),
+    (3, 1, []),
+    (10, None, []),
+])
+def test_range_bounds(conn, start, stop, expected):
+    id_performance = _performance(conn)
+    samples.store(conn.cursor(), id_performance, {"a": {"power": POWER}})
+    values = samples.read_range(conn, id_performance, "a", "power", start, stop)
+    assert values.dtype == samples.DTYPE and values.tolist() == expected
+
+
+def test_storing_a_channel_again_replaces_it(conn):
+    id_performance = _performance(conn)
+    samples.store(conn.cursor(), id_performance, {"a": {"power": POWER}})
+    samples.store(conn.cursor(), id_performance, {"a": {"power": np.array([np.nan], dtype=np.float32)}})
+
+    [row] = samples.list_samples(conn, id_performance)
+    assert tuple(row) == ("a", "power", 1, None, None, None)  # Canal sans mesure : pas de résumé
+    assert np.isnan(samples.read_range(conn, id_performance, "a", "power")).all()
+
+
+def test_session_maxima_ignore_missing_values():
+    trials = {"a": {"power": np.array([200, np.nan], dtype=np.float32), "hr": np.array([np.nan], dtype=np.float32)},
+              "b": {"power": np.array([250], dtype=np.float32), "time": np.array([1], dtype=np.float32)}}
+    assert samples.session_maxima(trials) == {"power_max": 250.0}
+
+
+@pytest.mark.parametrize("content", ["Power,HR\n100,150\n,160\n", "100,150\n,160\n"])
+def test_trial_csv_with_or_without_header(tmp_path, content):
+    path = tmp_path / "trial.csv"
+    path.write_text(content, encoding="utf-8")
+    channels = samples.read_trial_csv(path, ["power", "hr"])
+    assert set(channels) == {"power", "hr"}
+    assert channels["hr"].dtype == samples.DTYPE and channels["hr"].tolist() == [150, 160]
+    assert channels["power"][0] == 100 and np.isnan(channels["power"][1])
+
+
+def _performance_with_samples(client, headers):
+    id_performance = client.post("/performance/performances/", json={"power_max": 300},
+                                 headers=headers).json()["id_performance"]
+    with sqlite3.connect(os.environ["DB_PATH"]) as db_conn:
+        samples.store(db_conn.cursor(), id_performance, {"incremental": {"power": POWER}})
+    return f"/performance/performances/{id_performance}/samples"
+
+
+def test_sample_routes(client, make_user):
+    _, headers = make_user()
+    path = _performance_with_samples(client, headers)
+
+    assert client.get(path, headers=headers).json() == [
+        {"trial": "incremental", "channel": "power", "sample_count": 4,
+         "min_value": 100.0, "max_value": 300.0, "mean_value": 187.5}]
+    power = f"{path}/incremental/power"
+    assert client.get(power, params={"start": 1, "stop": 3}, headers=headers).json() == [150, 200]
+
+    raw = client.get(power, params={"format": "raw", "start": 2}, headers=headers)
+    assert raw.headers["content-type"] == "application/octet-stream"
+    assert (raw.headers["X-Sample-Dtype"], raw.headers["X-Sample-Count"]) == ("<f4", "2")
+    assert np.frombuffer(raw.content, dtype="<f4").tolist() == [200, 300]
+
+    assert client.get(f"{path}/incremental/hr", headers=headers).status_code == 404
+    assert client.get(power, params={"start": -1}, headers=headers).status_code == 422
+    assert client.get(power, params={"format": "csv"}, headers=headers).status_code == 422
+
+
+def test_samples_of_another_athlete_are_not_found(client, make_user):
+    _, headers = make_user()
+    path = _performance_with_samples(client, headers)
+
+    _, other_headers = make_user()
+    assert client.get(path, headers=other_headers).status_code == 404
+    assert client.get(f"{path}/incremental/power", headers=other_headers).status_code == 404
+    assert client.get(path, headers={"Authorization": "Bearer not-a-token"}).status_code == 401
@@ -0,0 +1,57 @@
+import asyncio
+from app.utils import security
+
+
+def test_hash_pool_does_not_fork_the_server_process():
+    assert security._get_hash_executor()._mp_context.get_start_method() != "fork"
+
+
+def test_async_hash_round_trip():
+    async def scenario():
+        hashed = await security.hash_password_async("secret")
+        assert not security.needs_rehash(hashed)
+        assert await security.verify_password_async("secret", hashed)
+        assert not await security.verify_password_async("other", hashed)
+
+    asyncio.run(scenario())
+
+
+def test_rehash_if_changed_runs_bcrypt_once(monkeypatch):
+    stored = security.hash_password("secret")
+    calls = []
+    hashpw = security.bcrypt.hashpw
+    monkeypatch.setattr(security.bcrypt, "hashpw", lambda *args: calls.append(args) or hashpw(*args))
+
+    assert security.rehash_if_changed("secret", stored) == stored
+    changed = security.rehash_if_changed("nouveau", stored)
+    assert len(calls) == 2  # Une exécution par appel, mot de passe changé ou non
+    assert changed != stored and security.verify_password("nouveau", changed)
+    assert not security.needs_rehash(changed)
+
+
+def test_rehash_if_changed_uses_a_fresh_salt_for_outdated_or_invalid_hashes():
+    outdated = security.bcrypt.hashpw(b"secret", security.bcrypt.gensalt(rounds=5)).decode()
+    rehashed = security.rehash_if_changed("secret", outdated)
+    assert rehashed[:29] != outdated[:29] and not security.needs_rehash(rehashed)
+
+    for invalid in ("plain-text", f"$2b${security.BCRYPT_ROUNDS:02d}$court"):
+        assert security.verify_password("secret", security.rehash_if_changed("secret", invalid))
+
+
+def test_update_keeps_the_hash_of_an_unchanged_password(client, make_user):
+    import sqlite3
+    from app.database import DB_PATH
+
+    def stored_hash():
+        with sqlite3.connect(DB_PATH) as conn:
+            return conn.execute("SELECT password FROM users WHERE id_user = ?", (id_user,)).fetchone()[0]
+
+    id_user, _ = make_user()
+    user = client.get(f"/admin/users/{id_user}").json()
+    body = {field: user[field] for field in ("username", "nom", "prenom", "email", "role")}
+    before = stored_hash()
+
+    assert client.put(f"/admin/users/{id_user}", json={**body, "password": "password"}).status_code == 200
+    assert stored_hash() == before
+    assert client.put(f"/admin/users/{id_user}", json={**body, "password": "nouveau"}).status_code == 200
+    assert security.verify_password("nouveau", stored_hash())
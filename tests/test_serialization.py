@@ -0,0 +1,43 @@
+import json
+from datetime import datetime
+import pytest
+from app.schemas.performance import PerformanceResponse
+from app.utils import serialization
+from app.utils.serialization import RowEncoder
+
+ROWS = [
+    (250.5, 190.0, None, 45.0, 100.0, "[74, 88]", 5, 1, 4, "2025-01-01 10:00:00"),
+    (None, None, 61.25, None, None, None, None, 2, 4, "2025-01-02 08:30:00.250000"),
+    (0.1 + 0.2, 1e20, -3.5, 0.0, 1.0, 'guillemets " , virgules } é\n', 0, 3, 5, datetime(2025, 1, 3, 7, 0, 1)),
+]
+
+
+@pytest.fixture(params=["orjson", "json"])
+def encoder(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(serialization, "orjson", None)
+    return RowEncoder(PerformanceResponse)
+
+
+def _pydantic(row):
+    fields = RowEncoder(PerformanceResponse).fields
+    return json.loads(PerformanceResponse(**dict(zip(fields, row))).model_dump_json())
+
+
+def test_rows_encode_like_pydantic(encoder):
+    assert json.loads(encoder.many(ROWS)) == [_pydantic(row) for row in ROWS]
+    assert [json.loads(encoder.one(row)) for row in ROWS] == [_pydantic(row) for row in ROWS]
+    lines = encoder.lines(ROWS).decode().split("\n")
+    assert lines[-1] == "" and [json.loads(line) for line in lines[:-1]] == [_pydantic(row) for row in ROWS]
+
+
+def test_keys_follow_the_model_order(encoder):
+    assert list(json.loads(encoder.one(ROWS[0]))) == list(PerformanceResponse.model_fields)
+
+
+def test_empty_results(encoder):
+    assert encoder.many([]) == b"[]"
+    assert encoder.lines([]) == b""
+
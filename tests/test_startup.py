@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+import pytest
+from benchmarks.cold_start import measure_once
+
+# 🔹 Bornes larges : elles détectent une régression d'un ordre de grandeur
+# (DDL ou préchauffage refaits à chaque démarrage), pas quelques millisecondes
+STARTUP_MAX_MS = 2000  # lifespan : schéma, préchauffage du pool et des caches
+FIRST_REQUEST_MAX_MS = 1000
+
+
+def _env(tmp_path):
+    env = os.environ.copy()
+    env["DB_PATH"] = str(tmp_path / "cold.db")
+    return env
+
+
+def test_cold_start_on_new_and_current_schema(tmp_path):
+    env = _env(tmp_path)
+    created = measure_once(env)  # Base vide : toutes les migrations
+    restarted = measure_once(env)  # Schéma à jour : aucune requête DDL
+    for timings in (created, restarted):
+        assert timings["startup_ms"] < STARTUP_MAX_MS, timings
+        assert timings["first_request_ms"] < FIRST_REQUEST_MAX_MS, timings
+
+
+def test_startup_skips_ddl_when_the_schema_is_current(client, monkeypatch):
+    from app import database
+
+    monkeypatch.setattr(database, "migrate", lambda conn: pytest.fail("migrations rejouées"))
+    assert database.create_tables() is False  # Base déjà migrée par le lifespan du client
+
+
+def test_heavy_modules_are_imported_on_first_use(tmp_path):
+    code = "import sys, app.main; print(','.join(m for m in ('numpy', 'pyarrow') if m in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", code], env=_env(tmp_path), check=True,
+                            capture_output=True, text=True).stdout
+    assert output.strip() == ""
@@ -0,0 +1,83 @@
+import asyncio
+from app.utils.events import Broker
+
+
+def test_stream_requires_valid_token(client):
+    response = client.get("/performance/stream/", headers={"Authorization": "Bearer not-a-token"})
+    assert response.status_code == 401
+
+
+def test_athlete_cannot_follow_other_athletes(client, make_user):
+    _, headers = make_user()
+    other, _ = make_user()
+    response = client.get("/performance/stream/", params={"id_user": other}, headers=headers)
+    assert response.status_code == 403
+
+
+def test_subscription_receives_only_followed_athletes():
+    async def scenario():
+        broker = Broker()
+        with broker.subscribe([1]) as subscription:
+            broker.publish("created", 2, {})
+            broker.publish("created", 1, {})
+            _, kind, data = await asyncio.wait_for(subscription.get(), 1)
+            assert b'"id_user":1' in data.replace(b" ", b"")
+            await asyncio.sleep(0)
+            assert subscription._queue.empty()
+
+    asyncio.run(scenario())
+
+
+def _request(path, headers):
+    return {"type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+            "root_path": "", "server": ("testserver", 80), "client": ("testclient", 50000),
+            "headers": [(key.lower().encode(), value.encode()) for key, value in headers.items()]}
+
+
+def test_disconnect_before_streaming_leaves_no_subscriber(client, make_user):
+    from starlette.requests import ClientDisconnect
+    from app.main import app
+    from app.utils.events import broker
+
+    _, headers = make_user()
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        raise OSError("client déconnecté")  # Avant même l'envoi des en-têtes
+
+    async def scenario():
+        try:
+            await app(_request("/performance/stream/", headers), receive, send)
+        except (ClientDisconnect, OSError):
+            pass
+
+    before = len(broker)
+    asyncio.run(scenario())
+    assert len(broker) == before
+
+
+def test_subscription_lives_while_the_stream_is_read():
+    from app.routers.stream import _sse
+    from app.utils.events import broker
+
+    async def scenario():
+        before = len(broker)
+        stream = _sse([1])
+        assert len(broker) == before  # Générateur créé, pas encore lu
+        assert await stream.__anext__() == b": ok\n\n"
+        assert len(broker) == before + 1
+        await stream.aclose()
+        assert len(broker) == before
+
+    asyncio.run(scenario())
+
+
+def test_full_stream_answers_503(client, make_user, monkeypatch):
+    from app.utils.events import broker
+
+    monkeypatch.setattr(broker, "max_subscribers", 0)
+    _, headers = make_user()
+    assert client.get("/performance/stream/", headers=headers).status_code == 503
@@ -0,0 +1,51 @@
+from app.routers import performances
+
+PATH = "/performance/performances/summary"
+
+
+def _create(client, headers, *powers):
+    for power in powers:
+        assert client.post("/performance/performances/", json={"power_max": power}, headers=headers).status_code == 200
+
+
+def test_summary_lists_athletes_in_requested_order(client, make_user):
+    first, first_headers = make_user()
+    second, _ = make_user()
+    _create(client, first_headers, 250, 300)
+
+    _, coach_headers = make_user("coach")
+    body = client.post(PATH, json={"id_users": [second, first, second, 999999]}, headers=coach_headers).json()
+    assert [athlete["id_user"] for athlete in body["athletes"]] == [second, first]
+    assert body["athletes"][0]["nombre_seances"] == 0 and body["athletes"][0]["power_max"] is None
+    assert body["athletes"][1]["power_max"] == 300 and body["athletes"][1]["nombre_seances"] == 2
+    assert body["introuvables"] == [999999]
+
+
+def test_compact_summary_matches_the_objects(client, make_user):
+    id_user, headers = make_user()
+    _create(client, headers, 280)
+    full = client.post(PATH, json={"id_users": [id_user]}, headers=headers).json()
+    compact = client.post(PATH, json={"id_users": [id_user], "compact": True}, headers=headers).json()
+    assert [dict(zip(compact["colonnes"], row)) for row in compact["lignes"]] == full["athletes"]
+    assert compact["introuvables"] == full["introuvables"] == []
+
+
+def test_empty_summary(client, make_user):
+    _, headers = make_user()
+    assert client.post(PATH, json={"id_users": []}, headers=headers).json() == {"athletes": [], "introuvables": []}
+
+
+def test_summary_size_is_bounded(client, make_user, monkeypatch):
+    monkeypatch.setattr(performances, "SUMMARY_MAX_ATHLETES", 2)
+    _, coach_headers = make_user("coach")
+    assert client.post(PATH, json={"id_users": [1, 2, 3]}, headers=coach_headers).status_code == 413
+    assert client.post(PATH, json={"id_users": [1, 1, 2]}, headers=coach_headers).status_code == 200
+
+
+def test_summary_is_scoped_to_the_caller(client, make_user):
+    id_user, headers = make_user()
+    other, _ = make_user()
+    assert client.post(PATH, json={"id_users": [id_user]}, headers=headers).status_code == 200
+    assert client.post(PATH, json={"id_users": [id_user, other]}, headers=headers).status_code == 403
+    assert client.post(PATH, json={"id_users": [id_user]},
+                       headers={"Authorization": "Bearer not-a-token"}).status_code == 401
@@ -0,0 +1,73 @@
+import sqlite3
+import pytest
+from app.migrations import migrate
+from app.utils import vo2_bounds
+
+LIST = "/performance/performances/"
+
+
+@pytest.mark.parametrize("text, bounds", [
+    ("[74, 88]", (74.0, 88.0)),
+    ("74-88", (74.0, 88.0)),
+    ("88-74", (74.0, 88.0)),
+    ("60", (60.0, 60.0)),
+    ("[52.5, 60.25, 70]", (52.5, 60.25)),  # Deux premiers nombres seulement
+    ("[]", (None, None)),
+    ("abc", (None, None)),
+    ("", (None, None)),
+    (None, (None, None)),
+])
+def test_parse(text, bounds):
+    assert vo2_bounds.parse(text) == bounds
+
+
+def test_backfill_converts_every_batch(conn):
+    conn.executemany("INSERT INTO performances (id_user, vo2_class) VALUES (1, ?)",
+                     [("[74, 88]",), (None,), ("60-70",), ("abc",), ("50",)])
+    assert vo2_bounds.backfill(conn, batch=2) == 4  # Lignes sans classe ignorées
+    rows = conn.execute("SELECT vo2_class_low, vo2_class_high FROM performances ORDER BY id_performance")
+    assert [tuple(row) for row in rows] == [(74, 88), (None, None), (60, 70), (None, None), (50, 50)]
+
+
+def test_migration_converts_existing_classes():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE performances (id_performance INTEGER PRIMARY KEY AUTOINCREMENT, id_user INTEGER, "
+                 "power_max REAL, hr_max REAL, vo2_max REAL, rf_max REAL, cadence_max REAL, vo2_class TEXT, "
+                 "ressenti INTEGER, date_performance TEXT DEFAULT CURRENT_TIMESTAMP)")
+    conn.execute("INSERT INTO performances (id_user, vo2_class) VALUES (1, '[74, 88]')")
+    conn.commit()
+    migrate(conn)
+    assert conn.execute("SELECT vo2_class_low, vo2_class_high FROM performances").fetchone() == (74, 88)
+    conn.close()
+
+
+def _powers(client, headers, **params):
+    response = client.get(LIST, params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return [performance["power_max"] for performance in response.json()]
+
+
+def test_vo2_class_filters_run_on_typed_bounds(client, make_user):
+    _, headers = make_user()
+    for power, vo2_class in ((250, "[74, 88]"), (300, "60-70"), (320, None), (340, "80")):
+        client.post(LIST, json={"power_max": power, "vo2_class": vo2_class}, headers=headers)
+    _, other_headers = make_user()
+    client.post(LIST, json={"power_max": 400, "vo2_class": "74-88"}, headers=other_headers)
+
+    assert _powers(client, headers, vo2_class="74-88") == [250]
+    assert _powers(client, headers, vo2_class="[88, 74]") == [250]  # Même classe, autre écriture
+    assert _powers(client, headers, vo2_class="74-80") == []
+    assert _powers(client, headers, vo2_class_max=72) == [300]
+    assert _powers(client, headers, vo2_class_min=70) == [250, 340]
+    assert _powers(client, headers, vo2_class_min=60, vo2_class_max=85) == [300, 340]
+    assert client.get(LIST, params={"vo2_class": "abc"}, headers=headers).status_code == 400
+
+
+def test_update_moves_the_vo2_bounds(client, make_user):
+    _, headers = make_user()
+    id_performance = client.post(LIST, json={"power_max": 250, "vo2_class": "60-70"},
+                                 headers=headers).json()["id_performance"]
+    client.put(f"{LIST}{id_performance}", json={"power_max": 250, "vo2_class": "[74, 88]"}, headers=headers)
+
+    assert _powers(client, headers, vo2_class="60-70") == []
+    assert _powers(client, headers, vo2_class="74-88") == [250]